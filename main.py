@@ -1,72 +1,309 @@
 """The main module
 """
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
 from threading import Thread
 from time import strftime, gmtime
 import timeit
 
-from src.crawler_bot import config, custom_logging, extractor, monitoring, retriever, storage
-
-# load seed, remove linebreak and empty lines
-with open(config.SEED_FILE, encoding="utf-8") as f:
-  seed = f.readlines()
-  seed = [a.replace("\n", "") for a in seed if a != ""]
-
-# setting up the logger
-logger = custom_logging.Logger(custom_logging.LogLevel.DEBUG, "logfile")
-logger.log_info("MAIN", "START")
-
-# setting up the databases
-html_database = storage.HTMLDatabase(logger)
-crawled_urls = storage.CrawledURLs(logger, config.CRAWLING_LIMIT)
-domain_timers = storage.DomainTimers(logger)
-robots_txt_database = storage.RobotsTXTDatabase(logger)
-url_queue = storage.URLQueue(logger, seed)
-unprocessed_html_database = storage.UnprocessedHTMLDatabase(logger)
-url_map = storage.URLMap(logger)
-
-# setting up the global monitor
-monitor = monitoring.GlobalMonitor(logger)
-
-# setting up the retrievers
-retrievers = []
-for i in range(config.NUM_RETRIEVER_THREADS):
-  my_retriever = retriever.Retriever(i, logger, url_queue, crawled_urls,
-                                     unprocessed_html_database, domain_timers,
-                                     robots_txt_database, monitor)
-  retrievers.append(my_retriever)
-
-# setting up the extractors
-extractors = []
-
-for i in range(config.NUM_EXTRACTOR_THREADS):
-  my_extractor = extractor.Extractor(i, logger, html_database,
-                                     unprocessed_html_database, url_queue,
-                                     crawled_urls, url_map, monitor)
-  extractors.append(my_extractor)
-
-# start timer
-start = timeit.default_timer()
-
-# putting all retrievers and extractors in seperate threads
-threads = []
-for single_retriever in retrievers:
-  t = Thread(target=single_retriever.start_retriever, args=())
-  threads.append(t)
-  t.start()
-
-for single_extractor in extractors:
-  t = Thread(target=single_extractor.start_extractor, args=())
-  threads.append(t)
-  t.start()
-
-try:
-  # wait for all threads to end
-  for t in threads:
-    t.join()
-finally:
-  # sort list after relevance
-  html_database.sort_after_relevance()
-  relevant_urls = html_database.get_list_of_relevant_urls()
+from src.crawler_bot import checkpoint, config, custom_logging, distributed, extractor, monitoring, near_duplicates, retriever, scheduling, storage
+
+# results of a crawl that are written to a JSON file each
+RESULT_FILES = [
+    "html_database", "unprocessed_html_database", "crawled_urls", "url_map",
+    "robotstxt", "pruned_domains"
+]
+
+
+def save_results(file_prefix: str, results: dict) -> None:
+  """Writes the results of a crawl to the assets directory
+
+  Args:
+    file_prefix: prefix of the filenames
+    results: dictionary of the names of the results to their JSON documents,
+              plus the list of relevant urls
+
+  Returns:
+    None
+  """
+  for name in RESULT_FILES:
+    with open("assets/" + file_prefix + "_" + name + ".json",
+              "x",
+              encoding="utf-8") as a:
+      a.write(results[name])
+
+  with open("assets/" + file_prefix + "_relevant_urls.csv",
+            "x",
+            encoding="utf-8") as a:
+    for url in results["relevant_urls"]:
+      a.writelines(url + "\n")
+
+
+def crawl(seed: list[str],
+          resume: bool,
+          shard_id: int = None,
+          amount_shards: int = 1,
+          coordinator_address: tuple[str, int] = None,
+          authkey: bytes = None) -> None:
+  """Crawls the seed, either alone or as one shard of a distributed crawl
+
+  Args:
+    seed: list of urls that define the seed
+    resume: continue the crawl of the last checkpoint
+    shard_id: id of the shard, None if the crawl is not sharded
+    amount_shards: amount of shards of the crawl
+    coordinator_address: tuple of host and port of the coordinator
+    authkey: the shared secret the shards authenticate with at the coordinator
+
+  Returns:
+    None
+  """
+  # setting up the logger
+  if shard_id is None:
+    logger = custom_logging.Logger(custom_logging.LogLevel.DEBUG, "logfile")
+  else:
+    logger = custom_logging.Logger(custom_logging.LogLevel.DEBUG,
+                                   "logfile_shard" + str(shard_id))
+  logger.log_info("MAIN", "START")
+
+  # the parser processes are forked before any thread is started, an empty
+  # task makes the pool start all of them at once
+  if config.PARSER_PROCESSES > 0:
+    parser_pool = ProcessPoolExecutor(config.PARSER_PROCESSES)
+    parser_pool.submit(int).result()
+  else:
+    parser_pool = None
+
+  # every shard keeps its own caches and checkpoint
+  robots_txt_cache_file = distributed.get_shard_path(
+      config.ROBOTS_TXT_CACHE_FILE, shard_id)
+  if shard_id is None:
+    crawling_limit = config.CRAWLING_LIMIT
+    shard_client = None
+  else:
+    crawling_limit = distributed.get_shard_limit(config.CRAWLING_LIMIT,
+                                                 shard_id, amount_shards)
+    shard_client = distributed.ShardClient(logger, shard_id, amount_shards,
+                                           coordinator_address, authkey)
+
+  # setting up the databases
+  html_database = storage.HTMLDatabase(logger)
+  crawled_urls = storage.CrawledURLs(logger, crawling_limit)
+  domain_timers = storage.DomainTimers(logger)
+  robots_txt_database = storage.RobotsTXTDatabase(logger)
+  robots_txt_database.load(robots_txt_cache_file)
+  unprocessed_html_database = storage.UnprocessedHTMLDatabase(
+      logger, parser_pool=parser_pool)
+  url_map = storage.URLMap(logger)
+  if config.USE_HTTP_CACHE:
+    http_cache = storage.HTTPCache(
+        logger, distributed.get_shard_path(config.HTTP_CACHE_DIR, shard_id))
+    http_cache.load()
+  else:
+    http_cache = None
+
+  if config.NEAR_DUPLICATE_MODE != "off":
+    near_duplicate_index = near_duplicates.NearDuplicateIndex(logger)
+  else:
+    near_duplicate_index = None
+
+  # restore the last checkpoint or start a new one
+  checkpointer = checkpoint.Checkpointer(
+      logger, distributed.get_shard_path(config.CHECKPOINT_DIR, shard_id),
+      crawled_urls, html_database, url_map, unprocessed_html_database,
+      robots_txt_database, http_cache, robots_txt_cache_file,
+      near_duplicate_index)
+  if resume:
+    seed = checkpointer.resume(seed)
+  else:
+    checkpointer.reset()
+  frontier_db_file = distributed.get_shard_path(config.FRONTIER_DB_FILE,
+                                                shard_id)
+  if shard_client is None:
+    url_queue = storage.URLQueue(logger, seed, frontier_db_file)
+  else:
+    url_queue = distributed.ShardedURLQueue(logger, seed, shard_client,
+                                            crawled_urls, frontier_db_file)
+  checkpointer.restore_frontier(url_queue)
+  scheduler = scheduling.PolitenessScheduler(logger, url_queue, domain_timers,
+                                             html_database)
+  checkpointer.restore_scheduler(scheduler)
+
+  # a single async retriever replaces all retriever threads
+  if config.RETRIEVER_MODE == "async":
+    num_retrievers = 1
+  else:
+    num_retrievers = config.NUM_RETRIEVER_THREADS
+
+  # setting up the global monitor, a shard only finishes when the coordinator
+  # says so, since other shards might still send it urls
+  monitor = monitoring.GlobalMonitor(logger,
+                                     num_retrievers,
+                                     finish_when_quiescent=shard_client is None)
+
+  # setting up the retrievers
+  retrievers = []
+  for i in range(num_retrievers):
+    if config.RETRIEVER_MODE == "async":
+      my_retriever = retriever.AsyncRetriever(i, logger, scheduler,
+                                              crawled_urls,
+                                              unprocessed_html_database,
+                                              domain_timers,
+                                              robots_txt_database, monitor,
+                                              http_cache)
+    else:
+      my_retriever = retriever.Retriever(i, logger, scheduler, crawled_urls,
+                                         unprocessed_html_database,
+                                         domain_timers, robots_txt_database,
+                                         monitor, http_cache)
+    retrievers.append(my_retriever)
+
+  # setting up the extractors
+  extractors = []
+
+  for i in range(config.NUM_EXTRACTOR_THREADS):
+    my_extractor = extractor.Extractor(i, logger, html_database,
+                                       unprocessed_html_database, url_queue,
+                                       crawled_urls, url_map, monitor,
+                                       http_cache, near_duplicate_index)
+    extractors.append(my_extractor)
+
+  # start timer
+  start = timeit.default_timer()
+  checkpointer.start(scheduler)
+  if shard_client is not None:
+    shard_client.start(url_queue, monitor)
+
+  # putting all retrievers and extractors in seperate threads
+  threads = []
+  for single_retriever in retrievers:
+    t = Thread(target=single_retriever.start_retriever, args=())
+    threads.append(t)
+    t.start()
+
+  for single_extractor in extractors:
+    t = Thread(target=single_extractor.start_extractor, args=())
+    threads.append(t)
+    t.start()
+
+  try:
+    # wait for all threads to end
+    for t in threads:
+      t.join()
+  finally:
+    # last checkpoint, before the html database gets sorted
+    checkpointer.stop()
+    checkpointer.save()
+    if parser_pool is not None:
+      parser_pool.shutdown(cancel_futures=True)
+
+    # sort list after relevance
+    html_database.sort_after_relevance()
+    relevant_urls = html_database.get_list_of_relevant_urls()
+
+    # measure time
+    stop = timeit.default_timer()
+    runtime = round(stop - start)
+
+    logger.log_info("MAIN", "DONE")
+    logger.log_info("MAIN", "Runtime: " + str(runtime) + "s")
+    print("Runtime: " + str(runtime) + "s")
+
+    # print information
+    print("len crawled urls: ", str(len(crawled_urls.crawled_urls)))
+    print("len unprocessed html database: ",
+          str(len(unprocessed_html_database.database)))
+    print("len html database: ", str(len(html_database.database)))
+    print("len relevant urls: ", str(len(relevant_urls)))
+    if near_duplicate_index is not None:
+      print("near-duplicate hit rate: ",
+            str(round(near_duplicate_index.get_hit_rate(), 3)))
+
+    # safe results
+    filename = strftime("%Y%m%d_%H%M%S", gmtime())
+
+    robots_txt_database.save(robots_txt_cache_file)
+    if http_cache is not None:
+      http_cache.save()
+
+    results = {
+        "html_database": html_database.to_json(),
+        "unprocessed_html_database": unprocessed_html_database.to_json(),
+        "crawled_urls": crawled_urls.to_json(),
+        "url_map": url_map.to_json(),
+        "robotstxt": robots_txt_database.to_json(),
+        "pruned_domains": json.dumps(scheduler.get_pruning_report()),
+        "relevant_urls": relevant_urls
+    }
+    # the coordinator merges the results of all shards
+    if shard_client is None:
+      save_results(logger.file_prefix, results)
+    else:
+      shard_client.send_results(results)
+
+  # create url map, only works with very few fetched urls!!
+  #url_map.draw_map("logs/" + logger.file_prefix + "_url_map")
+
+
+def crawl_distributed(seed: list[str], resume: bool, amount_shards: int,
+                      shard_ids: list[int],
+                      coordinator_address: tuple[str, int],
+                      authkey: bytes) -> None:
+  """Runs shards of a distributed crawl in separate processes and the
+      coordinator, unless it runs on another machine
+
+  Args:
+    seed: list of urls that define the seed
+    resume: continue the crawl of the last checkpoint
+    amount_shards: amount of shards of the crawl
+    shard_ids: ids of the shards that run on this machine
+    coordinator_address: tuple of host and port of the coordinator on another
+                          machine, None to start it here
+    authkey: the shared secret the shards authenticate with at the coordinator
+
+  Returns:
+    None
+  """
+  logger = custom_logging.Logger(custom_logging.LogLevel.DEBUG, "logfile")
+  logger.log_info("MAIN", "START")
+  if coordinator_address is None:
+    address = config.SHARD_COORDINATOR_ADDRESS
+    coordinator = distributed.Coordinator(logger, amount_shards, address,
+                                          authkey)
+  else:
+    address = coordinator_address
+    coordinator = None
+
+  # spawn instead of fork, the parent might already hold locks of the threads
+  # of the imported libraries
+  context = multiprocessing.get_context("spawn")
+  processes = [
+      context.Process(target=crawl,
+                      args=(seed, resume, shard_id, amount_shards, address,
+                            authkey))
+      for shard_id in shard_ids
+  ]
+  start = timeit.default_timer()
+  for process in processes:
+    process.start()
+
+  if coordinator is not None:
+    try:
+      results = distributed.merge_results(coordinator.run(processes))
+    except RuntimeError as e:
+      logger.log_error("MAIN", "crawl aborted, " + str(e))
+      print("crawl aborted, " + str(e))
+      for process in processes:
+        process.terminate()
+      for process in processes:
+        process.join()
+      return
+  for process in processes:
+    process.join()
+  if coordinator is None:
+    return
 
   # measure time
   stop = timeit.default_timer()
@@ -76,46 +313,58 @@ finally:
   logger.log_info("MAIN", "Runtime: " + str(runtime) + "s")
   print("Runtime: " + str(runtime) + "s")
 
-  # print information
-  print("len crawled urls: ", str(len(crawled_urls.crawled_urls)))
+  # print information of all shards
+  print("len crawled urls: ", str(len(json.loads(results["crawled_urls"]))))
   print("len unprocessed html database: ",
-        str(len(unprocessed_html_database.database)))
-  print("len html database: ", str(len(html_database.database)))
-  print("len relevant urls: ", str(len(relevant_urls)))
-
-  # safe results
-  filename = strftime("%Y%m%d_%H%M%S", gmtime())
-
-  with open("assets/" + logger.file_prefix + "_html_database.json",
-            "x",
-            encoding="utf-8") as a:
-    a.write(html_database.to_json())
+        str(len(json.loads(results["unprocessed_html_database"]))))
+  print("len html database: ", str(len(json.loads(results["html_database"]))))
+  print("len relevant urls: ", str(len(results["relevant_urls"])))
 
-  with open("assets/" + logger.file_prefix + "_unprocessed_html_database.json",
-            "x",
-            encoding="utf-8") as a:
-    a.write(unprocessed_html_database.to_json())
-
-  with open("assets/" + logger.file_prefix + "_crawled_urls.json",
-            "x",
-            encoding="utf-8") as a:
-    a.write(crawled_urls.to_json())
+  save_results(logger.file_prefix, results)
 
-  with open("assets/" + logger.file_prefix + "_url_map.json",
-            "x",
-            encoding="utf-8") as a:
-    a.write(url_map.to_json())
 
-  with open("assets/" + logger.file_prefix + "_robotstxt.json",
-            "x",
-            encoding="utf-8") as a:
-    a.write(robots_txt_database.to_json())
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Focused crawler")
+  parser.add_argument("--resume",
+                      action="store_true",
+                      help="continue the crawl of the last checkpoint")
+  parser.add_argument("--shards",
+                      type=int,
+                      default=1,
+                      help="split the crawl into this many shards that run " +
+                      "in separate processes")
+  parser.add_argument("--shard-ids",
+                      type=int,
+                      nargs="+",
+                      help="ids of the shards that run on this machine, " +
+                      "default all")
+  parser.add_argument("--coordinator",
+                      help="host:port of the coordinator of a crawl whose " +
+                      "shards run on several machines, default: start it here")
+  arguments = parser.parse_args()
 
-  with open("assets/" + logger.file_prefix + "_relevant_urls.csv",
-            "x",
-            encoding="utf-8") as a:
-    for url in relevant_urls:
-      a.writelines(url + "\n")
+  # load seed, remove linebreak and empty lines
+  with open(config.SEED_FILE, encoding="utf-8") as f:
+    seed = f.readlines()
+    seed = [a.replace("\n", "") for a in seed if a != ""]
 
-# create url map, only works with very few fetched urls!!
-#url_map.draw_map("logs/" + logger.file_prefix + "_url_map")
+  if arguments.shards > 1:
+    shard_ids = arguments.shard_ids
+    if shard_ids is None:
+      shard_ids = list(range(arguments.shards))
+    if arguments.coordinator is None:
+      coordinator_address = None
+      host = config.SHARD_COORDINATOR_ADDRESS[0]
+    else:
+      coordinator_address = distributed.parse_address(arguments.coordinator)
+      host = coordinator_address[0]
+    # the connections exchange pickled objects, a coordinator that is
+    # reachable from other machines doesn't start without a secret
+    try:
+      authkey = distributed.get_authkey(host, coordinator_address is None)
+    except ValueError as e:
+      parser.error(str(e))
+    crawl_distributed(seed, arguments.resume, arguments.shards, shard_ids,
+                      coordinator_address, authkey)
+  else:
+    crawl(seed, arguments.resume)
@@ -0,0 +1,128 @@
+"""Benchmark that compares the scheduler that only takes a fixed amount of urls
+from the frontier ahead of time with the Mercator-style back queues
+
+One domain floods the frontier with the urls of the best priority, the other
+domains only have a few urls each. Requests are simulated by sleeping for a
+fixed latency. Both variants need about the same time until the flooding
+domain is done, the benchmark reports when the urls of the small domains were
+done. Run from the repository root:
+
+  python -m src.benchmark_back_queues
+"""
+from collections import deque
+import threading
+import time
+import timeit
+
+from src.crawler_bot.config import SCHEDULER_BUFFER_SIZE
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.scheduling import PolitenessScheduler
+from src.crawler_bot.storage import DomainTimers, URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+################################################################################
+amount_workers = 4
+crawl_delay = 0.1
+request_latency = 0.02
+# urls of the domain that floods the frontier, they get the best priority
+amount_flooding_urls = 2 * SCHEDULER_BUFFER_SIZE
+# (amount of small domains, urls per domain)
+small_domains = (100, 2)
+################################################################################
+
+
+class BufferedScheduler(PolitenessScheduler):
+  """Scheduler that stops taking urls from the frontier once
+      SCHEDULER_BUFFER_SIZE urls are queued, even if no domain is ready
+"""
+
+  def _fill(self) -> None:
+    """Moves the best urls from the url queue into the domain queues until
+        SCHEDULER_BUFFER_SIZE urls are queued
+
+    Returns:
+      None
+    """
+    while self.amount_queued < SCHEDULER_BUFFER_SIZE and (
+        not self.url_queue.is_empty()):
+      url, is_seed = self.url_queue.get_url()
+      domain = url.domain
+      if domain not in self.domain_queues:
+        self.domain_queues[domain] = deque()
+      self.domain_queues[domain].append((url, is_seed))
+      self.amount_queued += 1
+      self._schedule(domain)
+
+
+def create_url_queue() -> URLQueue:
+  """Creates a url queue that is dominated by a single domain
+
+  Returns:
+    the url queue
+  """
+  url_queue = URLQueue(logger, [])
+  for page in range(amount_flooding_urls):
+    url_queue.add_url(
+        get_url_record("https://www.flooding.com/page" + str(page)),
+        {"category": 0.1})
+  amount_domains, urls_per_domain = small_domains
+  for domain_number in range(amount_domains):
+    for page in range(urls_per_domain):
+      url_queue.add_url(
+          get_url_record("https://www.domain" + str(domain_number) +
+                         ".com/page" + str(page)), {"category": 0.5})
+  return url_queue
+
+
+def run(name: str, scheduler: PolitenessScheduler,
+        domain_timers: DomainTimers) -> None:
+  """Runs the workers and prints the results
+
+  Args:
+    name: name of the variant
+    scheduler: the scheduler the workers get their urls from
+    domain_timers: the domain timers of the scheduler
+
+  Returns:
+    None
+  """
+  lock = threading.Lock()
+  statistics = {"small domains done": 0}
+
+  def worker() -> None:
+    while not scheduler.is_empty():
+      url, _ = scheduler.get_url()
+      if url is None:
+        time.sleep(min(scheduler.time_until_next_url() or 0.1, 0.1))
+        continue
+      domain = url.domain
+      time.sleep(request_latency)
+      domain_timers.set_timer(domain)
+      scheduler.release(url, crawl_delay)
+      if domain != "flooding.com":
+        with lock:
+          statistics["small domains done"] = timeit.default_timer()
+
+  threads = [threading.Thread(target=worker) for _ in range(amount_workers)]
+  start = timeit.default_timer()
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  runtime = timeit.default_timer() - start
+  print(name)
+  print("  runtime:             " + str(round(runtime, 2)) + "s")
+  print("  small domains done:  " +
+        str(round(statistics["small domains done"] - start, 2)) + "s")
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_back_queues")
+print("workers: " + str(amount_workers) + ", crawl delay: " +
+      str(crawl_delay) + "s, flooding urls: " + str(amount_flooding_urls) +
+      ", small domains: " + str(small_domains[0]) + "x" +
+      str(small_domains[1]))
+for name, scheduler_class in [("fixed buffer", BufferedScheduler),
+                              ("back queues", PolitenessScheduler)]:
+  domain_timers = DomainTimers(logger)
+  run(name, scheduler_class(logger, create_url_queue(), domain_timers),
+      domain_timers)
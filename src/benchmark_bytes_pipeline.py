@@ -0,0 +1,105 @@
+"""Benchmark that compares the decoding of fetched pages by requests
+(response.text) with passing the raw bytes to decode_html
+
+requests guesses the encoding by running a charset detector over the whole
+body if the server sends no Content-Type, and assumes ISO-8859-1 for text/html
+without charset, which garbles every non-ASCII character of a UTF-8 page.
+decode_html uses the declared encoding, the meta charset or UTF-8. Run from the
+repository root:
+
+  python -m src.benchmark_bytes_pipeline
+"""
+import random
+import time
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.crawler_bot.fetching import decode_html, get_declared_encoding
+
+################################################################################
+amount_pages = 1000
+paragraphs_per_page = 150
+################################################################################
+
+WORDS = [
+    "malware", "ransomware", "exploit", "vulnerability", "patch", "threat",
+    "actor", "campaign", "Sicherheitslücke", "überwachung", "sécurité",
+    "attaque", "phishing", "credential", "botnet", "–", "zero-day"
+]
+
+
+def create_page(with_meta_charset: bool) -> str:
+  """Creates a random html page with some non-ASCII words
+
+  Args:
+    with_meta_charset: should the page declare its charset in a meta tag
+
+  Returns:
+    the html page
+  """
+  head = "<meta charset=\"utf-8\">" if with_meta_charset else ""
+  paragraphs = [
+      "<p>" + " ".join(random.choices(WORDS, k=40)) + ".</p>"
+      for _ in range(paragraphs_per_page)
+  ]
+  return ("<html><head>" + head + "<title>advisory</title></head><body>" +
+          "".join(paragraphs) + "</body></html>")
+
+
+def requests_text(content: bytes, content_type: str) -> str:
+  """Decodes the page like the retriever did before with response.text
+
+  Args:
+    content: the raw page
+    content_type: the Content-Type header, None if missing
+
+  Returns:
+    the decoded page
+  """
+  response = Response()
+  response._content = content
+  response.headers = CaseInsensitiveDict()
+  if content_type is not None:
+    response.headers["Content-Type"] = content_type
+  # requests sets the encoding from the headers when building the response
+  response.encoding = None
+  if content_type is not None:
+    response.encoding = get_encoding_from_headers(response.headers)
+  return response.text
+
+
+def run(name: str, decode, pages: list[str], content_type: str) -> None:
+  """Decodes all pages and prints cpu time and amount of garbled pages
+
+  Args:
+    name: name of the variant
+    decode: function that takes raw page and content type and decodes it
+    pages: the pages as strings
+    content_type: the Content-Type header, None if missing
+
+  Returns:
+    None
+  """
+  raw_pages = [a.encode("utf-8") for a in pages]
+  start = time.process_time()
+  decoded_pages = [decode(a, content_type) for a in raw_pages]
+  cpu_time = time.process_time() - start
+  garbled = sum(a != b for a, b in zip(pages, decoded_pages))
+  print("  " + name)
+  print("    cpu time per 1k pages: " +
+        str(round(cpu_time * 1000 / len(pages), 3)) + "s")
+  print("    garbled pages:         " + str(garbled) + "/" + str(len(pages)))
+
+
+pages = [create_page(i % 2 == 0) for i in range(amount_pages)]
+print(
+    str(amount_pages) + " pages, average size " +
+    str(round(sum(len(a) for a in pages) / len(pages) / 1000)) + "kB, " +
+    "half of them with meta charset")
+
+for content_type in [None, "text/html"]:
+  print("Content-Type: " + str(content_type))
+  run("requests response.text", requests_text, pages, content_type)
+  run("decode_html", lambda a, b: decode_html(a, get_declared_encoding(b)),
+      pages, content_type)
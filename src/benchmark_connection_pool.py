@@ -0,0 +1,134 @@
+"""Benchmark that compares bare requests.get calls with the pooled keep-alive
+connections of the SessionPool against a local test server
+
+The server counts the TCP connections it accepts, so the difference between
+both variants is the amount of handshakes saved (on https every saved
+connection is also a saved TLS handshake). Run from the repository root:
+
+  python -m src.benchmark_connection_pool
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import timeit
+import numpy as np
+import requests
+
+from src.crawler_bot.fetching import SessionPool
+
+################################################################################
+amount_requests = 2000
+amount_threads = 4
+# different loopback addresses act as different hosts
+hosts = ["127.0.0.1", "127.0.0.2"]
+page_size = 20000
+################################################################################
+
+
+class CountingServer(ThreadingHTTPServer):
+  """HTTP server that counts the accepted connections
+
+  Attributes:
+    connections: amount of accepted connections
+"""
+  daemon_threads = True
+
+  def __init__(self, *args):
+    """Inits CountingServer"""
+    super().__init__(*args)
+    self.connections = 0
+    self.connections_lock = threading.Lock()
+
+  def process_request(self, request, client_address):
+    """Counts the connection before handling it"""
+    with self.connections_lock:
+      self.connections += 1
+    super().process_request(request, client_address)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+  """Answers every request with the same html page using keep-alive"""
+  protocol_version = "HTTP/1.1"
+  # headers and body are written separately, without this every keep-alive
+  # response waits for the delayed ACK of the client
+  disable_nagle_algorithm = True
+  body = b"<html><body>" + b"a" * page_size + b"</body></html>"
+
+  def do_GET(self):
+    """Sends the page"""
+    self.send_response(200)
+    self.send_header("Content-Type", "text/html; charset=utf-8")
+    self.send_header("Content-Length", str(len(self.body)))
+    self.end_headers()
+    self.wfile.write(self.body)
+
+  def log_message(self, *args):
+    """Keeps the output clean"""
+
+
+def start_servers() -> list[CountingServer]:
+  """Starts one server per host
+
+  Returns:
+    list of the running servers
+  """
+  servers = []
+  for host in hosts:
+    server = CountingServer((host, 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    servers.append(server)
+  return servers
+
+
+def run(name: str, get, urls: list[str], servers: list[CountingServer]) -> int:
+  """Requests all urls and prints connections and latencies
+
+  Args:
+    name: name of the variant
+    get: function that takes a url and requests it
+    urls: the urls to request
+    servers: the test servers
+
+  Returns:
+    amount of connections that were opened
+  """
+  connections_before = sum(a.connections for a in servers)
+
+  def timed_get(url: str) -> float:
+    start = timeit.default_timer()
+    get(url).content
+    return timeit.default_timer() - start
+
+  start = timeit.default_timer()
+  with ThreadPoolExecutor(amount_threads) as executor:
+    latencies = list(executor.map(timed_get, urls))
+  runtime = timeit.default_timer() - start
+  connections = sum(a.connections for a in servers) - connections_before
+
+  print(name)
+  print("  runtime:     " + str(round(runtime, 2)) + "s")
+  print("  connections: " + str(connections))
+  print("  p50 latency: " + str(round(np.percentile(latencies, 50) * 1000, 2)) +
+        "ms")
+  print("  p99 latency: " + str(round(np.percentile(latencies, 99) * 1000, 2)) +
+        "ms")
+  return connections
+
+
+servers = start_servers()
+urls = [
+    "http://" + hosts[i % len(hosts)] + ":" +
+    str(servers[i % len(hosts)].server_address[1]) + "/page" + str(i)
+    for i in range(amount_requests)
+]
+print(
+    str(amount_requests) + " requests, " + str(amount_threads) + " threads, " +
+    str(len(hosts)) + " hosts")
+
+bare_connections = run("bare requests.get",
+                       lambda url: requests.get(url, timeout=5), urls, servers)
+session_pool = SessionPool()
+pooled_connections = run("SessionPool",
+                         lambda url: session_pool.get(url, timeout=5), urls,
+                         servers)
+print("handshakes saved: " + str(bare_connections - pooled_connections))
@@ -0,0 +1,189 @@
+"""Benchmark that compares the harvest rate (relevant pages per fetched page)
+of the old set based url queue with the best-first priority frontier
+
+The crawl is simulated on a random web graph in which relevant pages mostly
+link to other relevant pages. Like the extractor, only the links of relevant
+pages and seeds are followed, and they are prioritized by the relative
+distances of the page they were found on. Run from the repository root:
+
+  python -m src.benchmark_frontier
+"""
+import random
+
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.storage import URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+################################################################################
+amount_pages = 200000
+relevant_share = 0.05
+links_per_page = 15
+# share of the links of a relevant page that point to relevant pages, from the
+# most to the least relevant page
+relevant_links_of_relevant_pages = (0.9, 0.3)
+# share of the links of a not relevant page that point to relevant pages
+relevant_links_of_other_pages = 0.03
+amount_seeds = 20
+crawl_budgets = [500, 2000, 10000]
+################################################################################
+
+
+class WebGraph:
+  """Random web graph with relevant and not relevant pages, the more relevant
+      a page is, the more of its links point to relevant pages
+
+  Attributes:
+    relative_distances: relative distance of every page, pages with a
+                          relative distance of at most 1 are relevant
+    relevant_pages: list of the ids of the relevant pages
+    other_pages: list of the ids of the other pages
+"""
+
+  def __init__(self):
+    """Inits WebGraph"""
+    random.seed(1)
+    self.relative_distances = []
+    self.relevant_pages = []
+    self.other_pages = []
+    for page in range(amount_pages):
+      if random.random() < relevant_share:
+        self.relative_distances.append(random.uniform(0.3, 1))
+        self.relevant_pages.append(page)
+      else:
+        self.relative_distances.append(random.uniform(1, 3))
+        self.other_pages.append(page)
+
+  def get_links(self, page: int) -> list[int]:
+    """Returns the links of a page, they are the same on every call
+
+    Args:
+      page: id of the page
+
+    Returns:
+      list of the ids of the linked pages
+    """
+    generator = random.Random(page)
+    if self.is_relevant(page):
+      most, least = relevant_links_of_relevant_pages
+      relevant_links = most + (least - most) * (
+          self.relative_distances[page] - 0.3) / 0.7
+    else:
+      relevant_links = relevant_links_of_other_pages
+    return [
+        generator.choice(self.relevant_pages)
+        if generator.random() < relevant_links else generator.choice(
+            self.other_pages) for _ in range(links_per_page)
+    ]
+
+  def is_relevant(self, page: int) -> bool:
+    """Checks if a page is relevant
+
+    Args:
+      page: id of the page
+
+    Returns:
+      bool that shows if the page is relevant
+    """
+    return self.relative_distances[page] <= 1
+
+
+def to_url(page: int) -> str:
+  """Returns the url of a page
+
+  Args:
+    page: id of the page
+
+  Returns:
+    the url
+  """
+  return "https://www.site" + str(page % 1000) + ".com/page" + str(page)
+
+
+def to_page(url: str) -> int:
+  """Returns the page of a url
+
+  Args:
+    url: the url
+
+  Returns:
+    id of the page
+  """
+  return int(url[url.rindex("page") + len("page"):])
+
+
+def crawl_set_queue(graph: WebGraph, seed: list[str], budget: int) -> int:
+  """Crawls in the arbitrary order of the old set based url queue
+
+  Args:
+    graph: the web graph
+    seed: the urls of the seed
+    budget: amount of pages to fetch
+
+  Returns:
+    amount of relevant pages that were fetched
+  """
+  queue = set((url, True) for url in seed)
+  crawled_urls = set()
+  relevant = 0
+  while queue and len(crawled_urls) < budget:
+    url, is_seed = queue.pop()
+    crawled_urls.add(url)
+    page = to_page(url)
+    if graph.is_relevant(page):
+      relevant += 1
+    elif not is_seed:
+      continue
+    for link in graph.get_links(page):
+      if to_url(link) not in crawled_urls:
+        queue.add((to_url(link), False))
+  return relevant
+
+
+def crawl_priority_frontier(graph: WebGraph, seed: list[str],
+                            budget: int) -> int:
+  """Crawls best first using the url queue with the priority frontier
+
+  Args:
+    graph: the web graph
+    seed: the urls of the seed
+    budget: amount of pages to fetch
+
+  Returns:
+    amount of relevant pages that were fetched
+  """
+  url_queue = URLQueue(logger, seed)
+  crawled_urls = set()
+  relevant = 0
+  while not url_queue.is_empty() and len(crawled_urls) < budget:
+    url_record, is_seed = url_queue.get_url()
+    url = url_record.url
+    depth = url_queue.pop_depth(url)
+    crawled_urls.add(url)
+    page = to_page(url)
+    if graph.is_relevant(page):
+      relevant += 1
+    elif not is_seed:
+      continue
+    for link in graph.get_links(page):
+      if to_url(link) not in crawled_urls:
+        url_queue.add_url(get_url_record(to_url(link)),
+                          {"category": graph.relative_distances[page]},
+                          depth + 1)
+  return relevant
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_frontier")
+graph = WebGraph()
+random.seed(2)
+seed = [
+    to_url(a) for a in random.sample(graph.relevant_pages, amount_seeds // 2) +
+    random.sample(graph.other_pages, amount_seeds // 2)
+]
+print("pages: " + str(amount_pages) + ", relevant: " +
+      str(len(graph.relevant_pages)) + ", seeds: " + str(len(seed)))
+for budget in crawl_budgets:
+  print("crawl budget " + str(budget))
+  for name, crawl in [("set queue", crawl_set_queue),
+                      ("priority frontier", crawl_priority_frontier)]:
+    relevant = crawl(graph, seed, budget)
+    print("  " + name + ": harvest rate " + str(round(relevant / budget, 3)))
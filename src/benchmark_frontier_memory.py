@@ -0,0 +1,71 @@
+"""Benchmark that compares the memory usage of the in-memory priority frontier
+with the SQLite frontier while millions of urls are enqueued
+
+The resident memory of the process is printed after every step, afterwards
+some urls are dequeued to show the speed of the head. The SQLite frontier
+runs first, so the memory frontier can't leave freed memory behind for it.
+Linux only, since the memory is read from /proc. Run from the repository root:
+
+  python -m src.benchmark_frontier_memory
+"""
+import os
+import random
+import timeit
+
+from src.crawler_bot.frontier import PriorityFrontier, SQLiteFrontier
+
+################################################################################
+# the memory frontier gets fewer urls, 10M of them don't fit into most machines
+amount_urls = {"SQLiteFrontier": 10000000, "PriorityFrontier": 2000000}
+step = 1000000
+amount_dequeued = 100000
+database_file = "frontier_benchmark.sqlite3"
+################################################################################
+
+
+def get_rss() -> float:
+  """Returns the resident memory of this process
+
+  Returns:
+    resident memory in MiB
+  """
+  with open("/proc/self/statm", encoding="utf-8") as f:
+    pages = int(f.read().split()[1])
+  return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def run(name: str, frontier) -> None:
+  """Enqueues the urls, dequeues some of them and prints memory and runtime
+
+  Args:
+    name: name of the frontier
+    frontier: the frontier to fill
+
+  Returns:
+    None
+  """
+  random.seed(1)
+  print(name)
+  rss_before = get_rss()
+  start = timeit.default_timer()
+  for i in range(amount_urls[name]):
+    frontier.put(
+        "https://www.site" + str(i % 100000) + ".com/path/to/page" + str(i),
+        False, random.random() * 3, 1)
+    if (i + 1) % step == 0:
+      print("  " + str((i + 1) // 1000000) + "M urls: " +
+            str(round(get_rss() - rss_before)) + " MiB, " +
+            str(round(timeit.default_timer() - start, 1)) + "s")
+  start = timeit.default_timer()
+  for _ in range(amount_dequeued):
+    frontier.get()
+  runtime = timeit.default_timer() - start
+  print("  dequeued " + str(amount_dequeued) + " urls in " +
+        str(round(runtime, 2)) + "s")
+
+
+sqlite_frontier = SQLiteFrontier(database_file)
+run("SQLiteFrontier", sqlite_frontier)
+sqlite_frontier.connection.close()
+os.remove(database_file)
+run("PriorityFrontier", PriorityFrontier())
@@ -0,0 +1,82 @@
+"""Benchmark that measures how many pages of a recorded crawl are
+near-duplicates and how much classification time reusing their
+classification saves
+
+The pages are read from the http cache of a previous crawl in the order they
+were crawled. The hit rate is reported for several thresholds, the time of a
+classification is measured on a sample of the pages and compared with the
+cost of the SimHash. Needs the classifier dependencies. Run from the
+repository root:
+
+  python -m src.benchmark_near_duplicates
+"""
+import timeit
+
+from src.crawler_bot.classification import Classifier
+from src.crawler_bot.config import GROUND_TRUTH_VECTORS_FILE, HTTP_CACHE_DIR
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.fetching import decode_html
+from src.crawler_bot.near_duplicates import NearDuplicateIndex, get_simhash
+from src.crawler_bot.storage import HTTPCache
+
+################################################################################
+http_cache_dir = HTTP_CACHE_DIR
+max_distances = [0, 3, 6, 10]
+# amount of pages that are classified to measure the time of a classification
+amount_classified_pages = 50
+################################################################################
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_near_duplicates")
+http_cache = HTTPCache(logger, http_cache_dir)
+http_cache.load()
+classifier = Classifier(0, logger)
+classifier.load_parameters_from_file(GROUND_TRUTH_VECTORS_FILE)
+
+# extract the main content once, the extraction is needed either way
+pages = []
+extraction_time = 0
+for url in list(http_cache.database):
+  body = http_cache.load_body(url)
+  if body is None:
+    continue
+  html_document = decode_html(*body)
+  start = timeit.default_timer()
+  main_content = classifier.extract_main_content(html_document)
+  extraction_time += timeit.default_timer() - start
+  if main_content is not None:
+    pages.append((url, html_document, main_content))
+print("pages with main content: " + str(len(pages)))
+if not pages:
+  raise SystemExit("the http cache in " + http_cache_dir + " has no pages")
+print("  extraction: " + str(round(extraction_time / len(pages) * 1000, 1)) +
+      "ms per page")
+
+start = timeit.default_timer()
+simhashes = [get_simhash(main_content) for _, _, main_content in pages]
+simhash_time = timeit.default_timer() - start
+print("  simhash:    " + str(round(simhash_time / len(pages) * 1000, 1)) +
+      "ms per page")
+
+start = timeit.default_timer()
+for url, html_document, main_content in pages[:amount_classified_pages]:
+  classifier.is_relevant(url, html_document, main_content)
+classification_time = (timeit.default_timer() -
+                       start) / min(len(pages), amount_classified_pages)
+print("  classification: " + str(round(classification_time * 1000)) +
+      "ms per page")
+
+for max_distance in max_distances:
+  index = NearDuplicateIndex(logger, max_distance)
+  for (url, _, _), simhash in zip(pages, simhashes):
+    if simhash is None:
+      continue
+    if index.find(simhash) is None:
+      index.add(simhash, url, {})
+  hits = index.amount_hits
+  saved_time = hits * classification_time - simhash_time
+  print("max distance " + str(max_distance))
+  print("  hit rate:   " + str(round(hits / len(pages), 3)) + " (" +
+        str(hits) + " pages)")
+  print("  CPU saved:  " + str(round(saved_time, 1)) + "s (" +
+        str(round(saved_time / (len(pages) * classification_time) * 100, 1)) +
+        "% of the classification time)")
@@ -0,0 +1,145 @@
+"""Benchmark that compares the throughput of parsing the fetched pages in the
+extractor threads with the parser processes
+
+The pages pass the unprocessed html database like in a crawl, the parser
+processes start parsing them when they are added. Parsing holds the GIL, so
+only the processes scale with the amount of cores. The pages of the http cache
+of a previous crawl are used, generated pages if it is empty. Run from the
+repository root:
+
+  python -m src.benchmark_parser_pool
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+from threading import Thread
+import timeit
+
+from src.crawler_bot import parsing
+from src.crawler_bot.config import HTTP_CACHE_DIR
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.storage import HTTPCache, UnprocessedHTMLDatabase
+
+################################################################################
+http_cache_dir = HTTP_CACHE_DIR
+# generated pages, if the http cache is empty
+amount_pages = 400
+paragraphs_per_page = 40
+links_per_page = 150
+# amount of extractor threads that take the pages
+amount_threads = 4
+amount_processes = [0, 1, 2, 4, 8]
+################################################################################
+
+WORDS = [
+    "malware", "ransomware", "exploit", "vulnerability", "patch", "threat",
+    "actor", "campaign", "phishing", "credential", "botnet", "zero-day",
+    "advisory", "attacker", "remote", "code", "execution", "the", "a", "of"
+]
+
+
+def create_page() -> bytes:
+  """Creates an article page with navigation and sidebar links
+
+  Returns:
+    the encoded html page
+  """
+  links = [
+      "<li><a href=\"/" + random.choice(WORDS) + "/" + str(i) + "\">" +
+      random.choice(WORDS) + "</a></li>" for i in range(links_per_page)
+  ]
+  paragraphs = [
+      "<p>" + " ".join(random.choices(WORDS, k=60)) + ".</p>"
+      for _ in range(paragraphs_per_page)
+  ]
+  return ("<!DOCTYPE html><html><head><title>advisory</title></head><body>" +
+          "<nav><ul>" + "".join(links[:links_per_page // 2]) +
+          "</ul></nav><article>" + "".join(paragraphs) + "</article><aside>" +
+          "<ul>" + "".join(links[links_per_page // 2:]) +
+          "</ul></aside></body></html>").encode("utf-8")
+
+
+def load_pages() -> list[tuple[bytes, str]]:
+  """Loads the pages of the http cache, generates pages if it is empty
+
+  Returns:
+    list of tuples of the raw page and its encoding
+  """
+  http_cache = HTTPCache(logger, http_cache_dir)
+  http_cache.load()
+  pages = []
+  for url in list(http_cache.database):
+    body = http_cache.load_body(url)
+    if body is not None:
+      pages.append(body)
+  if pages:
+    print(str(len(pages)) + " pages of the http cache in " + http_cache_dir)
+    return pages
+  print("http cache is empty, " + str(amount_pages) + " generated pages")
+  return [(create_page(), "utf-8") for _ in range(amount_pages)]
+
+
+def extract(unprocessed_html_database: UnprocessedHTMLDatabase) -> None:
+  """Takes pages until the database is empty and parses them like the
+      extractor
+
+  Args:
+    unprocessed_html_database: the database with the pages
+
+  Returns:
+    None
+  """
+  while True:
+    entry = unprocessed_html_database.get_entry()
+    if entry is None:
+      return
+    if entry.parsed_page is not None:
+      entry.parsed_page.result()
+    else:
+      parsing.parse_page(entry.get_html())
+    unprocessed_html_database.task_done(entry.url)
+
+
+def measure(processes: int, pages: list[tuple[bytes, str]]) -> float:
+  """Adds all pages to the database and parses them with the extractor threads
+
+  Args:
+    processes: amount of parser processes, 0 for none
+    pages: the pages
+
+  Returns:
+    the runtime in seconds
+  """
+  parser_pool = None
+  if processes > 0:
+    parser_pool = ProcessPoolExecutor(processes)
+    parser_pool.submit(int).result()
+  unprocessed_html_database = UnprocessedHTMLDatabase(logger,
+                                                      parser_pool=parser_pool)
+  start = timeit.default_timer()
+  for i, (content, encoding) in enumerate(pages):
+    unprocessed_html_database.add_entry("https://example.com/" + str(i), False,
+                                        content, encoding)
+  threads = [
+      Thread(target=extract, args=(unprocessed_html_database,))
+      for _ in range(amount_threads)
+  ]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  runtime = timeit.default_timer() - start
+  if parser_pool is not None:
+    parser_pool.shutdown()
+  return runtime
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_parser_pool")
+random.seed(0)
+pages = load_pages()
+print(str(os.cpu_count()) + " cores, " + str(amount_threads) +
+      " extractor threads")
+for processes in amount_processes:
+  runtime = measure(processes, pages)
+  print("  " + (str(processes) + " parser processes").ljust(24) +
+        str(round(len(pages) / runtime)).rjust(8) + " pages/s")
@@ -0,0 +1,241 @@
+"""Benchmark that compares retriever workers that sleep for busy domains with
+workers that get their urls from the PolitenessScheduler
+
+The seed is dominated by a few domains, requests are simulated by sleeping for
+a fixed latency. Besides the total idle time, the benchmark reports how much of
+it was spent while a url of a ready domain was waiting in the queue (idle time
+that is not needed for politeness) and when the urls of the small domains were
+done. Run from the repository root:
+
+  python -m src.benchmark_politeness_scheduler
+"""
+import random
+import threading
+import time
+import timeit
+
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.scheduling import PolitenessScheduler
+from src.crawler_bot.storage import DomainTimers, URLQueue
+from src.crawler_bot.tools import extract_main_domain_plus_tld
+
+################################################################################
+amount_workers = 2
+crawl_delay = 0.5
+request_latency = 0.02
+# (amount of domains, urls per domain), the first entry are the large domains
+seed_layout = [(3, 8), (100, 1)]
+################################################################################
+
+
+def create_seed() -> list[str]:
+  """Creates a seed that is dominated by a few domains
+
+  Returns:
+    list of urls
+  """
+  seed = []
+  domain_number = 0
+  for amount_domains, urls_per_domain in seed_layout:
+    for _ in range(amount_domains):
+      domain_number += 1
+      for page in range(urls_per_domain):
+        seed.append("https://www.domain" + str(domain_number) + ".com/page" +
+                    str(page))
+  random.shuffle(seed)
+  return seed
+
+
+def is_large_domain(domain: str) -> bool:
+  """Checks if the domain is one of the dominating domains
+
+  Args:
+    domain: the domain to check
+
+  Returns:
+    bool that shows if the domain is one of the large domains
+  """
+  return int(domain[len("domain"):-len(".com")]) <= seed_layout[0][0]
+
+
+def ready_url_waiting(urls, busy_domains: set, domain_timers: DomainTimers,
+                      current_domain: str) -> bool:
+  """Checks if a url of another domain could be requested right now
+
+  Args:
+    urls: iterable of the waiting urls
+    busy_domains: domains that are currently requested
+    domain_timers: the domain timers
+    current_domain: the domain the worker is waiting for
+
+  Returns:
+    bool that shows if a url of a ready domain is waiting
+  """
+  for url in urls:
+    domain = extract_main_domain_plus_tld(url)
+    if domain == current_domain or domain in busy_domains:
+      continue
+    if domain_timers.time_until_next_request(domain, crawl_delay) == 0:
+      return True
+  return False
+
+
+class Statistics:
+  """Collects the measurements of all workers
+
+  Attributes:
+    lock: lock for updating the statistics
+    idle_time: total time the workers slept
+    avoidable_idle_time: time the workers slept while a url of a ready domain
+                          was waiting
+    small_domains_done: timestamp when the last url of a small domain was done
+"""
+
+  def __init__(self):
+    """Inits Statistics"""
+    self.lock = threading.Lock()
+    self.idle_time = 0
+    self.avoidable_idle_time = 0
+    self.small_domains_done = 0
+
+  def add_idle_time(self, idle_time: float, avoidable: bool) -> None:
+    """Adds the idle time of a worker
+
+    Args:
+      idle_time: seconds the worker slept
+      avoidable: was a url of a ready domain waiting
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.idle_time += idle_time
+      if avoidable:
+        self.avoidable_idle_time += idle_time
+
+  def url_done(self, domain: str) -> None:
+    """Notes the timestamp of a finished url
+
+    Args:
+      domain: the domain of the finished url
+
+    Returns:
+      None
+    """
+    if not is_large_domain(domain):
+      with self.lock:
+        self.small_domains_done = timeit.default_timer()
+
+
+def sleeping_worker(url_queue: URLQueue, domain_timers: DomainTimers,
+                    lock: threading.Lock, statistics: Statistics) -> None:
+  """Worker that pops an arbitrary url and sleeps if its domain is busy
+
+  Args:
+    url_queue: the queue with all urls
+    domain_timers: the domain timers
+    lock: lock that makes waiting and setting the timer atomic
+    statistics: the statistics to update
+
+  Returns:
+    None
+  """
+  while True:
+    with lock:
+      if url_queue.is_empty():
+        break
+      url, _ = url_queue.get_url()
+      domain = url.domain
+      time_to_wait = domain_timers.time_until_next_request(domain, crawl_delay)
+      avoidable = time_to_wait > 0 and ready_url_waiting(
+          list(url_queue.queue.entries), set(), domain_timers, domain)
+      # reserve the slot so other workers queue up behind this request
+      domain_timers.set_timer(domain, time.time() + time_to_wait)
+    if time_to_wait > 0:
+      statistics.add_idle_time(time_to_wait, avoidable)
+      time.sleep(time_to_wait)
+    time.sleep(request_latency)
+    statistics.url_done(domain)
+
+
+def scheduler_worker(scheduler: PolitenessScheduler,
+                     domain_timers: DomainTimers,
+                     statistics: Statistics) -> None:
+  """Worker that only gets urls of domains that are ready
+
+  Args:
+    scheduler: the politeness scheduler
+    domain_timers: the domain timers
+    statistics: the statistics to update
+
+  Returns:
+    None
+  """
+  while not scheduler.is_empty():
+    url, _ = scheduler.get_url()
+    if url is None:
+      time_to_wait = scheduler.time_until_next_url()
+      if time_to_wait is not None:
+        time_to_wait = min(time_to_wait, 0.1)
+        with scheduler.lock:
+          urls = [
+              a[0].url for b in scheduler.domain_queues.values() for a in b
+          ]
+          avoidable = ready_url_waiting(urls, set(scheduler.in_flight),
+                                        domain_timers, None)
+        statistics.add_idle_time(time_to_wait, avoidable)
+        time.sleep(time_to_wait)
+      continue
+    domain = url.domain
+    time.sleep(request_latency)
+    domain_timers.set_timer(domain)
+    scheduler.release(url, crawl_delay)
+    statistics.url_done(domain)
+
+
+def run(name: str, target, args: tuple, amount_urls: int) -> None:
+  """Runs the workers and prints the results
+
+  Args:
+    name: name of the variant
+    target: the worker function
+    args: arguments for the worker function (without the statistics)
+    amount_urls: amount of urls in the seed
+
+  Returns:
+    None
+  """
+  statistics = Statistics()
+  threads = [
+      threading.Thread(target=target, args=args + (statistics,))
+      for _ in range(amount_workers)
+  ]
+  start = timeit.default_timer()
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  runtime = timeit.default_timer() - start
+  print(name)
+  print("  runtime:                 " + str(round(runtime, 2)) + "s")
+  print("  pages/s:                 " + str(round(amount_urls / runtime, 1)))
+  print("  small domains done:      " +
+        str(round(statistics.small_domains_done - start, 2)) + "s")
+  print("  total idle time:         " + str(round(statistics.idle_time, 2)) +
+        "s")
+  print("  idle while urls waited:  " +
+        str(round(statistics.avoidable_idle_time, 2)) + "s")
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_politeness_scheduler")
+seed = create_seed()
+print("urls: " + str(len(seed)) + ", workers: " + str(amount_workers) +
+      ", crawl delay: " + str(crawl_delay) + "s")
+
+run("sleep inside the worker", sleeping_worker,
+    (URLQueue(logger, seed), DomainTimers(logger), threading.Lock()), len(seed))
+
+domain_timers = DomainTimers(logger)
+scheduler = PolitenessScheduler(logger, URLQueue(logger, seed), domain_timers)
+run("politeness scheduler", scheduler_worker, (scheduler, domain_timers),
+    len(seed))
@@ -0,0 +1,76 @@
+"""Benchmark that compares the domain of a url taken from its last two labels,
+like the crawler did before the public suffix list, with the registrable domain
+
+Urls of sites under multi-label public suffixes like co.uk or com.br are
+generated. The last two labels put all sites of one suffix under a single
+politeness timer, so they are crawled one after another. Run from the
+repository root:
+
+  python -m src.benchmark_public_suffix
+"""
+import random
+import re
+import timeit
+from urllib.parse import urlparse
+
+from src.crawler_bot.tools import extract_main_domain_plus_tld
+
+################################################################################
+amount_sites = 2000
+urls_per_site = 20
+suffixes = ["com", "de", "co.uk", "com.br", "com.au", "co.jp", "gov.in", "org"]
+repetitions = 5
+# seconds between two requests to the same domain
+crawl_delay = 0.5
+################################################################################
+
+DOMAIN_PLUS_TLD_FORMAT = re.compile(r"[^.]+\.[^.]+$")
+
+
+def old_extract_main_domain_plus_tld(url: str) -> str:
+  """The domain of a url before the public suffix list
+
+  Args:
+    url: the url
+
+  Returns:
+    the last two labels of the host
+  """
+  x = re.search(DOMAIN_PLUS_TLD_FORMAT, urlparse(url).netloc)
+  if x is None:
+    return None
+  return x.group()
+
+
+random.seed(0)
+sites = [
+    random.choice(["www.", "blog.", ""]) + "site" + str(i) + "." +
+    random.choice(suffixes) for i in range(amount_sites)
+]
+urls = [
+    "https://" + site + "/article/" + str(i)
+    for site in sites
+    for i in range(urls_per_site)
+]
+random.shuffle(urls)
+print(
+    str(amount_sites) + " sites with " + str(urls_per_site) +
+    " urls each, best of " + str(repetitions))
+
+for name, function in [("last two labels", old_extract_main_domain_plus_tld),
+                       ("public suffix list", extract_main_domain_plus_tld)]:
+  runtime = min(
+      timeit.repeat(lambda f=function: [f(a) for a in urls],
+                    number=1,
+                    repeat=repetitions))
+  domains = {}
+  for url in urls:
+    domain = function(url)
+    domains[domain] = domains.get(domain, 0) + 1
+  print(name)
+  print("  lookup:                " +
+        str(round(runtime / len(urls) * 1000000, 2)) + "us per url")
+  print("  politeness domains:    " + str(len(domains)))
+  # the crawl can't be faster than the domain with the most urls allows
+  print("  min crawl time:        " +
+        str(round(max(domains.values()) * crawl_delay)) + "s")
@@ -0,0 +1,179 @@
+"""Benchmark that compares the parse time per page of the extraction with
+BeautifulSoup plus trafilatura, which parses every page twice, with the single
+lxml tree of the parsing module
+
+The old path parses the page with BeautifulSoup for the links and the robots
+meta tag, which it checks twice, and trafilatura parses the string again. The
+new path parses the page once and hands the tree to trafilatura after the
+links and the robots meta tag are read. Both paths have to find the same links
+and the same main content. The pages of the http cache of a previous crawl are
+used, generated pages if it is empty. Run from the repository root:
+
+  python -m src.benchmark_single_parse
+"""
+import random
+import timeit
+
+from bs4 import BeautifulSoup
+import trafilatura
+from trafilatura.settings import use_config
+from trafilatura.utils import load_html
+
+from src.crawler_bot.config import HTTP_CACHE_DIR
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.fetching import decode_html
+from src.crawler_bot.parsing import get_hrefs, get_robots_directives, parse_html
+from src.crawler_bot.storage import HTTPCache
+
+################################################################################
+http_cache_dir = HTTP_CACHE_DIR
+# generated pages, if the http cache is empty
+amount_pages = 300
+paragraphs_per_page = 40
+links_per_page = 150
+################################################################################
+
+WORDS = [
+    "malware", "ransomware", "exploit", "vulnerability", "patch", "threat",
+    "actor", "campaign", "phishing", "credential", "botnet", "zero-day",
+    "advisory", "attacker", "remote", "code", "execution", "the", "a", "of"
+]
+
+
+def create_page(page: int) -> str:
+  """Creates an article page with navigation, sidebar and footer links
+
+  Args:
+    page: id of the page
+
+  Returns:
+    the html page
+  """
+  links = [
+      "<li><a href=\"/" + random.choice(WORDS) + "/" + str(i) + "\">" +
+      random.choice(WORDS) + "</a></li>" for i in range(links_per_page)
+  ]
+  paragraphs = [
+      "<p>" + " ".join(random.choices(WORDS, k=60)) + ".</p>"
+      for _ in range(paragraphs_per_page)
+  ]
+  robots = "noindex" if page % 2 == 0 else "index,follow"
+  return ("<!DOCTYPE html><html><head><title>advisory " + str(page) +
+          "</title><meta name=\"robots\" content=\"" + robots + "\">" +
+          "<script>var tracking = 1;</script></head><body><nav><ul>" +
+          "".join(links[:links_per_page // 2]) + "</ul></nav><article><h1>" +
+          "advisory " + str(page) + "</h1>" + "".join(paragraphs) +
+          "</article><aside><ul>" + "".join(links[links_per_page // 2:]) +
+          "</ul></aside><footer>imprint</footer></body></html>")
+
+
+def load_pages() -> list[str]:
+  """Loads the pages of the http cache, generates pages if it is empty
+
+  Returns:
+    list of the decoded pages
+  """
+  http_cache = HTTPCache(logger, http_cache_dir)
+  http_cache.load()
+  pages = []
+  for url in list(http_cache.database):
+    body = http_cache.load_body(url)
+    if body is not None:
+      pages.append(decode_html(*body))
+  if pages:
+    print(str(len(pages)) + " pages of the http cache in " + http_cache_dir)
+    return pages
+  print("http cache is empty, " + str(amount_pages) + " generated pages")
+  return [create_page(i) for i in range(amount_pages)]
+
+
+def nofollow_bs4(parsed_html_document: BeautifulSoup) -> bool:
+  """The nofollow check of the extractor on the BeautifulSoup tree
+
+  Args:
+    parsed_html_document: the BeautifulSoup tree
+
+  Returns:
+    boolean indicating if the document has a nofollow robots meta tag
+  """
+  for tag in parsed_html_document.find_all("meta", attrs={"name": "robots"}):
+    for content in tag.get("content", "").split(","):
+      if content.strip() in ["nofollow", "none"]:
+        return True
+  return False
+
+
+def old_path(html_document: str) -> tuple[list[str], str]:
+  """Extracts links and main content with BeautifulSoup and trafilatura
+
+  Args:
+    html_document: the page
+
+  Returns:
+    tuple of the hrefs and the main content
+  """
+  parsed_html_document = BeautifulSoup(html_document, "lxml")
+  nofollow_bs4(parsed_html_document)
+  nofollow_bs4(parsed_html_document)
+  hrefs = [
+      item["href"].strip()
+      for item in parsed_html_document.find_all("a", href=True)
+  ]
+  return hrefs, trafilatura.extract(html_document, config=trafilatura_config)
+
+
+def new_path(html_document: str) -> tuple[list[str], str]:
+  """Extracts links and main content from a single lxml tree
+
+  Args:
+    html_document: the page
+
+  Returns:
+    tuple of the hrefs and the main content
+  """
+  parsed_html_document = parse_html(html_document)
+  get_robots_directives(parsed_html_document)
+  hrefs = get_hrefs(parsed_html_document)
+  return hrefs, trafilatura.extract(parsed_html_document,
+                                    config=trafilatura_config)
+
+
+def measure(name: str, function, pages: list[str]) -> list:
+  """Runs a function on all pages and prints the time per page
+
+  Args:
+    name: name of the variant
+    function: function that takes a page
+    pages: the pages
+
+  Returns:
+    list of the results of the function
+  """
+  start = timeit.default_timer()
+  results = [function(a) for a in pages]
+  runtime = timeit.default_timer() - start
+  print("  " + name.ljust(40) +
+        str(round(runtime / len(pages) * 1000, 2)).rjust(8) + "ms per page")
+  return results
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_single_parse")
+trafilatura_config = use_config("src/crawler_bot/custom_trafilatura_config.cfg")
+random.seed(0)
+pages = load_pages()
+print("average size " + str(round(sum(len(a) for a in pages) / len(pages))) +
+      " characters")
+
+print("parsing only")
+measure("BeautifulSoup + trafilatura load_html",
+        lambda a: (BeautifulSoup(a, "lxml"), load_html(a)), pages)
+measure("parse_html", parse_html, pages)
+
+print("parsing, links, robots meta tag and main content")
+old_results = measure("BeautifulSoup + trafilatura", old_path, pages)
+new_results = measure("single lxml tree", new_path, pages)
+
+different_links = sum(a[0] != b[0] for a, b in zip(old_results, new_results))
+different_content = sum(a[1] != b[1] for a, b in zip(old_results, new_results))
+print("pages with different links:        " + str(different_links))
+print("pages with different main content: " + str(different_content))
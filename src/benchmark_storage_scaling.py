@@ -0,0 +1,119 @@
+"""Contention stress test and scaling benchmark of the storage classes that are
+shared by the retrievers and extractors
+
+Every worker thread simulates crawling pages: it marks a url as crawled, sets
+the timer of its domain, stores the page and its links and checks if the links
+were crawled. Afterwards the contents of the storage classes are checked, so
+lost updates or exceptions caused by missing locks show up. The same workload
+also runs with one global lock around every call for comparison. Run from the
+repository root:
+
+  python -m src.benchmark_storage_scaling
+"""
+import contextlib
+import io
+import threading
+import timeit
+
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.storage import CrawledURLs, DomainTimers, HTMLDatabase, URLMap
+from src.crawler_bot.url_record import get_url_record
+
+################################################################################
+amount_workers = [1, 2, 4, 8, 16, 32, 64]
+pages_per_run = 64000
+links_per_page = 10
+amount_domains = 1000
+################################################################################
+
+
+def to_url(page: int) -> str:
+  """Returns the url of a page
+
+  Args:
+    page: id of the page
+
+  Returns:
+    the url
+  """
+  return "https://www.site" + str(page % amount_domains) + ".com/page" + str(
+      page)
+
+
+def run(workers: int, global_lock: threading.Lock = None) -> float:
+  """Lets the workers crawl pages_per_run pages and checks the storage
+      afterwards
+
+  Args:
+    workers: amount of worker threads
+    global_lock: lock that is taken around every call, None to rely on the
+                  locks of the storage classes
+
+  Returns:
+    pages per second
+  """
+  crawled_urls = CrawledURLs(logger)
+  domain_timers = DomainTimers(logger)
+  html_database = HTMLDatabase(logger)
+  url_map = URLMap(logger)
+  lock = global_lock or contextlib.nullcontext()
+  errors = []
+
+  def worker(worker_id: int) -> None:
+    try:
+      for page in range(worker_id, pages_per_run, workers):
+        url = to_url(page)
+        links = [
+            get_url_record(to_url(page * links_per_page + i))
+            for i in range(links_per_page)
+        ]
+        with lock:
+          crawled_urls.add_crawled_url(get_url_record(url))
+        with lock:
+          domain_timers.time_until_next_request(url.split("/")[2], 1)
+        with lock:
+          domain_timers.set_timer(url.split("/")[2])
+        with lock:
+          html_database.add_html_document(url, "", True,
+                                          [a.url for a in links], {}, {}, "")
+        with lock:
+          url_map.add_url_paths(url, links)
+        for link in links:
+          with lock:
+            crawled_urls.is_crawled(link)
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+
+  threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+  # add_crawled_url prints the progress of every url
+  with contextlib.redirect_stdout(io.StringIO()):
+    start = timeit.default_timer()
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    runtime = timeit.default_timer() - start
+
+  # check that no update got lost
+  assert not errors, errors
+  assert len(crawled_urls.crawled_urls) == pages_per_run
+  assert len(crawled_urls.seen_index) == pages_per_run
+  assert all(
+      crawled_urls.is_crawled(get_url_record(to_url(a)))
+      for a in range(pages_per_run))
+  assert len(domain_timers.domain_timers) == min(amount_domains, pages_per_run)
+  assert len(html_database.database) == pages_per_run
+  assert len(url_map.url_map) == pages_per_run * links_per_page
+  return pages_per_run / runtime
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_storage_scaling")
+print("pages per run: " + str(pages_per_run) + ", links per page: " +
+      str(links_per_page))
+print("workers  striped locks  global lock  (pages/s)")
+for workers in amount_workers:
+  striped = run(workers)
+  serialised = run(workers, threading.Lock())
+  print(
+      str(workers).rjust(7) + str(round(striped)).rjust(15) +
+      str(round(serialised)).rjust(13))
@@ -0,0 +1,209 @@
+"""Benchmark that compares the link filtering of the extractor before the url
+filter, which parses every link up to twelve times, with the url filter
+
+Link-dense pages are generated with absolute, relative and duplicate links,
+anchors, other protocols, malformed hosts and blacklisted domains and
+extensions. Both variants have to keep the same urls. Run from the repository
+root:
+
+  python -m src.benchmark_url_filter
+"""
+import json
+import random
+import re
+import timeit
+from urllib.parse import urlparse
+
+from src.crawler_bot.canonicalization import canonicalize_url
+from src.crawler_bot.custom_logging import Logger, LogLevel
+from src.crawler_bot.tools import extract_main_domain, extract_main_domain_plus_tld
+from src.crawler_bot.url_filter import DOMAIN_FORMAT, SCHEME_FORMAT, URLFilter
+
+################################################################################
+amount_pages = 50
+links_per_page = 3000
+amount_hosts = 200
+repetitions = 3
+################################################################################
+
+WORDS = [
+    "malware", "ransomware", "exploit", "vulnerability", "patch", "threat",
+    "advisory", "news", "blog", "category", "tag", "page", "archive"
+]
+
+
+def create_hrefs(hosts: list[str], blacklist: dict) -> list[str]:
+  """Creates the hrefs of a link-dense page
+
+  Args:
+    hosts: list of the hosts of the absolute links
+    blacklist: the blacklist
+
+  Returns:
+    list of the hrefs
+  """
+  hrefs = []
+  for _ in range(links_per_page):
+    path = "/".join(random.choices(WORDS, k=random.randint(1, 4)))
+    kind = random.random()
+    if kind < 0.35:
+      hrefs.append("https://" + random.choice(hosts) + "/" + path)
+    elif kind < 0.6:
+      hrefs.append("/" + path + "?page=" + str(random.randint(1, 9)))
+    elif kind < 0.7:
+      hrefs.append(path + ".html")
+    elif kind < 0.75:
+      hrefs.append("#" + random.choice(WORDS))
+    elif kind < 0.8:
+      hrefs.append(
+          random.choice(["mailto:info@example.com", "javascript:void(0)"]))
+    elif kind < 0.85:
+      hrefs.append("https://www." + random.choice(blacklist["main_domains"]) +
+                   ".com/" + path)
+    elif kind < 0.9:
+      hrefs.append("/static/" + path + "." +
+                   random.choice(blacklist["extensions"]))
+    elif kind < 0.93:
+      hrefs.append("https://bad_host!/" + path)
+    else:
+      hrefs.append(random.choice(hrefs) if hrefs else "")
+  return hrefs
+
+
+def is_valid(url: str) -> bool:
+  """The url check of the extractor before the url filter
+
+  Args:
+    url: the url
+
+  Returns:
+    bool that shows if the url is valid
+  """
+  if url is None or url == "":
+    return False
+  url = url.strip()
+  if not url or len(url) > 2048:
+    return False
+  result = urlparse(url)
+  if not result.scheme or not re.fullmatch(SCHEME_FORMAT, result.scheme):
+    return False
+  if not result.netloc or not re.fullmatch(DOMAIN_FORMAT, result.netloc):
+    return False
+  return True
+
+
+def is_on_blacklist(url: str, blacklist: dict) -> bool:
+  """The blacklist check of the extractor before the url filter
+
+  Args:
+    url: the url
+    blacklist: the blacklist
+
+  Returns:
+    bool that shows if the url is on the blacklist
+  """
+  if extract_main_domain(url) in blacklist["main_domains"]:
+    return True
+  if extract_main_domain_plus_tld(url) in blacklist["main_domains+tlds"]:
+    return True
+  for extension in blacklist["extensions"]:
+    if urlparse(url).path[-(len(extension)):] == extension:
+      return True
+  return False
+
+
+def relative_to_absolute_url(relative_url: str, parent_url: str) -> str:
+  """The resolution of relative links of the extractor before the url filter
+
+  Args:
+    relative_url: the relative link
+    parent_url: the url of the page
+
+  Returns:
+    an attempt of an absolute url
+  """
+  parsed_parent = urlparse(parent_url)
+  scheme_and_domain = parsed_parent.scheme + "://" + parsed_parent.netloc
+  if relative_url[0] == "/":
+    return scheme_and_domain + relative_url
+  if parsed_parent.path == "":
+    return scheme_and_domain + "/" + relative_url
+  return (scheme_and_domain +
+          parsed_parent.path[:parsed_parent.path.rindex("/") + 1] +
+          relative_url)
+
+
+def old_extract_urls(hrefs: list[str], crawled_url: str,
+                     blacklist: dict) -> list[str]:
+  """The link filtering of the extractor before the url filter
+
+  Args:
+    hrefs: the hrefs of the page
+    crawled_url: the url of the page
+    blacklist: the blacklist
+
+  Returns:
+    list of the canonical forms of the kept urls
+  """
+  urls = []
+  for href in hrefs:
+    if len(href) <= 0 or href[0] == "#":
+      continue
+    if re.search("^[a-zA-Z]+:", href) is not None:
+      if len(href) >= 5 and href[:4] != "http" and href[:5] != "https":
+        continue
+    urls.append(href)
+  valid_urls = []
+  for url in urls:
+    if not is_valid(url):
+      url = relative_to_absolute_url(url, crawled_url)
+      if not is_valid(url):
+        continue
+    if is_on_blacklist(url, blacklist):
+      continue
+    valid_urls.append(canonicalize_url(url))
+  return list(dict.fromkeys(valid_urls))
+
+
+logger = Logger(LogLevel.CRITICAL, "benchmark_url_filter")
+random.seed(0)
+with open("assets/blacklist.json", encoding="utf-8") as f:
+  blacklist = json.load(f)
+url_filter = URLFilter(logger, blacklist)
+hosts = [
+    random.choice(["www.", "blog.", "", "news."]) + random.choice(WORDS) +
+    str(i) + random.choice([".com", ".de", ".co.uk", ".org"])
+    for i in range(amount_hosts)
+]
+pages = [("https://" + random.choice(hosts) + "/" +
+          random.choice(["", "news/", "blog/2023/"]) + "article.html",
+          create_hrefs(hosts, blacklist)) for _ in range(amount_pages)]
+print(
+    str(amount_pages) + " pages with " + str(links_per_page) +
+    " links each, best of " + str(repetitions))
+
+runtimes = {}
+results = {}
+for name, function in [
+    ("extractor before the url filter",
+     lambda url, hrefs: old_extract_urls(hrefs, url, blacklist)),
+    ("url filter", lambda url, hrefs:
+     [a.url for a in url_filter.filter_urls(hrefs, url)])
+]:
+  results[name] = [function(*a) for a in pages]
+  runtimes[name] = min(
+      timeit.repeat(lambda f=function: [f(*a) for a in pages],
+                    number=1,
+                    repeat=repetitions))
+  print("  " + name.ljust(36) +
+        str(round(runtimes[name] / amount_pages * 1000, 2)).rjust(8) +
+        "ms per page")
+
+old_results, new_results = results.values()
+print("speed-up: " + str(round(
+    runtimes["extractor before the url filter"] / runtimes["url filter"], 1)) +
+      "x")
+print("pages with different urls: " +
+      str(sum(a != b for a, b in zip(old_results, new_results))))
+print("kept urls per page: " +
+      str(round(sum(len(a) for a in new_results) / len(new_results))))
@@ -0,0 +1,158 @@
+"""Module that turns URLs into a canonical form, so variants of the same URL are
+queued, crawled and stored only once
+"""
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+# query parameters that only track where a visitor came from
+TRACKING_PARAMETERS = [
+    "_ga", "_hsenc", "_hsmi", "dclid", "fbclid", "gclid", "igshid", "mc_cid",
+    "mc_eid", "msclkid", "yclid"
+]
+TRACKING_PARAMETER_PREFIXES = ("utm_",)
+# documents servers return when a directory is requested
+DIRECTORY_INDEXES = [
+    "default.asp", "default.aspx", "default.htm", "default.html", "index.asp",
+    "index.aspx", "index.htm", "index.html", "index.php", "index.shtml"
+]
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# characters that never need to be percent-encoded (RFC 3986)
+UNRESERVED_CHARACTERS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+PERCENT_ENCODING_FORMAT = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _normalize_percent_encoding(part: str) -> str:
+  """Decodes percent-encoded unreserved characters and uppercases all other
+      percent-encodings
+
+  Args:
+    part: path or query of a url
+
+  Returns:
+    the part with normalized percent-encodings
+  """
+
+  def replace(match: re.Match) -> str:
+    character = chr(int(match.group(1), 16))
+    if character in UNRESERVED_CHARACTERS:
+      return character
+    return "%" + match.group(1).upper()
+
+  return PERCENT_ENCODING_FORMAT.sub(replace, part)
+
+
+def _normalize_netloc(scheme: str, netloc: str) -> str:
+  """Lowercases the host and removes the default port of the scheme
+
+  Args:
+    scheme: the lowercased scheme of the url
+    netloc: the network location of the url
+
+  Returns:
+    the normalized network location
+  """
+  userinfo, _, hostport = netloc.rpartition("@")
+  host, _, port = hostport.lower().rpartition(":")
+  # no port given, or the colon belongs to an IPv6 address
+  if not host or "]" in port:
+    host, port = hostport.lower(), ""
+  host = host.rstrip(".")
+  if port == "" or (port.isdigit() and int(port) == DEFAULT_PORTS.get(scheme)):
+    hostport = host
+  else:
+    hostport = host + ":" + port
+  if userinfo:
+    return userinfo + "@" + hostport
+  return hostport
+
+
+def _normalize_path(path: str) -> str:
+  """Removes dot segments, directory index documents and trailing slashes
+
+  Args:
+    path: the path of the url
+
+  Returns:
+    the normalized path, at least "/"
+  """
+  segments = []
+  for segment in path.split("/")[1:]:
+    if segment == ".":
+      continue
+    if segment == "..":
+      if segments:
+        segments.pop()
+      continue
+    segments.append(segment)
+  if segments and segments[-1].lower() in DIRECTORY_INDEXES:
+    segments.pop()
+  while segments and segments[-1] == "":
+    segments.pop()
+  return "/" + "/".join(segments)
+
+
+def _normalize_query(query: str) -> str:
+  """Removes tracking parameters and sorts the remaining parameters by name,
+      parameters with the same name keep their order
+
+  Args:
+    query: the query of the url
+
+  Returns:
+    the normalized query
+  """
+  parameters = []
+  for parameter in query.split("&"):
+    if not parameter:
+      continue
+    name = parameter.split("=", 1)[0].lower()
+    if name in TRACKING_PARAMETERS or name.startswith(
+        TRACKING_PARAMETER_PREFIXES):
+      continue
+    parameters.append(parameter)
+  parameters.sort(key=lambda a: a.split("=", 1)[0])
+  return "&".join(parameters)
+
+
+def canonicalize_url(url: str) -> str:
+  """Returns the canonical form of a url
+
+  Scheme and host are lowercased, default ports, fragments, tracking parameters,
+  directory index documents (index.html, ...) and trailing slashes are removed,
+  dot segments are resolved, query parameters are sorted and percent-encodings
+  normalized.
+
+  Example:
+    HTTPS://www.Example.com:443/a/./b/index.html?utm_source=x&b=2&a=1#top
+    => https://www.example.com/a/b?a=1&b=2
+
+  Args:
+    url: the url to canonicalize
+
+  Returns:
+    the canonical url
+  """
+  parsed_url = urlsplit(url.strip())
+  scheme = parsed_url.scheme.lower()
+  return urlunsplit(
+      (scheme, _normalize_netloc(scheme, parsed_url.netloc),
+       _normalize_path(_normalize_percent_encoding(parsed_url.path)),
+       _normalize_query(_normalize_percent_encoding(parsed_url.query)), ""))
+
+
+def get_url_fingerprint(url: str, is_canonical: bool = False) -> int:
+  """Calculates the stable 64 bit fingerprint of the canonical form of a url
+
+  Args:
+    url: the url
+    is_canonical: True if the url is in its canonical form already
+
+  Returns:
+    the fingerprint as integer
+  """
+  if not is_canonical:
+    url = canonicalize_url(url)
+  return int.from_bytes(
+      hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
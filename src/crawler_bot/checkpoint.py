@@ -0,0 +1,373 @@
+"""Module that periodically writes the state of a crawl to disk, so a crawl that
+crashed can be continued with `python main.py --resume`
+"""
+from collections import deque
+import json
+import os
+import threading
+
+from src.crawler_bot.canonicalization import canonicalize_url
+from src.crawler_bot.config import CHECKPOINT_INTERVAL, ROBOTS_TXT_CACHE_FILE
+from src.crawler_bot.custom_logging import Logger
+from src.crawler_bot.near_duplicates import NearDuplicateIndex
+from src.crawler_bot.scheduling import PolitenessScheduler
+from src.crawler_bot.storage import CrawledURLs, HTMLDatabase, HTTPCache, RobotsTXTDatabase, UnprocessedHTMLDatabase, URLMap, URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+# databases that only grow, they are appended to one JSON lines file each
+DATABASES = ["crawled_urls", "html_database", "url_map", "near_duplicates"]
+STATE_FILE = "state.json"
+
+
+class Checkpointer:
+  """Writes incremental checkpoints of a crawl and restores them
+
+  Each checkpoint appends the crawled urls, classified pages, url paths and
+  entries of the near-duplicate index that were added since the last one. The
+  frontier is not written, it consists of the seeds and the links of the
+  classified pages that were not crawled yet, so it is rebuilt from them. The
+  state file is replaced last, it holds the valid length of every file, the
+  urls that were crawled but not stored yet and the state of the scheduler:
+  the handed out urls, health and circuit breakers of the domains and the
+  given up domains. The pending urls are crawled again after a resume, all
+  other pages are neither fetched nor classified again. The yield of the
+  domains is counted again from the restored pages.
+
+  The databases are read in the order a url passes them: crawled urls, the
+  pending urls of scheduler and extractors, classified pages. A url enters the
+  next stage before it leaves the previous one, so a url that moves on while
+  the checkpoint is written shows up twice but is never lost.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    directory: directory of the checkpoint files
+    crawled_urls: the list of crawled urls
+    html_database: the database of the classified pages
+    url_map: the url map
+    unprocessed_html_database: the database of the fetched pages
+    robots_txt_database: the robots.txt database, saved with every checkpoint
+    http_cache: the http cache, saved with every checkpoint, None if not used
+    robots_txt_cache_file: file the robots.txt database is saved to
+    near_duplicate_index: the index of the classified pages to find
+                            near-duplicates, None if not used
+    scheduler: the scheduler of the running crawl, None before start
+    scheduler_state: the state of the scheduler of the restored checkpoint,
+                      None if there is none
+    amounts_written: dictionary of the databases to the amount of their
+                      entries that are written
+    offsets: dictionary of the databases to the valid size of their files
+    frontier_links: list of tuples of url, relative distances and depth of
+                      the links that are queued again after a resume
+    lock: lock that serialises the checkpoints
+    stop_event: event that stops the periodic checkpoints
+    thread: thread that writes the periodic checkpoints
+"""
+
+  def __init__(self,
+               logger: Logger,
+               directory: str,
+               crawled_urls: CrawledURLs,
+               html_database: HTMLDatabase,
+               url_map: URLMap,
+               unprocessed_html_database: UnprocessedHTMLDatabase,
+               robots_txt_database: RobotsTXTDatabase,
+               http_cache: HTTPCache = None,
+               robots_txt_cache_file: str = ROBOTS_TXT_CACHE_FILE,
+               near_duplicate_index: NearDuplicateIndex = None):
+    """Inits Checkpointer
+
+    Args:
+      logger: the custom logging module
+      directory: directory of the checkpoint files
+      crawled_urls: the list of crawled urls
+      html_database: the database of the classified pages
+      url_map: the url map
+      unprocessed_html_database: the database of the fetched pages
+      robots_txt_database: the robots.txt database
+      http_cache: the http cache, None if not used
+      robots_txt_cache_file: file the robots.txt database is saved to
+      near_duplicate_index: the index of the classified pages to find
+                              near-duplicates, None if not used
+    """
+    self.name = "Checkpointer"
+    self.logger = logger
+    self.directory = directory
+    self.crawled_urls = crawled_urls
+    self.html_database = html_database
+    self.url_map = url_map
+    self.unprocessed_html_database = unprocessed_html_database
+    self.robots_txt_database = robots_txt_database
+    self.http_cache = http_cache
+    self.robots_txt_cache_file = robots_txt_cache_file
+    self.near_duplicate_index = near_duplicate_index
+    self.scheduler = None
+    self.scheduler_state = None
+    self.amounts_written = {database: 0 for database in DATABASES}
+    self.offsets = {database: 0 for database in DATABASES}
+    self.frontier_links = []
+    self.lock = threading.Lock()
+    self.stop_event = threading.Event()
+    self.thread = None
+
+    os.makedirs(self.directory, exist_ok=True)
+    self.logger.log_info(self.name, "initialized")
+
+  def _filename(self, database: str) -> str:
+    """Returns the name of the file of a database
+
+    Args:
+      database: name of the database
+
+    Returns:
+      the filename
+    """
+    return os.path.join(self.directory, database + ".jsonl")
+
+  def reset(self) -> None:
+    """Removes the checkpoint of a previous crawl
+
+    Returns:
+      None
+    """
+    for filename in [self._filename(a) for a in DATABASES] + [
+        os.path.join(self.directory, STATE_FILE)
+    ]:
+      if os.path.isfile(filename):
+        os.remove(filename)
+
+  def _read(self, database: str) -> list:
+    """Reads the valid part of the file of a database, anything that was
+        appended after the last complete checkpoint is cut off
+
+    Args:
+      database: name of the database
+
+    Returns:
+      list of the records
+    """
+    filename = self._filename(database)
+    if not os.path.isfile(filename):
+      return []
+    with open(filename, "r+", encoding="utf-8") as f:
+      f.truncate(self.offsets[database])
+      f.seek(0)
+      return [json.loads(line) for line in f]
+
+  def resume(self, seed: list[str]) -> list[str]:
+    """Restores the crawled urls, classified pages, url paths and the
+        near-duplicate index of the last checkpoint and collects the links
+        that need to be queued again
+
+    Args:
+      seed: list of urls that define the seed
+
+    Returns:
+      list of the seed urls that were not crawled yet
+    """
+    state_filename = os.path.join(self.directory, STATE_FILE)
+    if not os.path.isfile(state_filename):
+      self.logger.log_warning(self.name,
+                              "no checkpoint found, starting a new crawl")
+      self.reset()
+      return seed
+    with open(state_filename, encoding="utf-8") as f:
+      state = json.load(f)
+    # checkpoints of older versions lack the files that were added later
+    self.offsets = {**self.offsets, **state["offsets"]}
+    records = {database: self._read(database) for database in DATABASES}
+
+    # pending urls are crawled again unless their page was stored meanwhile
+    stored_urls = set(a["url"] for a in records["html_database"])
+    pending_urls = set(state["pending"]) - stored_urls
+    crawled_urls = list(
+        dict.fromkeys(url for url in records["crawled_urls"]
+                      if url not in pending_urls))
+    self.crawled_urls.restore(crawled_urls)
+    for a in records["html_database"]:
+      self.html_database.add_html_document(a["url"], "", a["relevant"],
+                                           a["extracted urls"], a["distances"],
+                                           a["relative distances"],
+                                           a["guessed category"],
+                                           a["duplicate of"])
+    for a in records["url_map"]:
+      self.url_map.add_url_path(a["url from"], a["url to"])
+    near_duplicates = []
+    if self.near_duplicate_index is not None:
+      near_duplicates = records["near_duplicates"]
+      for a in near_duplicates:
+        self.near_duplicate_index.add(a["simhash"], a["url"],
+                                      a["classification"])
+    self.amounts_written = {
+        "crawled_urls": len(crawled_urls),
+        "html_database": len(records["html_database"]),
+        "url_map": len(records["url_map"]),
+        "near_duplicates": len(near_duplicates)
+    }
+    self.scheduler_state = state.get("scheduler")
+
+    # the depth of a page is the shortest path from the seed in the url map
+    seed = [canonicalize_url(url) for url in seed]
+    links = {}
+    for a in records["url_map"]:
+      links.setdefault(a["url from"], []).append(a["url to"])
+    depths = dict.fromkeys(seed, 0)
+    waiting = deque(seed)
+    while waiting:
+      url = waiting.popleft()
+      for link in links.get(url, []):
+        if link not in depths:
+          depths[link] = depths[url] + 1
+          waiting.append(link)
+
+    crawled = set(crawled_urls)
+    self.frontier_links = [
+        (link, a["relative distances"], depths.get(a["url"], 0) + 1)
+        for a in records["html_database"]
+        for link in a["extracted urls"]
+        if link not in crawled
+    ]
+    self.logger.log_info(
+        self.name, "resuming with " + str(len(crawled_urls)) +
+        " crawled urls and " + str(len(records["html_database"])) +
+        " pages, " + str(len(pending_urls)) + " pending urls are crawled again")
+    return [url for url in seed if url not in crawled]
+
+  def restore_frontier(self, url_queue: URLQueue) -> None:
+    """Queues the links of the restored pages that were not crawled yet
+
+    Args:
+      url_queue: the url queue of the resumed crawl
+
+    Returns:
+      None
+    """
+    if not self.crawled_urls.crawl_limit_reached():
+      for url, relative_distances, depth in self.frontier_links:
+        url_queue.add_url(get_url_record(url, True), relative_distances,
+                          depth)
+    self.frontier_links = []
+
+  def restore_scheduler(self, scheduler: PolitenessScheduler) -> None:
+    """Restores the state of the scheduler of the last checkpoint
+
+    Args:
+      scheduler: the scheduler of the resumed crawl
+
+    Returns:
+      None
+    """
+    if self.scheduler_state is not None:
+      scheduler.restore_state(self.scheduler_state)
+    self.scheduler_state = None
+
+  def _append(self, database: str, records: list) -> None:
+    """Appends records to the file of a database
+
+    Args:
+      database: name of the database
+      records: list of JSON serialisable records
+
+    Returns:
+      None
+    """
+    if not records:
+      return
+    with open(self._filename(database), "a", encoding="utf-8") as f:
+      f.seek(self.offsets[database])
+      f.truncate()
+      for record in records:
+        f.write(json.dumps(record) + "\n")
+      self.offsets[database] = f.tell()
+    self.amounts_written[database] += len(records)
+
+  def save(self) -> None:
+    """Writes a checkpoint
+
+    Returns:
+      None
+    """
+    with self.lock:
+      crawled_urls = self.crawled_urls.get_urls(
+          self.amounts_written["crawled_urls"])
+      pending = []
+      scheduler_state = None
+      if self.scheduler is not None:
+        pending = self.scheduler.get_pending_urls()
+        scheduler_state = self.scheduler.get_state()
+      pending += self.unprocessed_html_database.get_urls()
+      entries = self.html_database.get_entries(
+          self.amounts_written["html_database"])
+      paths = self.url_map.get_paths(self.amounts_written["url_map"])
+      near_duplicates = []
+      if self.near_duplicate_index is not None:
+        near_duplicates = self.near_duplicate_index.get_entries(
+            self.amounts_written["near_duplicates"])
+
+      self._append("crawled_urls", crawled_urls)
+      self._append("html_database", [{
+          "url": a.url,
+          "relevant": a.relevant,
+          "distances": a.distances,
+          "relative distances": a.relative_distances,
+          "extracted urls": a.extracted_urls,
+          "guessed category": a.guessed_category,
+          "duplicate of": a.duplicate_of
+      } for a in entries])
+      self._append("url_map", paths)
+      self._append("near_duplicates", [{
+          "simhash": simhash,
+          "url": url,
+          "classification": classification
+      } for simhash, url, classification in near_duplicates])
+
+      # the new state becomes valid at once, a crash before leaves the old one
+      state_filename = os.path.join(self.directory, STATE_FILE)
+      with open(state_filename + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "offsets": self.offsets,
+                "pending": pending,
+                "scheduler": scheduler_state
+            }, f)
+      os.replace(state_filename + ".tmp", state_filename)
+
+      self.robots_txt_database.save(self.robots_txt_cache_file)
+      if self.http_cache is not None:
+        self.http_cache.save()
+    self.logger.log_info(
+        self.name, "checkpoint written, " + str(len(crawled_urls)) +
+        " new crawled urls, " + str(len(entries)) + " new pages")
+
+  def _run(self) -> None:
+    """Writes a checkpoint every CHECKPOINT_INTERVAL seconds until stopped
+
+    Returns:
+      None
+    """
+    while not self.stop_event.wait(CHECKPOINT_INTERVAL):
+      self.save()
+
+  def start(self, scheduler: PolitenessScheduler) -> None:
+    """Starts the periodic checkpoints
+
+    Args:
+      scheduler: the scheduler of the crawl
+
+    Returns:
+      None
+    """
+    self.scheduler = scheduler
+    if CHECKPOINT_INTERVAL > 0:
+      self.thread = threading.Thread(target=self._run, daemon=True)
+      self.thread.start()
+
+  def stop(self) -> None:
+    """Stops the periodic checkpoints
+
+    Returns:
+      None
+    """
+    self.stop_event.set()
+    if self.thread is not None:
+      self.thread.join()
@@ -4,12 +4,11 @@
 from transformers import BertTokenizer, BertModel, AutoTokenizer, AutoModel
 from sentence_transformers import SentenceTransformer
 import torch
-import trafilatura
-from trafilatura.settings import use_config
 from re import split
 import json
 from math import ceil
 
+from src.crawler_bot.parsing import extract_main_content
 from src.crawler_bot.tools import unit_vector, angle_between, print_progress_bar
 from src.crawler_bot.custom_logging import Logger
 
@@ -25,7 +24,6 @@ class Classifier:
     logger: instance of the logging module
     model: the used model for classifying
     tokenizer: the used tokenizer
-    myconfig: specific config for trafilatura
     ground_truth_vectors: the used ground_truth_vectors to compare against
     max_amount_of_sentences: max amount of used sentences of each document
 """
@@ -52,7 +50,6 @@ class Classifier:
     elif ML_MODEL == "all-mpnet-base-v2":
       self.model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
 
-    self.myconfig = use_config("src/crawler_bot/custom_trafilatura_config.cfg")
     self.logger.log_debug(self.name, "initialized")
 
   def pre_process_sentence(self, sentence) -> tuple[torch.tensor, torch.tensor]:
@@ -138,11 +135,24 @@ class Classifier:
 
     return sentence_vector
 
+  def extract_main_content(self, html) -> str:
+    """Extracts the main content of a document with trafilatura
+
+    Args:
+      html: the document as string or as lxml tree, trafilatura cleans the
+              tree while extracting
+
+    Returns:
+      the main content as text, None if it can't be extracted
+    """
+    return extract_main_content(html)
+
   def get_text_vector(self,
                       html: str,
                       max_sentences: int = 0,
                       generate_sentence_gradients: bool = False,
-                      get_most_important_sentence: bool = False) -> dict:
+                      get_most_important_sentence: bool = False,
+                      main_content: str = None) -> dict:
     """Creates an embedding vector for a whole document
 
     Args:
@@ -152,14 +162,17 @@ class Classifier:
         after every sentence is calculated and returned
       get_most_important_sentence: returns the most informative sentence
         (sentence with least difference to overall embedding)
+      main_content: the already extracted main content of html, None to
+        extract it here, empty if it can't be extracted
 
     Returns:
       a dict with text_vector and the sentence_gradients list if requested
     """
     # use trafilatura to extract main content
-    main_content = trafilatura.extract(html, config=self.myconfig)
-
     if main_content is None:
+      main_content = self.extract_main_content(html)
+
+    if not main_content:
       self.logger.log_warning(
           self.name, "Trafilatura was not able to extract the main content")
       return None
@@ -273,13 +286,18 @@ class Classifier:
     self.ground_truth_vectors = ground_truth_vectors
     self.max_amount_of_sentences = max_amount_of_sentences
 
-  def is_relevant(self, url: str, html_document: str) -> dict:
+  def is_relevant(self,
+                  url: str,
+                  html_document: str,
+                  main_content: str = None) -> dict:
     """Calculates the differences of the input document and decides if it is
         relevant or not
 
     Args:
       url: url of the html document
       html_document: the html document to be classified
+      main_content: the already extracted main content of the document, None
+        to extract it here, empty if it can't be extracted
 
     Returns:
       a dict containing "relevant" (bool), distances (to each category vector),
@@ -307,7 +325,7 @@ class Classifier:
     # get embedding
     embedding_result = self.get_text_vector(html_document,
                                             self.max_amount_of_sentences, False,
-                                            False)
+                                            False, main_content)
 
     if embedding_result is None:
       self.logger.log_error(self.name, "cant get embedding for " + url)
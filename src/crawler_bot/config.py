@@ -5,12 +5,150 @@
 DEFAULT_CRAWL_DELAY = 0.5
 # number of retriever threads
 NUM_RETRIEVER_THREADS = 1
+# retriever implementation, "threaded" starts NUM_RETRIEVER_THREADS blocking
+# retrievers, "async" starts a single retriever running an asyncio event loop
+RETRIEVER_MODE = "threaded"
+# max number of requests the async retriever keeps in flight at the same time
+ASYNC_MAX_CONCURRENT_REQUESTS = 200
+# threads of the async retriever that run its blocking calls, like the frontier,
+# the list of crawled urls, the http cache and robots.txt requests
+ASYNC_EXECUTOR_WORKERS = 32
+# priority penalty for every link between the seed and a url, higher values
+# make the crawl broader
+FRONTIER_DEPTH_PENALTY = 0.1
+# index of the crawled urls, "exact" keeps a set of 64 bit fingerprints,
+# "bloom" uses a fixed size bloom filter that might skip some uncrawled urls
+SEEN_INDEX_MODE = "exact"
+# amount of urls the bloom filter is sized for
+SEEN_INDEX_CAPACITY = 10000000
+# rate of uncrawled urls the bloom filter falsely reports as crawled
+SEEN_INDEX_ERROR_RATE = 0.001
+# frontier implementation, "memory" keeps all waiting urls in memory, "sqlite"
+# keeps them in a database on disk and only the best ones in memory
+FRONTIER_BACKEND = "memory"
+# database file of the sqlite frontier, it is emptied at the start of a crawl
+FRONTIER_DB_FILE = "assets/frontier.sqlite3"
+# amount of the best urls the sqlite frontier keeps in memory
+FRONTIER_HEAD_SIZE = 1000
+# amount of changes the sqlite frontier collects before writing them to disk
+FRONTIER_BATCH_SIZE = 10000
+# max amount of urls the scheduler takes from the frontier ahead of time,
+# smaller values follow the priorities more strictly, larger values keep more
+# domains ready
+SCHEDULER_BUFFER_SIZE = 100
+# hard limit of urls the scheduler takes ahead of time while no domain is
+# ready, keeps a frontier that holds only urls of busy domains in the frontier
+SCHEDULER_MAX_BUFFER_SIZE = 10 * SCHEDULER_BUFFER_SIZE
+# max amount of urls the scheduler queues for a single domain, the frontier
+# isn't emptied into the queue of a domain that waits for its crawl delay
+SCHEDULER_MAX_DOMAIN_QUEUE = 5 * SCHEDULER_BUFFER_SIZE
+# max amount of domains the scheduler keeps urls of at the same time, should be
+# a few times the amount of parallel requests
+MAX_ACTIVE_HOSTS = 100
+# max requests in flight per domain, the limit adapts between 1 and this value
+# depending on how the domain responds
+DOMAIN_MAX_CONCURRENCY = 1
+# seconds after which a response counts as sign of an overloaded domain
+DOMAIN_SLOW_RESPONSE = 2
+# max factor the crawl delay of an overloaded or failing domain is stretched by
+DOMAIN_MAX_DELAY_FACTOR = 32
+# consecutive failures (connection errors, 429, 5xx) that open the circuit
+# breaker of a domain and park its urls
+CIRCUIT_BREAKER_THRESHOLD = 5
+# seconds the urls of a domain are parked when its circuit breaker opens, doubles
+# with every opening in a row
+CIRCUIT_BREAKER_COOLDOWN = 60
+# openings in a row after which the remaining urls of a domain are dropped
+CIRCUIT_BREAKER_MAX_OPENINGS = 3
+# max amount of retries of a url whose request failed
+MAX_RETRIES = 3
+# max amount of pages that are fetched per domain, 0 = no limit, the domains
+# of the seed have no limit
+DOMAIN_FETCH_BUDGET = 0
+# amount of classified pages of a domain after which its yield is checked
+DOMAIN_YIELD_MIN_PAGES = 20
+# min share of relevant pages of a domain, domains below are pruned, 0 = no
+# pruning, the domains of the seed are never pruned
+DOMAIN_MIN_YIELD = 0
+# max amount of fetched pages that wait for the extractors, retrievers wait
+# while the buffer is full
+UNPROCESSED_HTML_MAX_ENTRIES = 500
+# max total size of the fetched pages that wait for the extractors in bytes
+UNPROCESSED_HTML_MAX_BYTES = 104857600
+# amount of locks the shared storage classes spread their keys over, more
+# stripes mean less contention between the threads
+STORAGE_LOCK_STRIPES = 16
 # number of extractor threads
 NUM_EXTRACTOR_THREADS = 1
+# number of processes that parse the fetched pages while they wait for the
+# extractors, 0 = the extractor threads parse them
+PARSER_PROCESSES = 0
 # custom user agent
 CUSTOM_USER_AGENT = "https://peasec.de/peasec-crawlbot/"
 # number of urls that should be crawled
 CRAWLING_LIMIT = 100
+# amount of hosts whose keep-alive connections are pooled
+POOL_MAX_HOSTS = 100
+# amount of keep-alive connections that are pooled per host
+POOL_MAX_CONNECTIONS_PER_HOST = 4
+# seconds DNS results are cached, 0 = no caching
+DNS_CACHE_TTL = 0
+# max amount of hosts whose DNS results are cached, the least recently used
+# host is dropped first
+DNS_CACHE_SIZE = 10000
+# max size of a page in bytes, bigger pages are aborted while downloading
+MAX_BODY_SIZE = 5 * 1024 * 1024
+# max seconds a single page download may take in total
+FETCH_DEADLINE = 30
+# seconds after which a robots.txt request is aborted
+ROBOTS_TXT_TIMEOUT = 5
+# max bytes of a robots.txt that are read, the rest of the file is ignored
+ROBOTS_TXT_MAX_SIZE = 500 * 1024
+# seconds a robots.txt (or the information that there is none) stays cached
+ROBOTS_TXT_TTL = 86400
+# seconds a failed robots.txt request (server error, timeout) stays cached, the
+# host counts as disallowing everything until then
+ROBOTS_TXT_ERROR_TTL = 600
+# file the robots.txt cache is kept in between runs
+ROBOTS_TXT_CACHE_FILE = "assets/robots_txt_cache.json"
+# cache pages and their classification for conditional requests in the next
+# run
+USE_HTTP_CACHE = True
+# directory of the http cache
+HTTP_CACHE_DIR = "assets/http_cache"
+# max amount of pages in the http cache, the least recently used are dropped
+HTTP_CACHE_MAX_ENTRIES = 100000
+# max total size of the bodies in the http cache in bytes
+HTTP_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# handling of pages whose main text is a near-duplicate of a classified page,
+# "reuse" takes over its classification, "skip" does that too but doesn't
+# follow the links of the page, "off" classifies every page
+NEAR_DUPLICATE_MODE = "reuse"
+# max amount of differing bits of the 64 bit SimHashes of near-duplicates
+NEAR_DUPLICATE_MAX_DISTANCE = 3
+# directory of the checkpoint a crawl can be resumed from with --resume
+CHECKPOINT_DIR = "assets/checkpoint"
+# seconds between two checkpoints, 0 = only at the end of the crawl
+CHECKPOINT_INTERVAL = 300
+# address the coordinator of a sharded crawl (--shards) listens on, use
+# "0.0.0.0" to accept shards that run on other machines, which needs a shared
+# secret in SHARD_AUTHKEY_ENV
+SHARD_COORDINATOR_ADDRESS = ("localhost", 6150)
+# environment variable with the shared secret the shards authenticate with at
+# the coordinator, a crawl whose shards all run on this machine uses a random
+# secret if it is not set
+SHARD_AUTHKEY_ENV = "THREATCRAWL_SHARD_AUTHKEY"
+# min length of the shared secret of a coordinator that is reachable from other
+# machines
+SHARD_AUTHKEY_MIN_LENGTH = 16
+# seconds the coordinator waits for all shards to connect, shards on other
+# machines might be started later
+SHARD_CONNECT_TIMEOUT = 300
+# amount of links for another shard that are sent to it together
+SHARD_BATCH_SIZE = 100
+# seconds between two status reports of a shard, links for other shards are
+# sent at the latest with the next report
+SHARD_STATUS_INTERVAL = 1
 # max length for url names in the url map diagram
 DIAGRAMM_MAX_URL_LENGTH = 30
 # filename of ground truth vectors
@@ -0,0 +1,709 @@
+"""Module that splits a crawl into shards that run in separate processes or on
+separate machines
+
+Every domain belongs to exactly one shard, which keeps the politeness state,
+the robots.txt cache and the frontier of its domains. Links to domains of
+other shards are sent to them through the coordinator, which also detects the
+end of the crawl and merges the results of the shards.
+"""
+from ipaddress import ip_address
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+import json
+import os
+import threading
+import time
+import zlib
+
+from src.crawler_bot.config import FRONTIER_DB_FILE, SHARD_AUTHKEY_ENV, SHARD_AUTHKEY_MIN_LENGTH, SHARD_BATCH_SIZE, SHARD_CONNECT_TIMEOUT, SHARD_STATUS_INTERVAL
+from src.crawler_bot.custom_logging import Logger
+from src.crawler_bot.monitoring import GlobalMonitor
+from src.crawler_bot.storage import CrawledURLs, URLQueue
+from src.crawler_bot.url_record import URLRecord, get_url_record
+
+# results of a crawl that are lists in JSON format and are merged by
+# concatenating them
+MERGED_RESULTS = [
+    "unprocessed_html_database", "crawled_urls", "url_map", "robotstxt",
+    "pruned_domains"
+]
+
+
+def get_shard(url: URLRecord, amount_shards: int) -> int:
+  """Returns the shard a url belongs to
+
+  All urls of a domain belong to the same shard, since the politeness of the
+  scheduler is kept per domain. crc32 is used because the built-in hash of a
+  string differs between processes. Records without a domain are split by
+  their host.
+
+  Args:
+    url: record of the url
+    amount_shards: amount of shards of the crawl
+
+  Returns:
+    the id of the shard
+  """
+  key = url.domain if url.domain is not None else url.host
+  return zlib.crc32(key.encode("utf-8")) % amount_shards
+
+
+def get_shard_limit(crawl_limit: int, shard_id: int, amount_shards: int) -> int:
+  """Splits the crawl limit between the shards
+
+  Args:
+    crawl_limit: crawl limit of the whole crawl, 0 = no limit
+    shard_id: id of the shard
+    amount_shards: amount of shards of the crawl
+
+  Returns:
+    the crawl limit of the shard, at least 1 unless there is no limit
+  """
+  if crawl_limit == 0:
+    return 0
+  shard_limit = crawl_limit // amount_shards
+  if shard_id < crawl_limit % amount_shards:
+    shard_limit += 1
+  return max(shard_limit, 1)
+
+
+def get_shard_path(path: str, shard_id: int) -> str:
+  """Returns the file or directory a shard uses instead of the given one, so
+      shards on the same machine don't write to the same files
+
+  Args:
+    path: the file or directory of a crawl that is not sharded
+    shard_id: id of the shard, None if the crawl is not sharded
+
+  Returns:
+    the path of the shard
+  """
+  if shard_id is None:
+    return path
+  root, extension = os.path.splitext(path)
+  return root + "_shard" + str(shard_id) + extension
+
+
+def parse_address(address: str) -> tuple[str, int]:
+  """Splits an address like localhost:6150 into host and port
+
+  Args:
+    address: the address
+
+  Returns:
+    tuple of host and port
+  """
+  host, port = address.rsplit(":", 1)
+  return host, int(port)
+
+
+def is_loopback(host: str) -> bool:
+  """Checks if a host is only reachable from this machine
+
+  Args:
+    host: host name or ip address
+
+  Returns:
+    bool that shows if the host is localhost or a loopback address
+  """
+  if host == "localhost":
+    return True
+  try:
+    return ip_address(host).is_loopback
+  except ValueError:
+    return False
+
+
+def get_authkey(host: str, local_coordinator: bool) -> bytes:
+  """Returns the shared secret the shards authenticate with at the coordinator
+
+  The secret is read from the environment variable SHARD_AUTHKEY_ENV. If it is
+  not set and the coordinator runs here and only listens on the loopback
+  interface, a random secret is created that is handed to the shard processes.
+
+  Args:
+    host: host of the coordinator
+    local_coordinator: True if the coordinator runs on this machine
+
+  Raises:
+    ValueError: if the secret is missing or too short, while the coordinator
+                  is reachable from other machines or runs on another machine
+
+  Returns:
+    the secret
+  """
+  authkey = os.environ.get(SHARD_AUTHKEY_ENV, "")
+  if authkey == "":
+    if local_coordinator and is_loopback(host):
+      return os.urandom(32)
+    raise ValueError("set the shared secret of the shards in " +
+                     SHARD_AUTHKEY_ENV + " on every machine")
+  if len(authkey) < SHARD_AUTHKEY_MIN_LENGTH and not is_loopback(host):
+    raise ValueError("the shared secret in " + SHARD_AUTHKEY_ENV +
+                     " needs at least " + str(SHARD_AUTHKEY_MIN_LENGTH) +
+                     " characters if the coordinator is reachable from " +
+                     "other machines")
+  return authkey.encode("utf-8")
+
+
+def get_entry_relative_distance(entry: dict) -> float:
+  """Returns the relative distance of an entry of the html database in JSON
+      format, like get_relative_distance of the storage module
+
+  Args:
+    entry: the entry
+
+  Returns:
+    float of the relative_distance, 0 if entry was classified as not relevant
+  """
+  if not entry["relevant"]:
+    return 0
+  return entry["relative distances"][entry["guessed category"]]
+
+
+def merge_results(results: list[dict]) -> dict:
+  """Merges the results of the shards
+
+  Args:
+    results: list of the results of the shards, None for shards that were
+              lost
+
+  Returns:
+    the results of the whole crawl
+  """
+  results = [a for a in results if a is not None]
+  html_database = [
+      entry for a in results for entry in json.loads(a["html_database"])
+  ]
+  html_database.sort(key=get_entry_relative_distance)
+  merged = {
+      "html_database":
+          json.dumps(html_database),
+      "relevant_urls": [
+          entry["url"] + "," + entry["guessed category"]
+          for entry in html_database
+          if entry["relevant"] is True
+      ]
+  }
+  for name in MERGED_RESULTS:
+    merged[name] = json.dumps(
+        [item for a in results for item in json.loads(a[name])])
+  return merged
+
+
+class ShardClient:
+  """Connection of a shard to the coordinator
+
+  Links for another shard are collected and sent to it once SHARD_BATCH_SIZE
+  of them are together, the rest is sent with the next status report. The
+  status reports tell the coordinator if the shard is quiescent and how many
+  batches it sent and received.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    shard_id: id of the shard
+    amount_shards: amount of shards of the crawl
+    connection: the connection to the coordinator
+    outgoing: dictionary of the shards to the links waiting to be sent to
+              them, a link is a tuple of url record, relative distances and depth
+    amount_sent: amount of batches that were sent
+    amount_received: amount of batches that were received and queued
+    lock: lock that guards the above and sending on the connection
+    url_queue: the url queue the received links are added to
+    monitor: the global monitor of the shard
+    finished: event that is set once the crawl is finished
+    threads: the threads that receive messages and send the status reports
+"""
+
+  def __init__(self, logger: Logger, shard_id: int, amount_shards: int,
+               address: tuple[str, int], authkey: bytes):
+    """Inits ShardClient, connects to the coordinator and waits until all
+        shards are connected
+
+    Args:
+      logger: the custom logging module
+      shard_id: id of the shard
+      amount_shards: amount of shards of the crawl
+      address: tuple of host and port of the coordinator
+      authkey: the shared secret of the crawl, see get_authkey
+    """
+    self.name = "ShardClient " + str(shard_id)
+    self.logger = logger
+    self.shard_id = shard_id
+    self.amount_shards = amount_shards
+    self.outgoing: dict[int, list[tuple]] = {}
+    self.amount_sent = 0
+    self.amount_received = 0
+    self.lock = threading.Lock()
+    self.url_queue = None
+    self.monitor = None
+    self.finished = threading.Event()
+    self.threads = []
+
+    # the coordinator might run on another machine that is not started yet
+    while True:
+      try:
+        self.connection = Client(address, authkey=authkey)
+        break
+      except ConnectionRefusedError:
+        self.logger.log_warning(
+            self.name, "coordinator at " + str(address) +
+            " not reachable, trying again")
+        time.sleep(SHARD_STATUS_INTERVAL)
+    self.connection.send(("hello", shard_id))
+    # the coordinator starts the crawl once every shard is connected
+    try:
+      self.connection.recv()
+    except (EOFError, OSError) as e:
+      raise RuntimeError("the coordinator aborted the crawl") from e
+    self.logger.log_info(self.name, "initialized")
+
+  def start(self, url_queue: "ShardedURLQueue", monitor: GlobalMonitor) -> None:
+    """Starts receiving links and sending status reports
+
+    Args:
+      url_queue: the url queue of the shard
+      monitor: the global monitor of the shard
+
+    Returns:
+      None
+    """
+    self.url_queue = url_queue
+    self.monitor = monitor
+    self.threads = [
+        threading.Thread(target=self._receive, daemon=True),
+        threading.Thread(target=self._report, daemon=True)
+    ]
+    for thread in self.threads:
+      thread.start()
+
+  def _send_batch(self, shard_id: int, batch: list[tuple]) -> None:
+    """Sends a batch of links to another shard, lock needs to be held
+
+    Args:
+      shard_id: id of the shard the links belong to
+      batch: list of tuples of url record, relative distances and depth
+
+    Returns:
+      None
+    """
+    self.connection.send(("links", shard_id, batch))
+    self.amount_sent += 1
+    self.logger.log_debug(
+        self.name, "sent " + str(len(batch)) + " links to shard " +
+        str(shard_id))
+
+  def send_link(self, shard_id: int, url: URLRecord,
+                relative_distances: dict, depth: int) -> None:
+    """Sends a link to the shard it belongs to, once its batch is full
+
+    Args:
+      shard_id: id of the shard the url belongs to
+      url: record of the url, it is sent as it is
+      relative_distances: relative distances of the page the url was found on
+      depth: amount of links between the seed and the url
+
+    Returns:
+      None
+    """
+    with self.lock:
+      batch = self.outgoing.setdefault(shard_id, [])
+      batch.append((url, relative_distances, depth))
+      if len(batch) >= SHARD_BATCH_SIZE:
+        del self.outgoing[shard_id]
+        self._send_batch(shard_id, batch)
+
+  def flush(self) -> None:
+    """Sends all links that wait for their batch to fill up
+
+    Returns:
+      None
+    """
+    with self.lock:
+      for shard_id, batch in self.outgoing.items():
+        self._send_batch(shard_id, batch)
+      self.outgoing.clear()
+
+  def _receive(self) -> None:
+    """Queues the links of other shards until the coordinator finishes the
+        crawl
+
+    Returns:
+      None
+    """
+    while True:
+      try:
+        message = self.connection.recv()
+      except (EOFError, OSError):
+        self.logger.log_error(self.name, "lost the connection to coordinator")
+        message = ("finish",)
+      if message[0] == "finish":
+        self.finished.set()
+        self.monitor.finish("the coordinator found no work left in any shard")
+        return
+      # count the batch after its links are queued, so the shard is not
+      # quiescent while it reports the batch as received
+      self.url_queue.add_routed_urls(message[1])
+      with self.lock:
+        self.amount_received += 1
+      self.monitor.notify_retrievers()
+
+  def _report(self) -> None:
+    """Sends the waiting links and a status report every
+        SHARD_STATUS_INTERVAL seconds
+
+    The counters are read before the monitor is asked, a batch that is
+    received in between has its links already queued, so the shard isn't
+    quiescent. Links that are added after the flush keep the shard from being
+    reported as quiescent until they are sent.
+
+    Returns:
+      None
+    """
+    while not self.finished.wait(SHARD_STATUS_INTERVAL):
+      self.flush()
+      with self.lock:
+        amount_sent, amount_received = self.amount_sent, self.amount_received
+      quiescent = self.monitor.is_quiescent()
+      with self.lock:
+        quiescent = quiescent and not self.outgoing
+        try:
+          self.connection.send(
+              ("status", quiescent, amount_sent, amount_received))
+        except OSError:
+          return
+
+  def send_results(self, results: dict) -> None:
+    """Sends the results of the shard to the coordinator and closes the
+        connection
+
+    Args:
+      results: the results of the shard
+
+    Returns:
+      None
+    """
+    self.finished.set()
+    with self.lock:
+      self.connection.send(("results", results))
+    self.connection.close()
+    self.logger.log_info(self.name, "results sent")
+
+
+class ShardedURLQueue(URLQueue):
+  """URL queue of a shard, urls of domains of other shards are sent to their
+      shard instead of being queued
+
+  Attributes:
+    shard_client: the connection to the coordinator
+    crawled_urls: the list of crawled urls of the shard
+"""
+
+  def __init__(self,
+               logger: Logger,
+               seed: list[str],
+               shard_client: ShardClient,
+               crawled_urls: CrawledURLs,
+               frontier_db_file: str = FRONTIER_DB_FILE):
+    """Inits ShardedURLQueue
+
+    Args:
+      logger: the custom logging module
+      seed: list of urls that define the seed, only the ones of this shard
+              are queued
+      shard_client: the connection to the coordinator
+      crawled_urls: the list of crawled urls of the shard
+      frontier_db_file: database file of the sqlite frontier
+    """
+    super().__init__(logger, [
+        url for url in seed if get_shard(get_url_record(url),
+                                         shard_client.amount_shards) ==
+        shard_client.shard_id
+    ], frontier_db_file)
+    self.shard_client = shard_client
+    self.crawled_urls = crawled_urls
+
+  def add_url(self,
+              url: URLRecord,
+              relative_distances: dict = None,
+              depth: int = 1) -> None:
+    """Adds an URL to the queue if it belongs to this shard, otherwise it is
+        sent to its shard
+
+    Args:
+      url: record of the url that needs to be added
+      relative_distances: relative distances of the page the url was found on,
+                            they decide the priority of the url
+      depth: amount of links between the seed and the url
+
+    Returns:
+      None
+    """
+    shard_id = get_shard(url, self.shard_client.amount_shards)
+    if shard_id == self.shard_client.shard_id:
+      super().add_url(url, relative_distances, depth)
+    else:
+      self.shard_client.send_link(shard_id, url, relative_distances, depth)
+
+  def add_routed_urls(self, links: list[tuple]) -> None:
+    """Queues the links other shards found, unless they were crawled already
+        or the crawl limit is reached
+
+    Args:
+      links: list of tuples of url record, relative distances and depth
+
+    Returns:
+      None
+    """
+    if self.crawled_urls.crawl_limit_reached():
+      return
+    for url, relative_distances, depth in links:
+      if not self.crawled_urls.is_crawled(url):
+        super().add_url(url, relative_distances, depth)
+
+
+class Coordinator:
+  """Connects the shards of a crawl, forwards the links they send each other
+      and finishes the crawl once no shard has work left
+
+  No shard has work left when every shard reports that it is quiescent and
+  every batch that was sent was received. The reports of the shards are not
+  taken at the same time, so this needs to hold for two rounds of reports in a
+  row with unchanged counters.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    amount_shards: amount of shards of the crawl
+    listener: the listener the shards connect to
+    connections: list of the connections to the shards
+    connection_locks: list of the locks that guard sending on the connections
+    statuses: list of the last status report of every shard, a tuple of
+              quiescent, amount of sent and received batches
+    amounts_reports: list of the amount of status reports of every shard
+    results: list of the results of the shards, None until they are received
+    amount_dropped: amount of batches that were dropped since their shard had
+                      ended
+    lost: bool that shows if the connection to a shard got lost
+    lock: lock that guards statuses, reports, results and the counters
+"""
+
+  def __init__(self, logger: Logger, amount_shards: int,
+               address: tuple[str, int], authkey: bytes):
+    """Inits Coordinator and starts listening for the shards
+
+    Args:
+      logger: the custom logging module
+      amount_shards: amount of shards of the crawl
+      address: tuple of host and port to listen on
+      authkey: the shared secret of the crawl, see get_authkey
+    """
+    self.name = "Coordinator"
+    self.logger = logger
+    self.amount_shards = amount_shards
+    self.listener = Listener(address, authkey=authkey)
+    self.connections = [None] * amount_shards
+    self.connection_locks = [threading.Lock() for _ in range(amount_shards)]
+    self.statuses = [(False, 0, 0)] * amount_shards
+    self.amounts_reports = [0] * amount_shards
+    self.results = [None] * amount_shards
+    self.amount_dropped = 0
+    self.lost = False
+    self.lock = threading.Lock()
+    self.logger.log_info(self.name,
+                         "initialized, listening on " + str(address))
+
+  def _accept(self) -> None:
+    """Accepts the connections of the shards until all of them are connected or
+        the listener is closed
+
+    Returns:
+      None
+    """
+    while True:
+      with self.lock:
+        if all(a is not None for a in self.connections):
+          return
+      try:
+        connection = self.listener.accept()
+        _, shard_id = connection.recv()
+      except AuthenticationError:
+        self.logger.log_warning(self.name,
+                                "rejected a connection with a wrong secret")
+        continue
+      except (EOFError, OSError):
+        return
+      with self.lock:
+        self.connections[shard_id] = connection
+      self.logger.log_info(self.name, "shard " + str(shard_id) + " connected")
+
+  def _wait_for_shards(self, processes: list) -> None:
+    """Waits until all shards are connected
+
+    Args:
+      processes: the processes of the shards that run on this machine
+
+    Raises:
+      RuntimeError: if a shard process ended or not all shards connected
+                      within SHARD_CONNECT_TIMEOUT seconds
+
+    Returns:
+      None
+    """
+    accept_thread = threading.Thread(target=self._accept, daemon=True)
+    accept_thread.start()
+    deadline = time.time() + SHARD_CONNECT_TIMEOUT
+    while True:
+      accept_thread.join(SHARD_STATUS_INTERVAL)
+      if not accept_thread.is_alive():
+        break
+      if any(not process.is_alive() for process in processes):
+        reason = "a shard process ended before it connected"
+      elif time.time() > deadline:
+        reason = "not all shards connected within " + str(
+            SHARD_CONNECT_TIMEOUT) + "s"
+      else:
+        continue
+      self.logger.log_error(self.name, "aborting the crawl, " + reason)
+      # the connected shards stop waiting for the start of the crawl
+      with self.lock:
+        for connection in self.connections:
+          if connection is not None:
+            connection.close()
+      self.listener.close()
+      raise RuntimeError(reason)
+    with self.lock:
+      if not all(a is not None for a in self.connections):
+        raise RuntimeError("the listener was closed before all shards " +
+                           "connected")
+
+  def _send(self, shard_id: int, message: tuple) -> bool:
+    """Sends a message to a shard
+
+    Args:
+      shard_id: id of the shard
+      message: the message
+
+    Returns:
+      bool that shows if the message was sent
+    """
+    with self.connection_locks[shard_id]:
+      try:
+        self.connections[shard_id].send(message)
+        return True
+      except OSError:
+        return False
+
+  def _serve(self, shard_id: int) -> None:
+    """Handles the messages of a shard until it sent its results
+
+    Args:
+      shard_id: id of the shard
+
+    Returns:
+      None
+    """
+    connection = self.connections[shard_id]
+    while True:
+      try:
+        message = connection.recv()
+      except (EOFError, OSError):
+        self.logger.log_error(self.name,
+                              "lost the connection to shard " + str(shard_id))
+        with self.lock:
+          self.lost = True
+        return
+      if message[0] == "links":
+        _, target_id, batch = message
+        with self.lock:
+          ended = self.results[target_id] is not None
+        if ended or not self._send(target_id, ("links", batch)):
+          self.logger.log_warning(
+              self.name, "dropped " + str(len(batch)) + " links of shard " +
+              str(target_id) + ", it has ended")
+          with self.lock:
+            self.amount_dropped += 1
+      elif message[0] == "status":
+        with self.lock:
+          self.statuses[shard_id] = message[1:]
+          self.amounts_reports[shard_id] += 1
+      elif message[0] == "results":
+        with self.lock:
+          self.results[shard_id] = message[1]
+          # a shard that ended early can't create work anymore
+          self.statuses[shard_id] = (True,) + self.statuses[shard_id][1:]
+        self.logger.log_info(self.name,
+                             "received the results of shard " + str(shard_id))
+        return
+
+  def _get_quiescent_state(self) -> tuple:
+    """Returns the status reports if every shard is quiescent and every batch
+        was received, lock needs to be held
+
+    Returns:
+      tuple of the status reports, None if some shard might have work
+    """
+    if not all(quiescent for quiescent, _, _ in self.statuses):
+      return None
+    amount_sent = sum(sent for _, sent, _ in self.statuses)
+    amount_received = sum(received for _, _, received in self.statuses)
+    if amount_sent != amount_received + self.amount_dropped:
+      return None
+    return tuple(self.statuses)
+
+  def run(self, processes: list = None) -> list[dict]:
+    """Waits for all shards, forwards their links until no shard has work
+        left and collects their results
+
+    Args:
+      processes: the processes of the shards that run on this machine, the
+                  crawl is aborted if one of them ends before it connected
+
+    Raises:
+      RuntimeError: if not all shards connected, see _wait_for_shards
+
+    Returns:
+      list of the results of the shards, None for shards that were lost
+    """
+    self._wait_for_shards(processes or [])
+    threads = [
+        threading.Thread(target=self._serve, args=(shard_id,), daemon=True)
+        for shard_id in range(self.amount_shards)
+    ]
+    for thread in threads:
+      thread.start()
+    for shard_id in range(self.amount_shards):
+      self._send(shard_id, ("start",))
+
+    previous_state, previous_reports = None, None
+    while True:
+      time.sleep(SHARD_STATUS_INTERVAL)
+      with self.lock:
+        if self.lost:
+          reason = "a shard was lost"
+          break
+        if all(a is not None for a in self.results):
+          reason = "all shards ended"
+          break
+        state = self._get_quiescent_state()
+        # shards that ended don't report anymore
+        reports = [
+            a if self.results[shard_id] is None else None
+            for shard_id, a in enumerate(self.amounts_reports)
+        ]
+      if state is not None and state == previous_state and all(
+          a is None or a > b for a, b in zip(reports, previous_reports)):
+        reason = "no shard has work left"
+        break
+      previous_state, previous_reports = state, reports
+
+    self.logger.log_info(self.name, "finishing the crawl, " + reason)
+    for shard_id in range(self.amount_shards):
+      self._send(shard_id, ("finish",))
+    for thread in threads:
+      thread.join()
+    for connection in self.connections:
+      connection.close()
+    self.listener.close()
+    return self.results
@@ -1,29 +1,13 @@
 """Contains classes for the extraction process
 """
 
-import time
-from bs4 import BeautifulSoup
 import json
-import re
-from urllib.parse import urlparse
-
-from src.crawler_bot import custom_logging, monitoring, storage, classification
-from src.crawler_bot.tools import extract_main_domain, extract_main_domain_plus_tld
-from src.crawler_bot.config import GROUND_TRUTH_VECTORS_FILE
-
-DOMAIN_FORMAT = re.compile(
-    r"(?:^(\w{1,255}):(.{1,255})@|^)"  # http basic authentication [optional]
-    r"(?:(?:(?=\S{0,253}(?:$|:))"  # check full domain length to be less than or equal to 253 (starting after http basic auth, stopping before port)
-    r"((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+"  # check for at least one subdomain (maximum length per subdomain: 63 characters), dashes in between allowed
-    r"(?:[a-z0-9]{1,63})))"  # check for top level domain, no dashes allowed
-    r"|localhost)"  # accept also "localhost" only
-    r"(:\d{1,5})?",  # port [optional]
-    re.IGNORECASE)
-SCHEME_FORMAT = re.compile(
-    r"^(http|hxxp|ftp|fxp)s?$",  # scheme: http(s) or ftp(s)
-    re.IGNORECASE)
-DOMAIN_PLUS_TLD_FORMAT = re.compile(r"[^.]+\.[^.]+$")
-MAIN_DOMAIN_ONLY_FORMAT = re.compile(r"([^.]+)\.[^.]+$")
+from urllib.parse import urljoin
+
+from src.crawler_bot import custom_logging, monitoring, near_duplicates, parsing, storage, classification
+from src.crawler_bot.config import GROUND_TRUTH_VECTORS_FILE, NEAR_DUPLICATE_MODE
+from src.crawler_bot.url_filter import URLFilter
+from src.crawler_bot.url_record import URLRecord
 
 
 class Extractor:
@@ -41,13 +25,21 @@ class Extractor:
     url_map: instance of the url map
     monitor: the global monitor to check stop requirements
     classifier: the used classifier
+    http_cache: cache of pages and classifications of previous runs, None if
+                  not used
+    near_duplicate_index: index of the classified pages to find
+                            near-duplicates, None if not used
+    url_filter: filter of the links of the classified pages
 """
 
   def __init__(self, id_number: int, logger: custom_logging.Logger,
                html_database: storage.HTMLDatabase,
                unprocessed_html_database: storage.UnprocessedHTMLDatabase,
                url_queue: storage.URLQueue, crawled_urls: storage.CrawledURLs,
-               url_map: storage.URLMap, monitor: monitoring.GlobalMonitor):
+               url_map: storage.URLMap,
+               monitor: monitoring.GlobalMonitor,
+               http_cache: storage.HTTPCache = None,
+               near_duplicate_index: near_duplicates.NearDuplicateIndex = None):
     """Inits Extractor
 
     Args:
@@ -59,7 +51,10 @@ class Extractor:
       crawled_urls: instance of the list of crawled urls
       url_map: instance of the url map
       monitor: the global monitor to check stop requirements
-
+      http_cache: cache of pages and classifications of previous runs, None if
+                    not used
+      near_duplicate_index: index of the classified pages to find
+                              near-duplicates, None if not used
     """
     self.state = monitoring.ThreadState.RUNNING
     self.id_number = id_number
@@ -71,17 +66,20 @@ class Extractor:
     self.crawled_urls = crawled_urls
     self.url_map = url_map
     self.monitor = monitor
+    self.http_cache = http_cache
+    self.near_duplicate_index = near_duplicate_index
     self.classifier = classification.Classifier(id_number, logger)
     self.classifier.load_parameters_from_file(GROUND_TRUTH_VECTORS_FILE)
 
     # load blacklist
     with open("assets/blacklist.json", encoding="utf-8") as f:
       self.blacklist = json.load(f)
+    self.url_filter = URLFilter(logger, self.blacklist)
 
     self.logger.log_debug(self.name, "initialized")
 
   def nofollow_tag_present(self, crawled_url: str,
-                           parsed_html_document: BeautifulSoup) -> bool:
+                           parsed_page: parsing.ParsedPage) -> bool:
     """Checks if there is a nofollow robots meta tag in the given document
 
     https://developers.google.com/search/docs/advanced/robots/robots_meta_tag
@@ -92,260 +90,179 @@ class Extractor:
 
     Args:
       crawled_url: the url the content comes from
-      parsed_html_document: BeautifulSoup object which may contain the nofollow
-                              robots meta tag
+      parsed_page: the parsed document
 
     Returns:
       boolean indicating if the given document has the nofollow robots meta tag
     """
-    for tag in parsed_html_document.find_all("meta", attrs={"name": "robots"}):
-      if not "content" in tag:
-        return False
-      for content in tag["content"].split(","):
-        if content.strip() in ["nofollow", "none"]:
-          self.logger.log_debug(
-              self.name, "url " + crawled_url + " contains a nofollow meta tag")
-          return True
-    return False
+    if parsed_page.nofollow:
+      self.logger.log_debug(
+          self.name, "url " + crawled_url + " contains a nofollow meta tag")
+    return parsed_page.nofollow
 
-  def is_valid(self, url: str) -> bool:
-    """Checks if the given url is valid
-
-    https://stackoverflow.com/questions/7160737/how-to-validate-a-url-in-python-malformed-or-not
+  def parse_entry(self, entry: storage.UnprocessedHTMLEntry,
+                  html_document: str,
+                  with_main_content: bool) -> parsing.ParsedPage:
+    """Returns the parsed document of an entry, the parser processes start
+        parsing it when it is added, otherwise it is parsed here
 
     Args:
-      url: string that needs to be checked
+      entry: the unprocessed html entry
+      html_document: the decoded document
+      with_main_content: False if the main content is not needed
 
     Returns:
-      bool that shows if given url is valid
+      the parsed document
     """
-    if url is None or url == "":
-      return False
-
-    url = url.strip()
-
-    # no url given
-    if not url:
-      self.logger.log_debug(self.name, "empty url detected => Invalid")
-      return False
-
-    # url too long
-    if len(url) > 2048:
-      self.logger.log_debug(self.name, "url too long (" + url + ")")
-      return False
-
-    result = urlparse(url)
-    scheme = result.scheme
-    domain = result.netloc
-
-    # url has no scheme
-    if not scheme:
-      self.logger.log_debug(self.name,
-                            "url has no scheme (" + url + ") => Invalid")
-      return False
-
-    # url has no valid scheme
-    if not re.fullmatch(SCHEME_FORMAT, scheme):
-      self.logger.log_debug(self.name,
-                            "url has no valid scheme (" + url + ") => Invalid")
-      return False
-
-    # url has no domain
-    if not domain:
-      self.logger.log_debug(self.name,
-                            "url has no domain (" + url + ") => Invalid")
-      return False
-
-    # domain is malformed
-    if not re.fullmatch(DOMAIN_FORMAT, domain):
-      self.logger.log_debug(self.name,
-                            "url is malformed (" + url + ") => Invalid")
-      return False
-
-    # if all tests are negative, URL is probably valid
-    return True
-
-  def is_on_blacklist(self, url: str) -> bool:
-    """Checks if URL or parts of it is on blacklist
+    if entry.parsed_page is not None:
+      try:
+        return entry.parsed_page.result()
+      except Exception as e:  # pylint: disable=broad-except
+        # a crashed parser process breaks the whole pool, the extractors
+        # continue to parse the pages themselves
+        self.logger.log_warning(
+            self.name, "parser process failed for " + entry.url + " (" +
+            repr(e) + "), parsing it here")
+    return parsing.parse_page(html_document, with_main_content)
+
+  def extract_urls(self, hrefs: list[str],
+                   base_url: str) -> list[URLRecord]:
+    """Extracts all urls out of the links of a html document
 
     Args:
-      url: string of the url to check
+      hrefs: the stripped href properties of all a elements of the document
+      base_url: the url relative links are resolved against, the url the html
+                  document was received from or its <base href>
 
     Returns:
-      bool that indicates if url is on blacklist
+      a list of the records of the canonical forms of the extracted urls
     """
-    # check if on blacklist
-    # check if main domain is on blacklist
-    if extract_main_domain(url) in self.blacklist["main_domains"]:
-      self.logger.log_debug(self.name, "domain is on blacklist (" + url + ")")
-      return True
-    # check if tld + main domain is on blacklist
-    if extract_main_domain_plus_tld(url) in self.blacklist["main_domains+tlds"]:
-      self.logger.log_debug(self.name,
-                            "domain+tld is on blacklist (" + url + ")")
-      return True
-    # check if extension is on blacklist
-    for extension in self.blacklist["extensions"]:
-      if urlparse(url).path[-(len(extension)):] == extension:
-        self.logger.log_debug(self.name,
-                              "extension is on blacklist (" + url + ")")
-        return True
+    return self.url_filter.filter_urls(hrefs, base_url)
 
-    # if every test is passed, url is not on blacklist
-    return False
-
-  def relative_to_absolute_url(self, relative_url: str, parent_url: str) -> str:
-    """Attempts to transform a relative url to an absolute url
-
-    Args:
-      relative_url: the url that needs to be transformed
-      parent_url: the url of the website that contained url
+  def extract(self) -> None:
+    """extracts the urls from the next html document in line
 
     Returns:
-      an attempt of an absolute url, not nessecarily a valid url
-
-    Example:
-      parent_url = https://www.google.com/testpath/test.html?myparameter=1
-
-      /mytest.html => https://www.google.com/mytest.html
-      mytest.html => https://www.google.com/testpath/mytest.html
-
+      None
     """
-    # parse the parent url
-    parsed_parent = urlparse(parent_url)
-    scheme_and_domain = parsed_parent.scheme + "://" + parsed_parent.netloc
-    if relative_url[0] == "/":
-      # url starts with a slash, so it just has to be appended to the main url
-      absolute_url = scheme_and_domain + relative_url
-    else:
-      # url doesn't start with slash, so it might be just the last part of the
-      # url (e.g. file.html)
-      if parsed_parent.path == "":
-        # no path, so just add it to the domain
-        absolute_url = scheme_and_domain + "/" + relative_url
-      else:
-        # attach to domain and path but cut away everything after the last slash
-        absolute_url = scheme_and_domain + parsed_parent.path[:parsed_parent.
-                                                              path.rindex("/") +
-                                                              1] + relative_url
-
-    self.logger.log_debug(
-        self.name, "Transformed URL " + relative_url + " to " + absolute_url)
-    return absolute_url
-
-  def extract_urls(self, parsed_html_document: BeautifulSoup,
-                   crawled_url: str) -> list[str]:
-    """Extracts all urls out of a given html document
-
-    Args:
-      parsed_html_document: BeautifulSoup object where urls should be extracted
-      crawled_url: string of the url the html document belongs to
+    # get next html page
+    entry = self.unprocessed_html_database.get_entry()
 
-    Returns:
-      a list of extracted urls
-    """
-    # extract href property from all a elements that have it and don't start
-    # with javascript:
-    hrefs = [
-        item["href"].strip()
-        for item in parsed_html_document.find_all("a", href=True)
-    ]
-
-    urls = []
-
-    # remove all hrefs that are empty, just anchors (#) or refer to other
-    # protocols like fttp://, mailto:, javascript: etc.
-    for href in hrefs:
-      if len(href) <= 0:
-        continue
-      if href[0] == "#":
-        continue
-      if re.search("^[a-zA-Z]+:", href) is not None:
-        # url has a protocol at the beginning, remove if not http or https
-        if len(href) >= 5 and href[:4] != "http" and href[:5] != "https":
-          continue
-      urls.append(href)
-
-    # only return urls that are valid and not in blacklist
-    valid_urls = []
-    for url in urls:
-      # check if url is valid url
-      if not self.is_valid(url):
-        # if not, it might be a relative url
-        url = self.relative_to_absolute_url(url, crawled_url)
-        # check again if now valid
-        if not self.is_valid(url):
-          # still not valid, so skip this one
-          continue
-
-      # check if url is blacklisted
-      if self.is_on_blacklist(url):
-        # url is on blacklist, skip this one
-        continue
+    if entry is None:
+      return
 
-      # all checks went through, url is valid and not on blacklist
-      valid_urls.append(url)
+    try:
+      self.process_entry(entry)
+    finally:
+      # the page counts as pending for checkpoints until it is stored
+      self.unprocessed_html_database.task_done(entry.url)
 
-    # return list without duplicates
-    return list(dict.fromkeys(valid_urls))
+  def process_entry(self, entry: storage.UnprocessedHTMLEntry) -> None:
+    """classifies a fetched html document, stores it and queues its urls
 
-  def extract(self) -> None:
-    """extracts the urls from the next html document in line
+    Args:
+      entry: the unprocessed html entry
 
     Returns:
       None
     """
-    # get next html page
-    crawled_url, is_seed, html_document = self.unprocessed_html_database.get_entry(
-    )
-
-    if crawled_url is None:
-      return
-
+    crawled_url = entry.url
+    is_seed = entry.is_seed
+    depth = self.url_queue.pop_depth(crawled_url)
     self.logger.log_info(self.name, "processing: " + crawled_url)
 
-    # parse the document
-    parsed_html_document = BeautifulSoup(html_document, "lxml")
-
-    # classify document
-    classification_result = self.classifier.is_relevant(crawled_url,
-                                                        html_document)
+    html_document = entry.get_html()
+
+    # reuse the classification of a previous run if the page didn't change,
+    # otherwise classify document
+    classification_result = None
+    duplicate_of = None
+    if self.http_cache is not None:
+      content_hash = storage.get_content_hash(entry.content)
+      classification_result = self.http_cache.get_classification(
+          crawled_url, content_hash)
+
+    # the document is parsed once for its links, the robots meta tag and the
+    # main content, which is only needed if the page is classified
+    parsed_page = self.parse_entry(entry, html_document,
+                                   classification_result is None)
+    nofollow = self.nofollow_tag_present(crawled_url, parsed_page)
+
+    if classification_result is None:
+      # the main content is extracted once for the SimHash and the classifier,
+      # an empty one keeps the classifier from trying again
+      main_content = parsed_page.main_content or ""
+      # syndicated copies of a classified page take over its classification
+      simhash = None
+      if self.near_duplicate_index is not None:
+        simhash = near_duplicates.get_simhash(main_content)
+        if simhash is not None:
+          match = self.near_duplicate_index.find(simhash)
+          if match is not None:
+            duplicate_of, classification_result = match
+            self.logger.log_debug(self.name,
+                                  "near-duplicate of " + duplicate_of)
+      if classification_result is None:
+        classification_result = self.classifier.is_relevant(
+            crawled_url, html_document, main_content)
+        if simhash is not None:
+          self.near_duplicate_index.add(simhash, crawled_url,
+                                        classification_result)
+      if self.http_cache is not None:
+        self.http_cache.set_classification(crawled_url, content_hash,
+                                           classification_result)
+    else:
+      self.logger.log_debug(self.name,
+                            "unchanged page, reusing classification")
 
-    # if page is not relevant we don't extract urls
-    if (not classification_result["relevant"] and
-        not is_seed) or self.nofollow_tag_present(crawled_url,
-                                                  parsed_html_document):
+    # near-duplicates in skip mode are stored but their links are not
+    # followed, the page they duplicate already contributed the same links
+    if duplicate_of is not None and NEAR_DUPLICATE_MODE == "skip":
       self.html_database.add_html_document(
           crawled_url, html_document, classification_result["relevant"], [],
           classification_result["distances"],
           classification_result["relative_distances"],
-          classification_result["guessed_category"])
-    # if page is relevant but has a nofollow tag we save it as relevant but
-    # dont extract urls
-    elif self.nofollow_tag_present(crawled_url, parsed_html_document):
+          classification_result["guessed_category"], duplicate_of)
+    # if page is not relevant we don't extract urls, if page is relevant but
+    # has a nofollow tag we save it as relevant but dont extract urls
+    elif (not classification_result["relevant"] and not is_seed) or nofollow:
       self.html_database.add_html_document(
           crawled_url, html_document, classification_result["relevant"], [],
           classification_result["distances"],
           classification_result["relative_distances"],
-          classification_result["guessed_category"])
+          classification_result["guessed_category"], duplicate_of)
     # page is relevant or seed and doesn't contain nofollow tag -> extract urls
     else:
-      extracted_urls = self.extract_urls(parsed_html_document, crawled_url)
+      base_url = entry.base_url
+      if parsed_page.base_href is not None:
+        base_url = urljoin(base_url, parsed_page.base_href)
+      extracted_urls = self.extract_urls(parsed_page.hrefs, base_url)
       self.html_database.add_html_document(
           crawled_url, html_document, classification_result["relevant"],
-          extracted_urls, classification_result["distances"],
+          [a.url for a in extracted_urls], classification_result["distances"],
           classification_result["relative_distances"],
-          classification_result["guessed_category"])
+          classification_result["guessed_category"], duplicate_of)
       # add extracted urls to url map
-      for exracted_url in extracted_urls:
-        self.url_map.add_url_path(crawled_url, exracted_url)
+      self.url_map.add_url_paths(crawled_url, extracted_urls)
 
       # add to urls queue but only if not already crawled and only if
-      # retrievers are still running
+      # retrievers are still running, the urls are prioritized by the
+      # classification of this page
       if not self.crawled_urls.crawl_limit_reached():
         for extracted_url in extracted_urls:
-          if extracted_url not in self.crawled_urls.crawled_urls:
-            self.url_queue.add_url(extracted_url)
+          if not self.crawled_urls.is_crawled(extracted_url):
+            self.url_queue.add_url(
+                extracted_url, classification_result["relative_distances"],
+                depth + 1)
+        self.monitor.notify_retrievers()
+
+  def has_work(self) -> bool:
+    """Checks if the extractor has work
+
+    Returns:
+      bool that shows if an unprocessed html document is waiting
+    """
+    return not self.unprocessed_html_database.is_empty()
 
   def start_extractor(self) -> None:
     """Starts the extractor
@@ -357,31 +274,18 @@ class Extractor:
 
       # check if extractor state needs to be changed
 
-      # 1. crawl limit reached and no unprocessed htmls left -> stop extractor
-      if self.crawled_urls.crawl_limit_reached(
-      ) and self.unprocessed_html_database.is_empty(
-      ) and self.monitor.retrievers_all_idle_or_stopped():
-        self.stop_extractor("Crawl limit reached")
-        continue
-
-      # 2. url queue empty + all extractors stopped/idle
-      # + all retrievers stopped/idle + unprocessed htmls is empty
-      # -> stop extractor
-      if self.url_queue.is_empty() and self.unprocessed_html_database.is_empty(
-      ) and self.monitor.retrievers_all_idle_or_stopped(
-      ) and self.monitor.extractors_all_idle_or_stopped():
-        self.stop_extractor(
-            "url queue empty, html queue empty and no reciever or extractor running"
-        )
-        continue
-
-      # 3. html database empty -> idle thread
-      if self.unprocessed_html_database.is_empty():
+      # 1. html database empty -> idle thread until a retriever adds a page,
+      # stop it once no thread has work left, this covers the crawl limit too
+      # since the retrievers stop there
+      if not self.has_work():
         self.idle_extractor("crawled urls database is empty")
-        time.sleep(0.1)
+        if not self.monitor.wait_for_work(self.monitor.extractor_condition,
+                                          self.has_work):
+          self.stop_extractor(
+              "url queue empty, html queue empty and no reciever or extractor running"
+          )
         continue
-      else:
-        self.continue_extractor()
+      self.continue_extractor()
       self.extract()
 
     self.logger.log_info(self.name, "stopped")
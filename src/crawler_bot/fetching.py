@@ -0,0 +1,475 @@
+"""Module that holds the shared HTTP connection pool used for all requests and
+the checks that stop downloads of pages the crawler can't use
+"""
+from collections import OrderedDict
+import re
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, HTTPError, NewConnectionError
+from urllib3.poolmanager import PoolManager
+from urllib3.util.connection import allowed_gai_family
+
+from src.crawler_bot.config import DNS_CACHE_SIZE, DNS_CACHE_TTL, FETCH_DEADLINE, MAX_BODY_SIZE, POOL_MAX_CONNECTIONS_PER_HOST, POOL_MAX_HOSTS, ROBOTS_TXT_MAX_SIZE, ROBOTS_TXT_TIMEOUT
+
+# content types of documents the extractor is able to process
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]
+# errors of a request that are caused by the network or the server, they count
+# against the health of the domain, all other errors are bugs of the crawler
+NETWORK_ERRORS = (requests.exceptions.RequestException, HTTPError, OSError)
+# size of the chunks the body is read in
+CHUNK_SIZE = 64 * 1024
+# charset declared by <meta charset="..."> or <meta http-equiv="Content-Type"
+# content="text/html; charset=...">
+META_CHARSET_FORMAT = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)",
+                                 re.IGNORECASE)
+
+
+class FetchAborted(Exception):
+  """Raised when the download of a page is stopped because the crawler can't
+      use it (no html, too big, too slow)
+"""
+
+
+def check_headers(content_type: str, content_length: str) -> None:
+  """Checks the headers of a response before its body is downloaded
+
+  Responses without a Content-Type are accepted, since many servers don't send
+  it for html pages
+
+  Args:
+    content_type: value of the Content-Type header, None if missing
+    content_length: value of the Content-Length header, None if missing
+
+  Raises:
+    FetchAborted: if the response is no html document or too big
+
+  Returns:
+    None
+  """
+  if content_type is not None:
+    mime_type = content_type.split(";")[0].strip().lower()
+    if mime_type not in HTML_CONTENT_TYPES:
+      raise FetchAborted("content type is " + mime_type)
+  if content_length is not None and content_length.strip().isdigit():
+    if int(content_length) > MAX_BODY_SIZE:
+      raise FetchAborted("content length is " + content_length.strip())
+
+
+def check_body(size: int, started_at: float) -> None:
+  """Checks a partly downloaded body
+
+  Args:
+    size: amount of bytes downloaded so far
+    started_at: time.monotonic() timestamp when the request was started
+
+  Raises:
+    FetchAborted: if the body is too big or the download took too long
+
+  Returns:
+    None
+  """
+  if size > MAX_BODY_SIZE:
+    raise FetchAborted("body is bigger than " + str(MAX_BODY_SIZE) + " bytes")
+  if time.monotonic() - started_at > FETCH_DEADLINE:
+    raise FetchAborted("download took longer than " + str(FETCH_DEADLINE) +
+                       " seconds")
+
+
+def read_body(response: requests.Response, started_at: float) -> bytes:
+  """Downloads the body of a streamed response after checking its headers
+
+  urllib3 only returns once a whole chunk arrived, so a server that trickles its
+  answer could block a single read far longer than the read timeout. The reads
+  are handed to read1 of the http.client response instead (see iter_packets),
+  which returns after a single read of the socket, urllib3 still decodes the
+  content. So no read blocks longer than the read timeout and the deadline is
+  checked after each.
+
+  Args:
+    response: a response that was requested with stream=True
+    started_at: time.monotonic() timestamp when the request was started
+
+  Raises:
+    FetchAborted: if the response is no html document, too big or too slow
+
+  Returns:
+    the body of the response
+  """
+  check_headers(response.headers.get("Content-Type"),
+                response.headers.get("Content-Length"))
+  chunks = []
+  size = 0
+  for chunk in iter_packets(response):
+    size += len(chunk)
+    check_body(size, started_at)
+    chunks.append(chunk)
+  return b"".join(chunks)
+
+
+def iter_packets(response: requests.Response):
+  """Iterates over the decoded body of a streamed response, every read returns
+      after a single read of the socket
+
+  Args:
+    response: a response that was requested with stream=True
+
+  Returns:
+    iterator over the chunks of the body
+  """
+  http_response = getattr(response.raw, "_fp", None)
+  if hasattr(http_response, "read1"):
+    http_response.read = http_response.read1
+    # read1 removes the chunked transfer encoding itself
+    response.raw.chunked = False
+  return response.iter_content(CHUNK_SIZE)
+
+
+def read_robots_txt(response: requests.Response, started_at: float) -> str:
+  """Downloads the body of a streamed robots.txt response
+
+  Only the first ROBOTS_TXT_MAX_SIZE bytes are read, the rest of the file is
+  ignored like RFC 9309 allows. A line that is cut off is dropped.
+
+  Args:
+    response: a response that was requested with stream=True
+    started_at: time.monotonic() timestamp when the request was started
+
+  Raises:
+    FetchAborted: if the download took longer than ROBOTS_TXT_TIMEOUT
+
+  Returns:
+    the decoded robots.txt
+  """
+  chunks = []
+  size = 0
+  for chunk in iter_packets(response):
+    if time.monotonic() - started_at > ROBOTS_TXT_TIMEOUT:
+      raise FetchAborted("robots.txt download took longer than " +
+                         str(ROBOTS_TXT_TIMEOUT) + " seconds")
+    chunks.append(chunk)
+    size += len(chunk)
+    if size >= ROBOTS_TXT_MAX_SIZE:
+      content = b"".join(chunks)[:ROBOTS_TXT_MAX_SIZE]
+      content = content[:content.rfind(b"\n") + 1]
+      return content.decode("utf-8", errors="replace")
+  # robots.txt files are utf-8 encoded
+  return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+def get_declared_encoding(content_type: str) -> str:
+  """Extracts the charset parameter of a Content-Type header
+
+  Unlike requests, no encoding is assumed for text/html without charset, the
+  document itself usually declares it
+
+  Args:
+    content_type: value of the Content-Type header, None if missing
+
+  Returns:
+    the declared encoding, None if there is none
+  """
+  if content_type is None:
+    return None
+  for parameter in content_type.split(";")[1:]:
+    key, _, value = parameter.partition("=")
+    if key.strip().lower() == "charset" and value.strip(" \"'"):
+      return value.strip(" \"'")
+  return None
+
+
+def decode_html(content: bytes, encoding: str = None) -> str:
+  """Decodes an html document without guessing its encoding from the whole body
+
+  The encoding declared in the headers is used first, then the one declared in
+  a meta tag at the beginning of the document, then UTF-8. Unknown encodings
+  are skipped like browsers do. Documents that are no valid UTF-8 fall back to
+  Windows-1252, which never fails.
+
+  Args:
+    content: the raw html document
+    encoding: the encoding declared in the headers, None if there is none
+
+  Returns:
+    the html document as string
+  """
+  if encoding is not None:
+    try:
+      return str(content, encoding, errors="replace")
+    except LookupError:
+      pass
+  match = META_CHARSET_FORMAT.search(content, 0, 2048)
+  if match is not None:
+    try:
+      return str(content, match.group(1).decode("ascii"), errors="replace")
+    except LookupError:
+      pass
+  try:
+    return str(content, "utf-8")
+  except UnicodeDecodeError:
+    return str(content, "windows-1252", errors="replace")
+
+
+class DNSCache:
+  """Bounded cache of resolved host names, so consecutive connections to the
+      same host don't resolve its name again
+
+  Only the connections of the session pool use it, the least recently used
+  host is dropped once max_hosts hosts are cached.
+
+  Attributes:
+    ttl: seconds a result stays cached
+    max_hosts: max amount of cached hosts
+    cache: ordered dictionary of (host, port) to (timestamp, addresses), the
+            least recently used first
+    lock: lock that guards the cache
+"""
+
+  def __init__(self, ttl: float, max_hosts: int = DNS_CACHE_SIZE):
+    """Inits DNSCache
+
+    Args:
+      ttl: seconds a result stays cached
+      max_hosts: max amount of cached hosts
+    """
+    self.ttl = ttl
+    self.max_hosts = max_hosts
+    self.cache: OrderedDict[tuple[str, int], tuple[float, list]] = OrderedDict()
+    self.lock = threading.Lock()
+
+  def resolve(self, host: str, port: int) -> list[str]:
+    """Resolves a host name, the result is cached for ttl seconds
+
+    Args:
+      host: the host name
+      port: the port of the connection
+
+    Raises:
+      socket.gaierror: if the name can't be resolved
+
+    Returns:
+      list of the ip addresses of the host
+    """
+    key = (host, port)
+    with self.lock:
+      entry = self.cache.get(key)
+      if entry is not None and time.time() - entry[0] < self.ttl:
+        self.cache.move_to_end(key)
+        return entry[1]
+    addresses = list(
+        dict.fromkeys(a[4][0] for a in socket.getaddrinfo(
+            host, port, allowed_gai_family(), socket.SOCK_STREAM)))
+    with self.lock:
+      self.cache[key] = (time.time(), addresses)
+      self.cache.move_to_end(key)
+      while len(self.cache) > self.max_hosts:
+        self.cache.popitem(last=False)
+    return addresses
+
+
+class DNSCachingConnection:
+  """Mixin of the urllib3 connections that resolves their host with a DNS
+      cache, the addresses are tried in order like urllib3 does
+
+  Attributes:
+    dns_cache: the cache the host is resolved with
+"""
+
+  def __init__(self, *args, dns_cache: DNSCache = None, **kwargs):
+    """Inits DNSCachingConnection
+
+    Args:
+      *args: the arguments of the urllib3 connection
+      dns_cache: the cache the host is resolved with
+      **kwargs: the keyword arguments of the urllib3 connection
+    """
+    self.dns_cache = dns_cache
+    super().__init__(*args, **kwargs)
+
+  def _new_conn(self) -> socket.socket:
+    """Opens the socket to the first reachable address of the host
+
+    Raises:
+      NewConnectionError: if the host can't be resolved or reached
+      ConnectTimeoutError: if the last address timed out
+
+    Returns:
+      the connected socket
+    """
+    dns_host = self._dns_host
+    try:
+      addresses = self.dns_cache.resolve(dns_host, self.port)
+    except OSError as e:
+      raise NewConnectionError(
+          self, "Failed to establish a new connection: " + str(e)) from e
+    if not addresses:
+      raise NewConnectionError(
+          self, "Failed to establish a new connection: no address for " +
+          dns_host)
+    error = None
+    try:
+      for address in addresses:
+        # the host itself is still used for the Host header, SNI and the
+        # certificate check
+        self._dns_host = address
+        try:
+          return super()._new_conn()
+        except (ConnectTimeoutError, NewConnectionError) as e:
+          error = e
+    finally:
+      self._dns_host = dns_host
+    raise error
+
+
+class DNSCachingHTTPConnection(DNSCachingConnection, HTTPConnection):
+  """HTTP connection that resolves its host with a DNS cache"""
+
+
+class DNSCachingHTTPSConnection(DNSCachingConnection, HTTPSConnection):
+  """HTTPS connection that resolves its host with a DNS cache"""
+
+
+class DNSCachingPoolManager(PoolManager):
+  """Pool manager whose connection pools resolve their hosts with a DNS cache
+
+  Attributes:
+    dns_cache: the cache shared by all connection pools
+"""
+
+  def __init__(self, dns_cache: DNSCache, **kwargs):
+    """Inits DNSCachingPoolManager
+
+    Args:
+      dns_cache: the cache shared by all connection pools
+      **kwargs: the arguments of the urllib3 pool manager
+    """
+    super().__init__(**kwargs)
+    self.dns_cache = dns_cache
+
+  def _new_pool(self, scheme, host, port, request_context=None):
+    """Creates the connection pool of a host with the DNS caching connections
+
+    Returns:
+      the connection pool
+    """
+    pool = super()._new_pool(scheme, host, port, request_context)
+    if scheme == "https":
+      pool.ConnectionCls = DNSCachingHTTPSConnection
+    else:
+      pool.ConnectionCls = DNSCachingHTTPConnection
+    pool.conn_kw["dns_cache"] = self.dns_cache
+    return pool
+
+
+class DNSCachingAdapter(HTTPAdapter):
+  """Adapter whose connections resolve their hosts with a DNS cache, other
+      name lookups of the process are not affected
+
+  Attributes:
+    dns_cache: the cache shared by all connections of the adapter
+"""
+
+  def __init__(self, dns_cache: DNSCache, **kwargs):
+    """Inits DNSCachingAdapter
+
+    Args:
+      dns_cache: the cache shared by all connections of the adapter
+      **kwargs: the arguments of the requests adapter
+    """
+    # the pool manager is created by the constructor of the adapter
+    self.dns_cache = dns_cache
+    super().__init__(**kwargs)
+
+  def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+    """Creates the pool manager with the DNS cache, see HTTPAdapter
+
+    Returns:
+      None
+    """
+    self._pool_connections = connections
+    self._pool_maxsize = maxsize
+    self._pool_block = block
+    self.poolmanager = DNSCachingPoolManager(self.dns_cache,
+                                             num_pools=connections,
+                                             maxsize=maxsize,
+                                             block=block,
+                                             **pool_kwargs)
+
+
+class SessionPool:
+  """Thread-safe pool of keep-alive connections
+
+  Every thread gets its own requests session, but all sessions share one
+  adapter, so the connections to a host are reused across threads.
+
+  Attributes:
+    adapter: the adapter holding one connection pool per host
+    sessions: thread local storage of the sessions
+"""
+
+  def __init__(self,
+               max_hosts: int = POOL_MAX_HOSTS,
+               max_connections_per_host: int = POOL_MAX_CONNECTIONS_PER_HOST,
+               dns_cache_ttl: float = DNS_CACHE_TTL):
+    """Inits SessionPool
+
+    Args:
+      max_hosts: amount of hosts whose connection pools are kept
+      max_connections_per_host: amount of connections kept alive per host
+      dns_cache_ttl: seconds the connections cache resolved host names, 0 to
+                      resolve them for every connection
+    """
+    if dns_cache_ttl > 0:
+      self.adapter = DNSCachingAdapter(DNSCache(dns_cache_ttl),
+                                       pool_connections=max_hosts,
+                                       pool_maxsize=max_connections_per_host)
+    else:
+      self.adapter = HTTPAdapter(pool_connections=max_hosts,
+                                 pool_maxsize=max_connections_per_host)
+    self.sessions = threading.local()
+
+  def get_session(self) -> requests.Session:
+    """Returns the session of the calling thread
+
+    Returns:
+      a session that uses the shared connection pools
+    """
+    session = getattr(self.sessions, "session", None)
+    if session is None:
+      session = requests.Session()
+      session.mount("http://", self.adapter)
+      session.mount("https://", self.adapter)
+      self.sessions.session = session
+    return session
+
+  def get(self, url: str, **kwargs) -> requests.Response:
+    """Sends a GET request using a pooled connection
+
+    Args:
+      url: the url to request
+      kwargs: the arguments of requests.get
+
+    Returns:
+      the response
+    """
+    return self.get_session().get(url, **kwargs)
+
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+  """Returns the session pool shared by the whole process
+
+  Returns:
+    the shared session pool
+  """
+  global _session_pool
+  with _session_pool_lock:
+    if _session_pool is None:
+      _session_pool = SessionPool()
+  return _session_pool
@@ -0,0 +1,348 @@
+"""Module that contains the frontier, which decides in which order the
+discovered URLs are crawled
+"""
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+
+from src.crawler_bot.config import FRONTIER_BATCH_SIZE, FRONTIER_DEPTH_PENALTY, FRONTIER_HEAD_SIZE
+
+# distance used for urls whose parent page has no relative distances, e.g.
+# because its classification failed
+UNKNOWN_DISTANCE = 2
+
+
+def get_priority(relative_distances: dict, depth: int) -> float:
+  """Calculates the priority of a url from the classification of the page it
+      was found on, urls with lower values are crawled first
+
+  The smallest relative distance of the parent page is used, pages with a
+  relative distance of at most 1 are relevant. Every link between the seed and
+  the url adds FRONTIER_DEPTH_PENALTY.
+
+  Args:
+    relative_distances: dictionary with the relative distances of the parent
+                          page to all categories
+    depth: amount of links between the seed and the url
+
+  Returns:
+    the priority of the url
+  """
+  if relative_distances:
+    distance = min(relative_distances.values())
+  else:
+    distance = UNKNOWN_DISTANCE
+  return distance + FRONTIER_DEPTH_PENALTY * depth
+
+
+class PriorityFrontier:
+  """Thread-safe frontier that hands out the url with the best priority first
+
+  A url that is added while it is already waiting only gets a new heap entry if
+  its priority improved, the old entry is skipped once it reaches the top of the
+  heap.
+
+  Attributes:
+    heap: min-heap of (priority, sequence number, url, is_seed, depth,
+            target), target is None if it is the url itself
+    entries: dictionary of the waiting urls to (priority, sequence number) of
+              their valid heap entry
+    lock: lock that guards heap and entries
+"""
+
+  def __init__(self):
+    """Inits PriorityFrontier"""
+    self.heap = []
+    self.entries: dict[str, tuple] = {}
+    self.lock = threading.Lock()
+    self._sequence = itertools.count()
+
+  def put(self,
+          url: str,
+          is_seed: bool,
+          priority: float,
+          depth: int,
+          target: str = None) -> None:
+    """Adds a url unless it is already waiting with a better priority
+
+    Args:
+      url: the url to add
+      is_seed: is url seed?
+      priority: the priority of the url, lower values are crawled first
+      depth: amount of links between the seed and the url
+      target: the url that is requested, None if it is the url itself
+
+    Returns:
+      None
+    """
+    with self.lock:
+      entry = self.entries.get(url)
+      if entry is not None and entry[0] <= priority:
+        return
+      sequence_number = next(self._sequence)
+      if target == url:
+        target = None
+      heapq.heappush(self.heap,
+                     (priority, sequence_number, url, is_seed, depth, target))
+      self.entries[url] = (priority, sequence_number)
+
+  def get(self) -> (str, bool, int):
+    """Removes the url with the best priority
+
+    Returns:
+      tuple (url, is_seed, depth, target), None if the frontier is empty
+    """
+    with self.lock:
+      while self.heap:
+        _, sequence_number, url, is_seed, depth, target = heapq.heappop(
+            self.heap)
+        # skip entries that were replaced by a better priority
+        entry = self.entries.get(url)
+        if entry is None or entry[1] != sequence_number:
+          continue
+        del self.entries[url]
+        return url, is_seed, depth, target or url
+      return None
+
+  def peek(self) -> str:
+    """Returns the url with the best priority without removing it
+
+    Returns:
+      the url, None if the frontier is empty
+    """
+    with self.lock:
+      while self.heap:
+        _, sequence_number, url, *_ = self.heap[0]
+        entry = self.entries.get(url)
+        if entry is not None and entry[1] == sequence_number:
+          return url
+        # drop entries that were replaced by a better priority
+        heapq.heappop(self.heap)
+      return None
+
+  def __len__(self) -> int:
+    """Returns the amount of waiting urls"""
+    return len(self.entries)
+
+  def empty(self) -> bool:
+    """Checks if no url is waiting
+
+    Returns:
+      bool that shows if the frontier is empty
+    """
+    return len(self.entries) == 0
+
+
+class SQLiteFrontier:
+  """Thread-safe frontier that keeps its urls in an SQLite database on disk and
+      hands out the url with the best priority first
+
+  Only the best urls (the head) are kept in memory, so the memory usage doesn't
+  grow with the amount of urls. Every url in the head also has its row in the
+  database and every row with a priority below head_limit is in the head.
+  Added urls and handed out urls are collected and written to the database in
+  batches.
+
+  Attributes:
+    filename: the database file, it is emptied when the frontier is created
+    connection: the connection to the database
+    head: min-heap of (priority, sequence number, url, is_seed, depth, target)
+            of the best urls, target is None if it is the url itself
+    head_entries: dictionary of the urls in the head to (priority, sequence
+                    number) of their valid heap entry
+    head_limit: priority up to which all urls are in the head
+    inserts: dictionary of the urls that were added since the last write to
+              (priority, sequence number, is_seed, depth, target)
+    deletes: set of the urls that were handed out since the last write
+    head_size: amount of urls that are loaded into the head
+    batch_size: amount of changes that are collected before they are written
+    lock: lock that guards all of the above
+"""
+
+  def __init__(self,
+               filename: str,
+               head_size: int = FRONTIER_HEAD_SIZE,
+               batch_size: int = FRONTIER_BATCH_SIZE):
+    """Inits SQLiteFrontier
+
+    Args:
+      filename: the database file, it is emptied when the frontier is created
+      head_size: amount of urls that are loaded into the head
+      batch_size: amount of changes that are collected before they are written
+    """
+    self.filename = filename
+    if os.path.exists(filename):
+      os.remove(filename)
+    self.connection = sqlite3.connect(filename, check_same_thread=False)
+    # the frontier is rebuilt on every start, so durability is not needed
+    self.connection.execute("PRAGMA journal_mode = OFF")
+    self.connection.execute("PRAGMA synchronous = OFF")
+    self.connection.execute(
+        "CREATE TABLE frontier (url TEXT PRIMARY KEY, priority REAL, "
+        "sequence_number INTEGER, is_seed INTEGER, depth INTEGER, target TEXT)")
+    self.connection.execute(
+        "CREATE INDEX frontier_order ON frontier (priority, sequence_number)")
+    self.head = []
+    self.head_entries: dict[str, tuple] = {}
+    self.head_limit = float("inf")
+    self.inserts: dict[str, tuple] = {}
+    self.deletes = set()
+    self.head_size = head_size
+    self.batch_size = batch_size
+    self.lock = threading.Lock()
+    self._sequence = itertools.count()
+
+  def _write(self) -> None:
+    """Writes the collected changes to the database, lock needs to be held
+
+    Returns:
+      None
+    """
+    with self.connection:
+      # handed out urls are deleted first, they might have been added again
+      self.connection.executemany("DELETE FROM frontier WHERE url = ?",
+                                  ((url,) for url in self.deletes))
+      # a url that is already waiting only gets a better priority
+      self.connection.executemany(
+          "INSERT INTO frontier VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO "
+          "UPDATE SET priority = excluded.priority, sequence_number = "
+          "excluded.sequence_number, is_seed = excluded.is_seed, depth = "
+          "excluded.depth, target = excluded.target WHERE excluded.priority < "
+          "frontier.priority",
+          ((url,) + entry for url, entry in self.inserts.items()))
+    self.inserts.clear()
+    self.deletes.clear()
+
+  def _load_head(self) -> None:
+    """Loads the best urls of the database into the empty head, lock needs to
+        be held
+
+    Returns:
+      None
+    """
+    self._write()
+    rows = self.connection.execute(
+        "SELECT priority, sequence_number, url, is_seed, depth, target FROM "
+        "frontier ORDER BY priority, sequence_number LIMIT ?",
+        (self.head_size,)).fetchall()
+    self.head = [(a[0], a[1], a[2], bool(a[3]), a[4], a[5]) for a in rows]
+    self.head_entries = {a[2]: (a[0], a[1]) for a in rows}
+    if len(rows) < self.head_size:
+      self.head_limit = float("inf")
+    else:
+      self.head_limit = rows[-1][0]
+
+  def _trim_head(self) -> None:
+    """Removes the worst urls from the head once it holds twice as many as
+        head_size, their rows stay in the database, lock needs to be held
+
+    Returns:
+      None
+    """
+    entries = [
+        a for a in self.head
+        if self.head_entries.get(a[2], (None, None))[1] == a[1]
+    ]
+    self.head = heapq.nsmallest(self.head_size, entries)
+    self.head_entries = {a[2]: (a[0], a[1]) for a in self.head}
+    self.head_limit = self.head[-1][0]
+
+  def put(self,
+          url: str,
+          is_seed: bool,
+          priority: float,
+          depth: int,
+          target: str = None) -> None:
+    """Adds a url unless it is already waiting with a better priority
+
+    Args:
+      url: the url to add
+      is_seed: is url seed?
+      priority: the priority of the url, lower values are crawled first
+      depth: amount of links between the seed and the url
+      target: the url that is requested, None if it is the url itself
+
+    Returns:
+      None
+    """
+    with self.lock:
+      entry = self.head_entries.get(url) or self.inserts.get(url)
+      if entry is not None and entry[0] <= priority:
+        return
+      sequence_number = next(self._sequence)
+      if target == url:
+        target = None
+      self.inserts[url] = (priority, sequence_number, is_seed, depth, target)
+      if priority < self.head_limit:
+        heapq.heappush(self.head,
+                       (priority, sequence_number, url, is_seed, depth,
+                        target))
+        self.head_entries[url] = (priority, sequence_number)
+        if len(self.head_entries) > 2 * self.head_size:
+          self._trim_head()
+      if len(self.inserts) >= self.batch_size:
+        self._write()
+
+  def get(self) -> (str, bool, int):
+    """Removes the url with the best priority
+
+    Returns:
+      tuple (url, is_seed, depth, target), None if the frontier is empty
+    """
+    with self.lock:
+      if not self.head_entries:
+        self._load_head()
+      while self.head:
+        _, sequence_number, url, is_seed, depth, target = heapq.heappop(
+            self.head)
+        # skip entries that were replaced by a better priority
+        entry = self.head_entries.get(url)
+        if entry is None or entry[1] != sequence_number:
+          continue
+        del self.head_entries[url]
+        self.inserts.pop(url, None)
+        self.deletes.add(url)
+        if len(self.deletes) >= self.batch_size:
+          self._write()
+        return url, is_seed, depth, target or url
+      return None
+
+  def peek(self) -> str:
+    """Returns the url with the best priority without removing it
+
+    Returns:
+      the url, None if the frontier is empty
+    """
+    with self.lock:
+      if not self.head_entries:
+        self._load_head()
+      while self.head:
+        _, sequence_number, url, *_ = self.head[0]
+        entry = self.head_entries.get(url)
+        if entry is not None and entry[1] == sequence_number:
+          return url
+        # drop entries that were replaced by a better priority
+        heapq.heappop(self.head)
+      return None
+
+  def __len__(self) -> int:
+    """Returns the amount of waiting urls"""
+    with self.lock:
+      self._write()
+      return self.connection.execute(
+          "SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+  def empty(self) -> bool:
+    """Checks if no url is waiting
+
+    Returns:
+      bool that shows if the frontier is empty
+    """
+    with self.lock:
+      # without a head limit every waiting url is in the head, so the database
+      # only needs to be read if urls were left out of the head
+      if not self.head_entries and self.head_limit != float("inf"):
+        self._load_head()
+      return not self.head_entries
@@ -2,6 +2,7 @@
 stopping conditions
 """
 from enum import Enum
+import threading
 
 from src.crawler_bot.config import NUM_EXTRACTOR_THREADS, NUM_RETRIEVER_THREADS
 from src.crawler_bot import custom_logging
@@ -18,28 +19,76 @@ class ThreadState(Enum):
 class GlobalMonitor:
   """Monitors all thread states, all threads need to report to this controller
 
+  Besides counting the thread states, the monitor is where idle threads wait
+  for work. Retrievers wait on retriever_condition and are woken when urls are
+  added or released, extractors wait on extractor_condition and are woken when
+  pages are added. The checks for work may read a database on disk, so they run
+  without the lock. Every notification is counted, a thread only starts
+  waiting if no notification came in while it checked, so it can't miss one.
+  The crawl is finished (quiescent) once every thread waits or is stopped and
+  none of the waiting threads has work, since only running threads can create
+  new work. A shard of
+  a distributed crawl can get work from other shards, so it only finishes when
+  the coordinator calls finish.
+
   Attributes:
+    name: name of this instance for logging
     retrievers_running: amount of retreivers that are running
     retrievers_idle: amount of retrievers that are idle
     retrievers_stopped: amount of retrievers that are stopped
     extractors_running: amount of extractors that are running
     extractors_idle: amount of extractors that are idle
     extractors_stopped: amount of extractors that are stopped
+    num_retrievers: total amount of retrievers that report to the monitor
+    num_extractors: total amount of extractors that report to the monitor
+    lock: lock that guards the counters and is shared by the conditions
+    retriever_condition: condition the idle retrievers wait on
+    extractor_condition: condition the idle extractors wait on
+    work_checks: list of the functions the waiting threads use to check for
+                  work
+    notifications: amount of notifications so far
+    retriever_listeners: functions that are called when retrievers are
+                          notified, for retrievers that can't wait on a
+                          condition
+    finished: bool that shows if the crawl is finished
+    finish_when_quiescent: bool that shows if the crawl finishes once it is
+                            quiescent, otherwise it waits for finish
 """
 
-  def __init__(self, logger: custom_logging.Logger):
+  def __init__(self,
+               logger: custom_logging.Logger,
+               num_retrievers: int = NUM_RETRIEVER_THREADS,
+               num_extractors: int = NUM_EXTRACTOR_THREADS,
+               finish_when_quiescent: bool = True):
     """Inits GlobalMonitor
 
+    Args:
+      logger: instance of the custom logging module
+      num_retrievers: amount of retrievers that report to the monitor
+      num_extractors: amount of extractors that report to the monitor
+      finish_when_quiescent: False if the crawl only finishes by calling
+                              finish
     """
-    self.retrievers_running = NUM_RETRIEVER_THREADS
+    self.name = "Global Monitor"
+    self.num_retrievers = num_retrievers
+    self.num_extractors = num_extractors
+    self.retrievers_running = num_retrievers
     self.retrievers_idle = 0
     self.retrievers_stopped = 0
-    self.extractors_running = NUM_EXTRACTOR_THREADS
+    self.extractors_running = num_extractors
     self.extractors_idle = 0
     self.extractors_stopped = 0
     self.logger = logger
     self.extractor_threads = []
     self.retriever_threads = []
+    self.lock = threading.Lock()
+    self.retriever_condition = threading.Condition(self.lock)
+    self.extractor_condition = threading.Condition(self.lock)
+    self.work_checks = []
+    self.notifications = 0
+    self.retriever_listeners = []
+    self.finished = False
+    self.finish_when_quiescent = finish_when_quiescent
 
     self.logger.log_info("Global Monitor", "initialized")
 
@@ -53,9 +102,10 @@ class GlobalMonitor:
       None
     """
     # only act if retriever was running
-    if previous_state == ThreadState.RUNNING:
-      self.retrievers_running -= 1
-      self.retrievers_idle += 1
+    with self.lock:
+      if previous_state == ThreadState.RUNNING:
+        self.retrievers_running -= 1
+        self.retrievers_idle += 1
 
   def register_extractor_thread(self, extractor_thread) -> None:
     """Registers the actual thread in the monitor
@@ -91,9 +141,10 @@ class GlobalMonitor:
       None
     """
     # only act if retriever was idle
-    if previous_state == ThreadState.IDLE:
-      self.retrievers_running += 1
-      self.retrievers_idle -= 1
+    with self.lock:
+      if previous_state == ThreadState.IDLE:
+        self.retrievers_running += 1
+        self.retrievers_idle -= 1
 
   def retriever_stop(self, previous_state: ThreadState) -> None:
     """Function for retrievers to signal that they have stopped
@@ -105,11 +156,16 @@ class GlobalMonitor:
       None
     """
     # act accordingly to previous state
-    if previous_state == ThreadState.RUNNING:
-      self.retrievers_running -= 1
-    else:  # -> he was idle
-      self.retrievers_idle -= 1
-    self.retrievers_stopped += 1
+    with self.lock:
+      if previous_state == ThreadState.RUNNING:
+        self.retrievers_running -= 1
+      elif previous_state == ThreadState.IDLE:
+        self.retrievers_idle -= 1
+      else:  # -> he was already stopped
+        return
+      self.retrievers_stopped += 1
+      # the waiting threads might be the last ones now
+      self._notify_all()
 
   def retrievers_all_idle_or_stopped(self) -> bool:
     """Checks if all retrievers are idle or stopped
@@ -117,8 +173,9 @@ class GlobalMonitor:
     Returns:
       boolean indicating if all retrievers are idle or stopped
     """
-    return (self.retrievers_stopped +
-            self.retrievers_idle) == NUM_RETRIEVER_THREADS
+    with self.lock:
+      return (self.retrievers_stopped +
+              self.retrievers_idle) == self.num_retrievers
 
   def extractor_idle(self, previous_state: ThreadState) -> None:
     """Function for extractors to signal that they are idle
@@ -130,9 +187,10 @@ class GlobalMonitor:
       None
     """
     # only act if extractor was running
-    if previous_state == ThreadState.RUNNING:
-      self.extractors_running -= 1
-      self.extractors_idle += 1
+    with self.lock:
+      if previous_state == ThreadState.RUNNING:
+        self.extractors_running -= 1
+        self.extractors_idle += 1
 
   def extractor_continue(self, previous_state: ThreadState) -> None:
     """Function for extractors to signal that they are continuing
@@ -144,9 +202,10 @@ class GlobalMonitor:
       None
     """
     # only act if extractor was idle
-    if previous_state == ThreadState.IDLE:
-      self.extractors_running += 1
-      self.extractors_idle -= 1
+    with self.lock:
+      if previous_state == ThreadState.IDLE:
+        self.extractors_running += 1
+        self.extractors_idle -= 1
 
   def extractor_stop(self, previous_state: ThreadState) -> None:
     """Function for extractors to signal that they have stopped
@@ -158,11 +217,16 @@ class GlobalMonitor:
       None
     """
     # act accordingly to previous state
-    if previous_state == ThreadState.RUNNING:
-      self.extractors_running -= 1
-    else:  #-> extractor was idle
-      self.extractors_idle -= 1
-    self.extractors_stopped += 1
+    with self.lock:
+      if previous_state == ThreadState.RUNNING:
+        self.extractors_running -= 1
+      elif previous_state == ThreadState.IDLE:
+        self.extractors_idle -= 1
+      else:  #-> extractor was already stopped
+        return
+      self.extractors_stopped += 1
+      # the waiting threads might be the last ones now
+      self._notify_all()
 
   def extractors_all_idle_or_stopped(self) -> bool:
     """Checks if all extractors are either idle or stopped
@@ -170,8 +234,9 @@ class GlobalMonitor:
     Returns:
       bool that shows if all extractors are idle/stopped
     """
-    return (self.extractors_idle +
-            self.extractors_stopped) == NUM_EXTRACTOR_THREADS
+    with self.lock:
+      return (self.extractors_idle +
+              self.extractors_stopped) == self.num_extractors
 
   def stop_everything(self, reason: str) -> None:
     """Stopps the execution of all threads
@@ -183,7 +248,181 @@ class GlobalMonitor:
       None
     """
     self.logger.log_critical(self.name, "Stopping everything (" + reason + ")")
+    with self.lock:
+      self.finished = True
+      self._notify_all()
     for thread in self.extractor_threads:
       thread.stop_extractor(reason)
     for thread in self.retriever_threads:
       thread.stop_retriever(reason)
+
+  def _notify_all(self) -> None:
+    """Wakes up all waiting threads, lock needs to be held
+
+    Returns:
+      None
+    """
+    self.notifications += 1
+    self.retriever_condition.notify_all()
+    self.extractor_condition.notify_all()
+    for listener in self.retriever_listeners:
+      listener()
+
+  def _all_waiting_or_stopped(self) -> bool:
+    """Checks if every thread waits for work or is stopped, lock needs to be
+        held
+
+    Returns:
+      bool that shows if no thread is running
+    """
+    amount_waiting = len(self.work_checks)
+    return amount_waiting + self.retrievers_stopped + self.extractors_stopped >= (
+        self.num_retrievers + self.num_extractors)
+
+  def is_quiescent(self) -> bool:
+    """Checks if every thread waits or is stopped and no waiting thread has
+        work
+
+    The checks for work run without the lock, the result only counts if no
+    notification came in meanwhile.
+
+    Returns:
+      bool that shows if no thread can create new work
+    """
+    with self.lock:
+      if not self._all_waiting_or_stopped():
+        return False
+      notifications = self.notifications
+      work_checks = list(self.work_checks)
+    if any(has_work() for has_work in work_checks):
+      return False
+    with self.lock:
+      return (self.notifications == notifications and
+              self._all_waiting_or_stopped())
+
+  def finish(self, reason: str) -> None:
+    """Finishes the crawl, the waiting threads stop and the running ones stop
+        once they run out of work
+
+    Args:
+      reason: reason for finishing the crawl
+
+    Returns:
+      None
+    """
+    with self.lock:
+      if self.finished:
+        return
+      self.logger.log_info(self.name, "crawl finished, " + reason)
+      self.finished = True
+      self._notify_all()
+
+  def wait_for_work(self, condition: threading.Condition, has_work) -> bool:
+    """Blocks the calling thread until it has work or the crawl is finished
+
+    Args:
+      condition: the condition of the stage of the thread
+      has_work: function without arguments that checks if the thread has work
+
+    Returns:
+      True if there is work, False if the crawl is finished
+    """
+    with self.lock:
+      self.work_checks.append(has_work)
+    try:
+      while True:
+        with self.lock:
+          if self.finished:
+            return False
+          notifications = self.notifications
+        # has_work may read a database on disk, so it runs without the lock
+        if has_work():
+          return True
+        quiescent = self.finish_when_quiescent and self.is_quiescent()
+        with self.lock:
+          if self.finished:
+            return False
+          if quiescent:
+            self.logger.log_info(self.name,
+                                 "crawl finished, no thread has work left")
+            self.finished = True
+            self._notify_all()
+            return False
+          # work that was added during the checks was notified, check again
+          if self.notifications == notifications:
+            condition.wait()
+    finally:
+      with self.lock:
+        self.work_checks.remove(has_work)
+
+  def wait_for_next_url(self, get_timeout) -> None:
+    """Blocks a retriever until urls are added or released or the timeout
+        passed
+
+    The timeout may need the frontier, so it is calculated without the lock.
+    The retriever only waits if no notification came in meanwhile, so a url
+    that is added or released in between isn't missed.
+
+    Args:
+      get_timeout: function without arguments that returns the seconds until
+                    the next url gets ready, None if unknown
+
+    Returns:
+      None
+    """
+    with self.lock:
+      if self.finished:
+        return
+      notifications = self.notifications
+    timeout = get_timeout()
+    with self.lock:
+      if not self.finished and self.notifications == notifications:
+        self.retriever_condition.wait(timeout)
+
+  def notify_retrievers(self) -> None:
+    """Wakes up the retrievers after urls were added or released
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.notifications += 1
+      self.retriever_condition.notify_all()
+      listeners = list(self.retriever_listeners)
+    for listener in listeners:
+      listener()
+
+  def notify_extractors(self) -> None:
+    """Wakes up an extractor after a page was added
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.notifications += 1
+      self.extractor_condition.notify()
+
+  def add_retriever_listener(self, listener) -> None:
+    """Registers a function that is called whenever the retrievers are
+        notified
+
+    Args:
+      listener: function without arguments, it must not block
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.retriever_listeners.append(listener)
+
+  def remove_retriever_listener(self, listener) -> None:
+    """Unregisters a function that was registered with add_retriever_listener
+
+    Args:
+      listener: the registered function
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.retriever_listeners.remove(listener)
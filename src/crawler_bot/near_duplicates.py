@@ -0,0 +1,180 @@
+"""Module that detects near-duplicate pages by the SimHash of their main text,
+so syndicated copies of a document (tag pages, archives, mirrors, AMP
+versions) don't need to be classified again
+"""
+import hashlib
+import re
+import threading
+
+from src.crawler_bot.config import NEAR_DUPLICATE_MAX_DISTANCE
+from src.crawler_bot.custom_logging import Logger
+
+# amount of consecutive words that are hashed together
+SHINGLE_SIZE = 3
+# texts with fewer words are too short to be compared reliably
+MIN_WORDS = 50
+SIMHASH_BITS = 64
+WORD_FORMAT = re.compile(r"\w+")
+
+
+def get_simhash(text: str) -> int:
+  """Calculates the 64 bit SimHash of a text
+
+  Every shingle of SHINGLE_SIZE words is hashed, every bit of the SimHash is
+  set if the majority of the shingle hashes has it set. Similar texts share
+  most shingles, so their SimHashes differ in only a few bits.
+
+  Args:
+    text: the text, e.g. the main content of a page
+
+  Returns:
+    the SimHash, None if the text has less than MIN_WORDS words
+  """
+  words = WORD_FORMAT.findall(text.lower())
+  if len(words) < MIN_WORDS:
+    return None
+  counts = {}
+  for i in range(len(words) - SHINGLE_SIZE + 1):
+    shingle_hash = int.from_bytes(
+        hashlib.blake2b(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"),
+                        digest_size=8).digest(), "big")
+    counts[shingle_hash] = counts.get(shingle_hash, 0) + 1
+  amount_shingles = sum(counts.values())
+  simhash = 0
+  for bit in range(SIMHASH_BITS):
+    weight = sum(count for shingle_hash, count in counts.items()
+                 if shingle_hash >> bit & 1)
+    if 2 * weight > amount_shingles:
+      simhash |= 1 << bit
+  return simhash
+
+
+def get_hamming_distance(first_hash: int, second_hash: int) -> int:
+  """Returns the amount of bits in which two hashes differ
+
+  Args:
+    first_hash: the first hash
+    second_hash: the second hash
+
+  Returns:
+    the hamming distance
+  """
+  return bin(first_hash ^ second_hash).count("1")
+
+
+class NearDuplicateIndex:
+  """Index of the SimHashes of classified pages with their classification
+
+  The SimHash is split into max_distance + 1 bands. Two hashes that differ in
+  at most max_distance bits have at least one band in common, so only pages
+  that share a band need to be compared.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    max_distance: max hamming distance of near-duplicates
+    band_size: amount of bits per band
+    bands: dictionary of (band number, band value) to the list of entries,
+            an entry is a tuple of SimHash, url and classification
+    entries: list of all entries in the order they were added
+    amount_lookups: amount of pages that were looked up
+    amount_hits: amount of pages that were near-duplicates
+    lock: lock that guards the bands and counters
+"""
+
+  def __init__(self,
+               logger: Logger,
+               max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE):
+    """Inits NearDuplicateIndex
+
+    Args:
+      logger: the custom logging module
+      max_distance: max hamming distance of near-duplicates
+    """
+    self.name = "NearDuplicateIndex"
+    self.logger = logger
+    self.max_distance = max_distance
+    self.band_size = -(-SIMHASH_BITS // (max_distance + 1))
+    self.bands: dict[tuple[int, int], list[tuple[int, str, dict]]] = {}
+    self.entries: list[tuple[int, str, dict]] = []
+    self.amount_lookups = 0
+    self.amount_hits = 0
+    self.lock = threading.Lock()
+    self.logger.log_info(self.name, "initialized")
+
+  def _get_bands(self, simhash: int) -> list[tuple[int, int]]:
+    """Splits a SimHash into its bands
+
+    Args:
+      simhash: the SimHash
+
+    Returns:
+      list of tuples of band number and band value
+    """
+    mask = (1 << self.band_size) - 1
+    return [(band, simhash >> (band * self.band_size) & mask)
+            for band in range(self.max_distance + 1)]
+
+  def find(self, simhash: int) -> tuple[str, dict]:
+    """Looks for a classified near-duplicate of a page
+
+    Args:
+      simhash: the SimHash of the main content of the page
+
+    Returns:
+      tuple of the url and the classification of the closest near-duplicate,
+      None if there is none
+    """
+    best_match = None
+    best_distance = self.max_distance + 1
+    with self.lock:
+      self.amount_lookups += 1
+      for band in self._get_bands(simhash):
+        for other_simhash, url, classification in self.bands.get(band, []):
+          distance = get_hamming_distance(simhash, other_simhash)
+          if distance < best_distance:
+            best_match = (url, classification)
+            best_distance = distance
+      if best_match is not None:
+        self.amount_hits += 1
+    return best_match
+
+  def add(self, simhash: int, url: str, classification: dict) -> None:
+    """Adds a classified page
+
+    Args:
+      simhash: the SimHash of the main content of the page
+      url: url of the page
+      classification: the classification result of the page
+
+    Returns:
+      None
+    """
+    entry = (simhash, url, classification)
+    with self.lock:
+      self.entries.append(entry)
+      for band in self._get_bands(simhash):
+        self.bands.setdefault(band, []).append(entry)
+
+  def get_entries(self, start: int = 0) -> list[tuple[int, str, dict]]:
+    """Returns the entries in the order they were added
+
+    Args:
+      start: index of the first entry to return
+
+    Returns:
+      list of tuples of SimHash, url and classification from start on
+    """
+    with self.lock:
+      return self.entries[start:]
+
+  def get_hit_rate(self) -> float:
+    """Returns the share of the looked up pages that were near-duplicates
+
+    Returns:
+      the hit rate, 0 if nothing was looked up
+    """
+    with self.lock:
+      if self.amount_lookups == 0:
+        return 0
+      return self.amount_hits / self.amount_lookups
@@ -0,0 +1,184 @@
+"""Module that parses fetched pages, every page is parsed once into an lxml tree
+that serves the link extraction, the robots meta tag and the main content
+extraction
+
+The functions don't depend on the classifier, so pages can be parsed in
+separate processes that only send back a small ParsedPage.
+"""
+from lxml import etree
+from lxml.html import HtmlElement, document_fromstring
+import trafilatura
+from trafilatura.settings import use_config
+from trafilatura.utils import load_html
+
+from src.crawler_bot.fetching import decode_html
+
+# xpath of the href attributes of all links
+HREF_XPATH = "//a/@href"
+# xpath of the href attributes of the base elements, the first one counts
+BASE_HREF_XPATH = "//base/@href"
+# xpath of the content attributes of all robots meta tags
+ROBOTS_META_XPATH = "//meta[@name='robots']/@content"
+# specific config for trafilatura
+TRAFILATURA_CONFIG = use_config("src/crawler_bot/custom_trafilatura_config.cfg")
+
+
+class ParsedPage:
+  """Everything the extractor needs from a page besides its classification
+
+  Attributes:
+    hrefs: the stripped href properties of all a elements of the page
+    nofollow: bool that shows if the page has a nofollow robots meta tag
+    main_content: the main content as text, None if it was not extracted or
+                    can't be extracted
+    base_href: the stripped href of the base element, None if there is none
+"""
+
+  def __init__(self,
+               hrefs: list[str],
+               nofollow: bool,
+               main_content: str,
+               base_href: str = None):
+    """Inits ParsedPage
+
+    Args:
+      hrefs: the stripped href properties of all a elements of the page
+      nofollow: bool that shows if the page has a nofollow robots meta tag
+      main_content: the main content as text, None if it was not extracted or
+                      can't be extracted
+      base_href: the stripped href of the base element, None if there is none
+    """
+    self.hrefs = hrefs
+    self.nofollow = nofollow
+    self.main_content = main_content
+    self.base_href = base_href
+
+
+def parse_html(html_document: str) -> HtmlElement:
+  """Parses a document into the same lxml tree trafilatura builds from it, so
+      trafilatura can extract the main content from the tree
+
+  Trafilatura cleans the tree it extracts from, so everything else has to be
+  read from the tree before.
+
+  Args:
+    html_document: the decoded document
+
+  Returns:
+    the tree, None if the document is empty
+  """
+  tree = load_html(html_document)
+  # trafilatura rejects fragments without head and body, their links are
+  # still followed
+  if tree is None and html_document.strip() != "":
+    try:
+      tree = document_fromstring(html_document)
+    except (etree.ParserError, ValueError):
+      return None
+  return tree
+
+
+def get_hrefs(tree: HtmlElement) -> list[str]:
+  """Returns the href attributes of all links of a document
+
+  Args:
+    tree: the parsed document, None for an empty document
+
+  Returns:
+    list of the stripped hrefs in document order
+  """
+  if tree is None:
+    return []
+  return [href.strip() for href in tree.xpath(HREF_XPATH)]
+
+
+def get_base_href(tree: HtmlElement) -> str:
+  """Returns the href of the base element of a document, relative links are
+      resolved against it instead of the url of the document
+
+  Args:
+    tree: the parsed document, None for an empty document
+
+  Returns:
+    the stripped href, None if there is no base element with an href
+  """
+  if tree is None:
+    return None
+  for href in tree.xpath(BASE_HREF_XPATH):
+    if href.strip() != "":
+      return href.strip()
+  return None
+
+
+def get_robots_directives(tree: HtmlElement) -> list[str]:
+  """Returns the directives of the robots meta tags of a document
+
+  https://developers.google.com/search/docs/advanced/robots/robots_meta_tag
+
+  Examples:
+    <meta content="noindex,nofollow" name="robots"/> -> noindex, nofollow
+
+  Args:
+    tree: the parsed document, None for an empty document
+
+  Returns:
+    list of the directives
+  """
+  if tree is None:
+    return []
+  return [
+      directive.strip()
+      for content in tree.xpath(ROBOTS_META_XPATH)
+      for directive in content.split(",")
+  ]
+
+
+def extract_main_content(html) -> str:
+  """Extracts the main content of a document with trafilatura
+
+  Args:
+    html: the document as string or as lxml tree, trafilatura cleans the tree
+            while extracting
+
+  Returns:
+    the main content as text, None if it can't be extracted
+  """
+  return trafilatura.extract(html, config=TRAFILATURA_CONFIG)
+
+
+def parse_page(html_document: str,
+               with_main_content: bool = True) -> ParsedPage:
+  """Parses a page once and extracts links, robots meta tag and main content
+
+  Args:
+    html_document: the decoded document
+    with_main_content: False if the main content is not needed, e.g. since
+                        the classification of the page is cached
+
+  Returns:
+    the parsed page
+  """
+  tree = parse_html(html_document)
+  hrefs = get_hrefs(tree)
+  base_href = get_base_href(tree)
+  nofollow = any(directive in ["nofollow", "none"]
+                 for directive in get_robots_directives(tree))
+  main_content = None
+  # trafilatura changes the tree, so it comes last
+  if with_main_content and tree is not None:
+    main_content = extract_main_content(tree)
+  return ParsedPage(hrefs, nofollow, main_content, base_href)
+
+
+def parse_content(content: bytes, encoding: str) -> ParsedPage:
+  """Decodes and parses a fetched page, this runs in the parser processes
+
+  Args:
+    content: the raw html document
+    encoding: the encoding declared by the response headers, None if there is
+                none
+
+  Returns:
+    the parsed page with its main content
+  """
+  return parse_page(decode_html(content, encoding))
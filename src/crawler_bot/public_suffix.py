@@ -0,0 +1,161 @@
+"""Module that resolves the registrable domain of a host with the public suffix
+list, e.g. www.bbc.co.uk -> bbc.co.uk instead of co.uk
+
+The list is bundled with the crawler, https://publicsuffix.org/list/ has the
+current version. The registrable domain keys the politeness of the crawler and
+the blacklist checks, so the result of every host is cached.
+"""
+from functools import lru_cache
+from ipaddress import ip_address
+import os
+
+# bundled copy of https://publicsuffix.org/list/public_suffix_list.dat, it is
+# found relative to this module since it is loaded on import
+PUBLIC_SUFFIX_LIST_FILE = os.path.join(os.path.dirname(__file__), "..", "..",
+                                       "assets", "public_suffix_list.dat")
+# True to also use the suffixes of the private section, like github.io, which
+# splits the sites of hosting services into separate domains even though they
+# share their servers
+INCLUDE_PRIVATE_SUFFIXES = False
+# comment that starts the private section of the list
+PRIVATE_SECTION_MARKER = "// ===BEGIN PRIVATE DOMAINS==="
+# amount of hosts whose registrable domain is cached
+REGISTRABLE_DOMAIN_CACHE_SIZE = 65536
+
+
+def load_public_suffix_list(filename: str,
+                            include_private: bool) -> tuple[frozenset, ...]:
+  """Loads the rules of the public suffix list
+
+  https://github.com/publicsuffix/list/wiki/Format
+
+  Examples:
+    co.uk -> public suffix co.uk
+    *.ck -> every label below ck is a public suffix, stored as ck
+    !www.ck -> www.ck is no public suffix, even though *.ck matches it
+
+  Args:
+    filename: the public suffix list
+    include_private: True to also load the rules of the private section
+
+  Returns:
+    frozensets of the public suffixes, the parents of the wildcard rules and
+    the exceptions, every rule in its unicode and its punycode form
+  """
+  suffixes = set()
+  wildcard_suffixes = set()
+  exception_suffixes = set()
+  with open(filename, encoding="utf-8") as f:
+    for line in f:
+      line = line.strip()
+      if line == PRIVATE_SECTION_MARKER and not include_private:
+        break
+      if line == "" or line.startswith("//"):
+        continue
+      rule = line.split()[0].lower()
+      if rule.startswith("!"):
+        rules, rule = exception_suffixes, rule[1:]
+      elif rule.startswith("*."):
+        rules, rule = wildcard_suffixes, rule[2:]
+      else:
+        rules = suffixes
+      rules.add(rule)
+      # hosts of the crawled urls are in punycode
+      try:
+        rules.add(rule.encode("idna").decode("ascii"))
+      except UnicodeError:
+        pass
+  return (frozenset(suffixes), frozenset(wildcard_suffixes),
+          frozenset(exception_suffixes))
+
+
+(PUBLIC_SUFFIXES, WILDCARD_SUFFIXES,
+ EXCEPTION_SUFFIXES) = load_public_suffix_list(PUBLIC_SUFFIX_LIST_FILE,
+                                               INCLUDE_PRIVATE_SUFFIXES)
+
+
+def get_host(netloc: str) -> str:
+  """Removes user information and port from a network location
+
+  Args:
+    netloc: the network location of the url
+
+  Returns:
+    the lowercased host without trailing dot and IPv6 brackets
+  """
+  hostport = netloc.rpartition("@")[2].lower()
+  if hostport.startswith("["):
+    return hostport[1:].partition("]")[0]
+  return hostport.partition(":")[0].rstrip(".")
+
+
+def is_ip_address(host: str) -> bool:
+  """Checks if a host is an IPv4 or IPv6 address
+
+  Args:
+    host: the host
+
+  Returns:
+    bool that shows if the host is an ip address
+  """
+  try:
+    ip_address(host)
+  except ValueError:
+    return False
+  return True
+
+
+@lru_cache(maxsize=REGISTRABLE_DOMAIN_CACHE_SIZE)
+def get_registrable_domain(netloc: str) -> str:
+  """Returns the registrable domain of a host, its public suffix plus one label
+      Example: www.bbc.co.uk -> bbc.co.uk
+
+  Hosts without a known public suffix are treated as if their last label is
+  one. Ip addresses are their own registrable domain.
+
+  Args:
+    netloc: the network location of the url
+
+  Returns:
+    the registrable domain, None if the host is a public suffix itself or has
+    a single label, like localhost
+  """
+  host = get_host(netloc)
+  if is_ip_address(host):
+    return host
+  labels = host.split(".")
+  if "" in labels:
+    return None
+  # the first match is the longest one, an exception is always longer than the
+  # wildcard rule it overrides
+  for i in range(len(labels)):
+    suffix = ".".join(labels[i:])
+    if suffix in EXCEPTION_SUFFIXES:
+      i += 1
+      break
+    if suffix in PUBLIC_SUFFIXES:
+      break
+    if i + 1 < len(labels) and ".".join(labels[i + 1:]) in WILDCARD_SUFFIXES:
+      break
+  else:
+    i = len(labels) - 1
+  if i == 0:
+    return None
+  return ".".join(labels[i - 1:])
+
+
+def get_main_domain(netloc: str) -> str:
+  """Returns the main domain of a host, the label in front of its public suffix
+      Example: www.bbc.co.uk -> bbc
+
+  Args:
+    netloc: the network location of the url
+
+  Returns:
+    the main domain, None if the host has no registrable domain or is an ip
+    address
+  """
+  domain = get_registrable_domain(netloc)
+  if domain is None or is_ip_address(domain):
+    return None
+  return domain.partition(".")[0]
@@ -1,10 +1,17 @@
 """This module contains all classes to retrieve websites
 """
-from urllib3.exceptions import MaxRetryError, NewConnectionError
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import time
-import requests
+import traceback
+import aiohttp
 
-from src.crawler_bot import config, custom_logging, monitoring, storage, tools
+from src.crawler_bot import config, custom_logging, fetching, monitoring, scheduling, storage
+from src.crawler_bot.url_record import URLRecord
+
+# errors of a request of the async retriever that are caused by the network or
+# the server, see fetching.NETWORK_ERRORS
+ASYNC_NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
 
 
 class Retriever:
@@ -15,7 +22,7 @@ class Retriever:
     name: name of this specific instance of extractor for logging
     user_agent: the custom user-agent of the retriever
     state: describes the state of the thread (running, stopped, idle)
-    url_queue: instance of the url queue
+    scheduler: the scheduler that hands out urls whose domain is ready
     headers: the custom headers that will be sent with every request
     logger: instance of the logging module
     unprocessed_html_database: instance of the unprocessed html database
@@ -24,20 +31,24 @@ class Retriever:
     robots_txt_database: the database that contains timestamps of requests to
                           the domains
     monitor: the global monitor to check stop requirements
+    session_pool: the pool of keep-alive connections used for the requests
+    http_cache: cache of pages of previous runs, None if not used
 """
 
   def __init__(self, id_number: int, logger: custom_logging.Logger,
-               url_queue: storage.URLQueue, crawled_urls: storage.CrawledURLs,
+               scheduler: scheduling.PolitenessScheduler,
+               crawled_urls: storage.CrawledURLs,
                unprocessed_html_database: storage.UnprocessedHTMLDatabase,
                domain_timers: storage.DomainTimers,
                robots_txt_database: storage.RobotsTXTDatabase,
-               monitor: monitoring.GlobalMonitor):
+               monitor: monitoring.GlobalMonitor,
+               http_cache: storage.HTTPCache = None):
     """Inits Retriever
 
         Args:
           id_number: id of the retriever
           logger: the custom logging module
-          url_queue: the url queue that contains the urls to crawl
+          scheduler: the scheduler that hands out the urls to crawl
           crawled_urls: the database that contains the list of crawled urls
           unprocessed_html_database: the database that contains the unprocessed
                                       crawled web pages
@@ -45,12 +56,13 @@ class Retriever:
                           the domains
           robots_txt_database: database with entries for the robots.txt files
           monitor: the global monitor to check stop requirements
+          http_cache: cache of pages of previous runs, None if not used
     """
     self.id_number = id_number
     self.name = "Retriever#" + str(self.id_number)
     self.user_agent = config.CUSTOM_USER_AGENT
     self.state = monitoring.ThreadState.RUNNING
-    self.url_queue = url_queue
+    self.scheduler = scheduler
     self.headers = {"User-Agent": config.CUSTOM_USER_AGENT}
     self.logger = logger
     self.unprocessed_html_database = unprocessed_html_database
@@ -58,59 +70,161 @@ class Retriever:
     self.domain_timers = domain_timers
     self.robots_txt_database = robots_txt_database
     self.monitor = monitor
+    self.http_cache = http_cache
+    self.session_pool = fetching.get_session_pool()
 
     self.logger.log_info(self.name, "initialized")
 
+  def fetch(self,
+            url_record: URLRecord,
+            conditional: bool = True) -> (bytes, str):
+    """Requests the given url if the robots.txt allows it
+
+    Args:
+      url_record: record of the url to request
+      conditional: False to request the url without the validators of the
+                    http cache
+
+    Returns:
+      tuple of the raw html document, the encoding declared by the headers and
+      the url the document was received from, None if the url can't or must not
+      be retrieved
+    """
+    url = url_record.url
+    # ask the server if the page changed since it was cached
+    headers = self.headers
+    if self.http_cache is not None and conditional:
+      headers = {**self.headers, **self.http_cache.get_conditional_headers(url)}
+
+    try:
+      # check if request is allowed by robots.txt
+      if not self.robots_txt_database.can_fetch(url_record):
+        if self.robots_txt_database.is_unreachable(url_record):
+          # the host disallows everything until its robots.txt can be fetched,
+          # so the url is retried later
+          self.scheduler.record_failure(url_record, "robots.txt unreachable")
+          return None
+        self.logger.log_debug(self.name, "robots txt forbids access to " + url)
+        return None
+
+      # make request, the body is streamed so documents that are no html or
+      # too big are dropped before they are downloaded completely
+      started_at = time.monotonic()
+      # the url is requested as it was discovered, the canonical form may
+      # differ in parts the server routes on
+      with self.session_pool.get(url_record.target,
+                                 headers=headers,
+                                 timeout=5,
+                                 stream=True) as x:
+        # save timestamp of request
+        self.domain_timers.set_timer(url_record.domain)
+        # overloaded or throttling servers get more time before the retry
+        if x.status_code in scheduling.THROTTLING_STATUS_CODES:
+          self.scheduler.record_failure(
+              url_record, "status code " + str(x.status_code))
+          return None
+        self.scheduler.record_success(url_record,
+                                      time.monotonic() - started_at)
+        if x.status_code == 304 and self.http_cache is not None and conditional:
+          self.logger.log_debug(self.name,
+                                "not modified, using cache for " + url)
+          result = self.http_cache.load_body(url)
+          if result is not None:
+            return result + (url_record.target,)
+        else:
+          content = fetching.read_body(x, started_at)
+          encoding = fetching.get_declared_encoding(
+              x.headers.get("Content-Type"))
+          if x.status_code == 200 and self.http_cache is not None:
+            self.http_cache.store(url, content, encoding,
+                                  x.headers.get("ETag"),
+                                  x.headers.get("Last-Modified"))
+          return content, encoding, x.url
+    except fetching.FetchAborted as e:
+      self.logger.log_debug(self.name,
+                            "aborted download of " + url + " (" + str(e) + ")")
+      return None
+    except fetching.NETWORK_ERRORS as e:
+      self.logger.log_error(
+          self.name,
+          type(e).__name__ + " when crawling " + url + " (" + str(e) + ")")
+      self.scheduler.record_failure(url_record, type(e).__name__)
+      return None
+    except Exception:
+      # a bug of the crawler says nothing about the health of the domain
+      self.logger.log_error(
+          self.name,
+          "unexpected error when crawling " + url + "\n" +
+          traceback.format_exc())
+      return None
+
+    # the cached body of the 304 is lost, so the validators are dropped and the
+    # whole page is requested again
+    self.logger.log_debug(self.name, "cached body lost, refetching " + url)
+    self.http_cache.remove(url)
+    return self.fetch(url_record, conditional=False)
+
   def retrieve(self) -> None:
-    """Retrieves one URL and processes it
+    """Retrieves one URL whose domain is ready and processes it
 
     Returns:
       None
     """
-    # get next url
-    url, is_seed = self.url_queue.get_url()
+    # get next url of a domain that may be requested right now
+    url_record, is_seed = self.scheduler.get_url()
 
-    self.logger.log_info(self.name, "Starting  " + url)
+    if url_record is None:
+      # no domain is ready, wait for the next one, added or released urls
+      # wake the retriever up earlier
+      self.monitor.wait_for_next_url(self.scheduler.time_until_next_url)
+      return
 
-    # add to list of crawled urls
-    self.crawled_urls.add_crawled_url(url)
+    self.logger.log_info(self.name, "Starting  " + url_record.url)
 
-    # check if request is allowed by robots.txt
-    if not self.robots_txt_database.can_fetch(url):
-      self.logger.log_debug(self.name, "robots txt forbids access to " + url)
-      return
+    # add to list of crawled urls, retries are already in it
+    if not self.scheduler.is_retry(url_record):
+      # the url was found again while it waited in the scheduler
+      if self.crawled_urls.is_crawled(url_record):
+        self.scheduler.release(
+            url_record, self.robots_txt_database.get_crawl_delay(url_record))
+        self.monitor.notify_retrievers()
+        return
+      self.crawled_urls.add_crawled_url(url_record)
 
-    # make request
+    crawl_delay = config.DEFAULT_CRAWL_DELAY
+    result = None
     try:
-      # check if we need to wait first
-      domain = tools.extract_main_domain_plus_tld(url)
-      crawl_delay = self.robots_txt_database.get_crawl_delay(url)
-      time_to_wait = self.domain_timers.time_until_next_request(
-          domain, crawl_delay)
-      if time_to_wait > 0:
-        self.logger.log_debug(
-            self.name, "sleeping for " + str(time_to_wait) +
-            " seconds for domain " + domain)
-        time.sleep(time_to_wait)
-      x = requests.get(url, headers=self.headers, timeout=5)
-      # save timestamp of request
-      self.domain_timers.set_timer(domain)
-    except NewConnectionError:
-      self.logger.log_error(self.name,
-                            "NewConnectionError when crawling " + url)
-      return
-    except MaxRetryError:
-      self.logger.log_error(self.name, "MaxRetryError when crawling " + url)
-      return
-    except ConnectionError:
-      self.logger.log_error(self.name, "ConnectionError when crawling " + url)
-      return
-    except:
-      self.logger.log_error(self.name, "SOME error when crawling " + url)
-      return
+      crawl_delay = self.robots_txt_database.get_crawl_delay(url_record)
+      result = self.fetch(url_record)
+      # add url and the undecoded html to unprocessed html database, before
+      # the url is released, so checkpoints always see it as pending
+      if result is not None:
+        content, encoding, base_url = result
+        self.unprocessed_html_database.add_entry(url_record.url, is_seed,
+                                                 content, encoding, base_url)
+    except Exception:
+      # the url is lost, but the retriever keeps running
+      self.logger.log_error(
+          self.name, "unexpected error when retrieving " + url_record.url +
+          "\n" + traceback.format_exc())
+      result = None
+    finally:
+      # the domain gets ready again once the crawl delay has passed
+      self.scheduler.release(url_record, crawl_delay)
+      self.monitor.notify_retrievers()
+
+    if result is not None:
+      self.monitor.notify_extractors()
+
+  def has_work(self) -> bool:
+    """Checks if the retriever has work, reaching the crawl limit counts as
+        work since the retriever needs to stop
 
-    # add url and html to unprocessed html database
-    self.unprocessed_html_database.add_entry(url, is_seed, x.text)
+    Returns:
+      bool that shows if the retriever has work
+    """
+    return self.crawled_urls.crawl_limit_reached(
+    ) or not self.scheduler.is_empty()
 
   def start_retriever(self) -> None:
     """starts the retriever
@@ -127,24 +241,20 @@ class Retriever:
         self.stop_retriever("Crawl limit reached")
         continue
 
-      # 2. url queue empty + all extractors stopped/idle
-      # + all retrievers stopped/idle + unprocessed htmls is empty
-      # -> stop retriever
-      if self.url_queue.is_empty() and self.unprocessed_html_database.is_empty(
-      ) and self.monitor.retrievers_all_idle_or_stopped(
-      ) and self.monitor.extractors_all_idle_or_stopped():
-        self.stop_retriever(
-            "url queue empty, html queue empty and no reciever or extractor running"
-        )
-        continue
-
-      # 3. url queue is empty -> idle retriever
-      if self.url_queue.is_empty():
+      # 2. url queue is empty -> idle retriever until the extractors add
+      # urls, stop it once no thread has work left
+      if not self.has_work():
         self.idle_retriever("url queue empty")
-        time.sleep(0.1)
+        if not self.monitor.wait_for_work(self.monitor.retriever_condition,
+                                          self.has_work):
+          self.stop_retriever(
+              "url queue empty, html queue empty and no reciever or extractor running"
+          )
         continue
-      else:
-        self.continue_retriever()
+      self.continue_retriever()
+
+      # 3. html buffer full -> wait until the extractors caught up
+      self.unprocessed_html_database.wait_until_not_full()
 
       # retriever is supposed to run, retrieve one url
       self.retrieve()
@@ -187,4 +297,414 @@ class Retriever:
     """
     self.logger.log_info(self.name, "stopping retriever (" + message + ")")
     self.monitor.retriever_stop(self.state)
-    self.state = monitoring.ThreadState.STOPPED
\ No newline at end of file
+    self.state = monitoring.ThreadState.STOPPED
+
+
+class AsyncRetriever:
+  """The class to retrieve websites concurrently from a single asyncio event
+      loop instead of one blocking request per thread
+
+  Attributes:
+    id_number: id of this specific instance of retriever
+    name: name of this specific instance of retriever for logging
+    user_agent: the custom user-agent of the retriever
+    state: describes the state of the thread (running, stopped, idle)
+    scheduler: the scheduler that hands out urls whose domain is ready
+    headers: the custom headers that will be sent with every request
+    logger: instance of the logging module
+    unprocessed_html_database: instance of the unprocessed html database
+    crawled_urls: instance of the list of crawled urls
+    domain_timers: database of timers of requests to each domain
+    robots_txt_database: the database that contains the robots.txt files
+    monitor: the global monitor to check stop requirements
+    http_cache: cache of pages of previous runs, None if not used
+    max_concurrent_requests: max amount of requests that are in flight at
+                              the same time
+    tasks: set of the currently running request tasks
+    wake_up: asyncio event that is set when urls are added or released
+    executor: thread pool that runs the blocking calls while the event loop
+              runs, None otherwise
+"""
+
+  def __init__(self, id_number: int, logger: custom_logging.Logger,
+               scheduler: scheduling.PolitenessScheduler,
+               crawled_urls: storage.CrawledURLs,
+               unprocessed_html_database: storage.UnprocessedHTMLDatabase,
+               domain_timers: storage.DomainTimers,
+               robots_txt_database: storage.RobotsTXTDatabase,
+               monitor: monitoring.GlobalMonitor,
+               http_cache: storage.HTTPCache = None):
+    """Inits AsyncRetriever
+
+        Args:
+          id_number: id of the retriever
+          logger: the custom logging module
+          scheduler: the scheduler that hands out the urls to crawl
+          crawled_urls: the database that contains the list of crawled urls
+          unprocessed_html_database: the database that contains the unprocessed
+                                      crawled web pages
+          domain_timers: the database that contains timestamps of requests to
+                          the domains
+          robots_txt_database: database with entries for the robots.txt files
+          monitor: the global monitor to check stop requirements
+          http_cache: cache of pages of previous runs, None if not used
+    """
+    self.id_number = id_number
+    self.name = "AsyncRetriever#" + str(self.id_number)
+    self.user_agent = config.CUSTOM_USER_AGENT
+    self.state = monitoring.ThreadState.RUNNING
+    self.scheduler = scheduler
+    self.headers = {"User-Agent": config.CUSTOM_USER_AGENT}
+    self.logger = logger
+    self.unprocessed_html_database = unprocessed_html_database
+    self.crawled_urls = crawled_urls
+    self.domain_timers = domain_timers
+    self.robots_txt_database = robots_txt_database
+    self.monitor = monitor
+    self.http_cache = http_cache
+    self.max_concurrent_requests = config.ASYNC_MAX_CONCURRENT_REQUESTS
+    self.tasks = set()
+    self.wake_up = None
+    self.executor = None
+
+    self.logger.log_info(self.name, "initialized")
+
+  async def run_blocking(self, function, *args):
+    """Runs a blocking call in the executor of the retriever, so the event loop
+        keeps serving the requests in flight
+
+    Args:
+      function: the blocking function
+      *args: the arguments of the function
+
+    Returns:
+      the result of the function
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        self.executor, function, *args)
+
+  async def fetch(self,
+                  session: aiohttp.ClientSession,
+                  url_record: URLRecord,
+                  conditional: bool = True) -> (bytes, str):
+    """Requests the given url if the robots.txt allows it
+
+    Args:
+      session: the aiohttp session used for the request
+      url_record: record of the url to request
+      conditional: False to request the url without the validators of the
+                    http cache
+
+    Returns:
+      tuple of the raw html document, the encoding declared by the headers and
+      the url the document was received from, None if the url can't or must not
+      be retrieved
+    """
+    url = url_record.url
+    # ask the server if the page changed since it was cached, the index of the
+    # cache is guarded by a lock
+    headers = self.headers
+    if self.http_cache is not None and conditional:
+      headers = {
+          **self.headers, **await self.run_blocking(
+              self.http_cache.get_conditional_headers, url)
+      }
+
+    try:
+      # robots.txt lookups may need a blocking request
+      if not await self.run_blocking(self.robots_txt_database.can_fetch,
+                                     url_record):
+        if self.robots_txt_database.is_unreachable(url_record):
+          # the host disallows everything until its robots.txt can be fetched,
+          # so the url is retried later
+          await self.run_blocking(self.scheduler.record_failure, url_record,
+                                  "robots.txt unreachable")
+          return None
+        self.logger.log_debug(self.name, "robots txt forbids access to " + url)
+        return None
+
+      # the body is streamed so documents that are no html or too big are
+      # dropped before they are downloaded completely
+      started_at = time.monotonic()
+      # the url is requested as it was discovered, the canonical form may
+      # differ in parts the server routes on
+      async with session.get(url_record.target, headers=headers) as response:
+        # save timestamp of request
+        self.domain_timers.set_timer(url_record.domain)
+        # overloaded or throttling servers get more time before the retry
+        if response.status in scheduling.THROTTLING_STATUS_CODES:
+          await self.run_blocking(self.scheduler.record_failure, url_record,
+                                  "status code " + str(response.status))
+          return None
+        self.scheduler.record_success(url_record,
+                                      time.monotonic() - started_at)
+        # the files of the http cache are read and written in the executor
+        if (response.status == 304 and self.http_cache is not None and
+            conditional):
+          self.logger.log_debug(self.name,
+                                "not modified, using cache for " + url)
+          result = await self.run_blocking(self.http_cache.load_body, url)
+          if result is not None:
+            return result + (url_record.target,)
+        else:
+          fetching.check_headers(response.headers.get("Content-Type"),
+                                 response.headers.get("Content-Length"))
+          chunks = []
+          size = 0
+          async for chunk in response.content.iter_chunked(
+              fetching.CHUNK_SIZE):
+            size += len(chunk)
+            fetching.check_body(size, started_at)
+            chunks.append(chunk)
+          content = b"".join(chunks)
+          encoding = response.charset
+          if response.status == 200 and self.http_cache is not None:
+            await self.run_blocking(self.http_cache.store, url, content,
+                                    encoding, response.headers.get("ETag"),
+                                    response.headers.get("Last-Modified"))
+          return content, encoding, str(response.url)
+    except fetching.FetchAborted as e:
+      self.logger.log_debug(self.name,
+                            "aborted download of " + url + " (" + str(e) + ")")
+      return None
+    except ASYNC_NETWORK_ERRORS as e:
+      self.logger.log_error(
+          self.name,
+          type(e).__name__ + " when crawling " + url + " (" + str(e) + ")")
+      await self.run_blocking(self.scheduler.record_failure, url_record,
+                              type(e).__name__)
+      return None
+    except Exception:
+      # a bug of the crawler says nothing about the health of the domain
+      self.logger.log_error(
+          self.name,
+          "unexpected error when crawling " + url + "\n" +
+          traceback.format_exc())
+      return None
+
+    # the cached body of the 304 is lost, so the validators are dropped and the
+    # whole page is requested again
+    self.logger.log_debug(self.name, "cached body lost, refetching " + url)
+    await self.run_blocking(self.http_cache.remove, url)
+    return await self.fetch(session, url_record, conditional=False)
+
+  async def retrieve(self, session: aiohttp.ClientSession,
+                     url_record: URLRecord, is_seed: bool) -> None:
+    """Retrieves one URL that was handed out by the scheduler and processes it
+
+    Args:
+      session: the aiohttp session used for the request
+      url_record: record of the url to retrieve
+      is_seed: is url seed?
+
+    Returns:
+      None
+    """
+    self.logger.log_info(self.name, "Starting  " + url_record.url)
+
+    crawl_delay = config.DEFAULT_CRAWL_DELAY
+    result = None
+    try:
+      crawl_delay = await self.run_blocking(
+          self.robots_txt_database.get_crawl_delay, url_record)
+      result = await self.fetch(session, url_record)
+      # add url and the undecoded html to unprocessed html database, before
+      # the url is released, so checkpoints always see it as pending
+      if result is not None:
+        content, encoding, base_url = result
+        await self.run_blocking(self.unprocessed_html_database.add_entry,
+                                url_record.url, is_seed, content, encoding,
+                                base_url)
+    except Exception:
+      self.logger.log_error(
+          self.name, "unexpected error when retrieving " + url_record.url +
+          "\n" + traceback.format_exc())
+      result = None
+    finally:
+      # the domain gets ready again once the crawl delay has passed
+      await self.run_blocking(self.scheduler.release, url_record, crawl_delay)
+      self.monitor.notify_retrievers()
+
+    if result is not None:
+      self.monitor.notify_extractors()
+
+  def claim_url(self, url_record: URLRecord) -> bool:
+    """Adds a handed out url to the list of crawled urls, a url that was found
+        again while it waited in the scheduler is given back instead
+
+    Args:
+      url_record: record of the handed out url
+
+    Returns:
+      bool that shows if the url should be retrieved
+    """
+    # retries are already in the list of crawled urls
+    if self.scheduler.is_retry(url_record):
+      return True
+    if self.crawled_urls.is_crawled(url_record):
+      self.scheduler.release(
+          url_record, self.robots_txt_database.get_crawl_delay(url_record))
+      return False
+    self.crawled_urls.add_crawled_url(url_record)
+    return True
+
+  def has_work(self) -> bool:
+    """Checks if the retriever has work, reaching the crawl limit counts as
+        work since the retriever needs to stop
+
+    Returns:
+      bool that shows if the retriever has work
+    """
+    return self.crawled_urls.crawl_limit_reached(
+    ) or not self.scheduler.is_empty()
+
+  async def wait_for_event(self, timeout: float = None) -> None:
+    """Waits until a request finishes, urls are added or released or the
+        timeout passed
+
+    Args:
+      timeout: max amount of seconds to wait, None to wait without limit
+
+    Returns:
+      None
+    """
+    waiter = asyncio.create_task(self.wake_up.wait())
+    await asyncio.wait(self.tasks | {waiter},
+                       timeout=timeout,
+                       return_when=asyncio.FIRST_COMPLETED)
+    waiter.cancel()
+
+  async def run(self) -> None:
+    """Keeps up to max_concurrent_requests requests in flight until the
+        retriever is stopped
+
+    Returns:
+      None
+    """
+    connector = aiohttp.TCPConnector(
+        limit=self.max_concurrent_requests,
+        limit_per_host=config.POOL_MAX_CONNECTIONS_PER_HOST,
+        ttl_dns_cache=config.DNS_CACHE_TTL or None,
+        use_dns_cache=config.DNS_CACHE_TTL > 0)
+    # total covers the whole download, sock_read every single read
+    timeout = aiohttp.ClientTimeout(total=config.FETCH_DEADLINE, sock_read=5)
+    # the blocking calls get a pool of their own, so they neither stall the
+    # event loop nor queue behind other users of the default executor
+    self.executor = ThreadPoolExecutor(config.ASYNC_EXECUTOR_WORKERS,
+                                       thread_name_prefix=self.name)
+    loop = asyncio.get_running_loop()
+    # the monitor notifies from other threads, so the event is set by the loop
+    self.wake_up = asyncio.Event()
+    listener = lambda: loop.call_soon_threadsafe(self.wake_up.set)
+    self.monitor.add_retriever_listener(listener)
+    try:
+      async with aiohttp.ClientSession(connector=connector,
+                                       timeout=timeout) as session:
+        while self.state != monitoring.ThreadState.STOPPED:
+          # cleared before the checks, so a later notification is not lost
+          self.wake_up.clear()
+
+          # check if retriever state needs to be changed
+
+          # 1. crawl limit reached -> stop retriever once all requests are done
+          if self.crawled_urls.crawl_limit_reached():
+            if self.tasks:
+              await asyncio.wait(self.tasks)
+            self.stop_retriever("Crawl limit reached")
+            continue
+
+          # 2. url queue is empty -> wait for running requests, without any the
+          # retriever idles until the extractors add urls and stops once no
+          # thread has work left
+          if await self.run_blocking(self.scheduler.is_empty):
+            if self.tasks:
+              await self.wait_for_event()
+            else:
+              self.idle_retriever("url queue empty")
+              if not await self.run_blocking(self.monitor.wait_for_work,
+                                             self.monitor.retriever_condition,
+                                             self.has_work):
+                self.stop_retriever(
+                    "url queue empty, html queue empty and no reciever or extractor running"
+                )
+            continue
+          else:
+            self.continue_retriever()
+
+          # 3. too many requests in flight -> wait for one to finish
+          if len(self.tasks) >= self.max_concurrent_requests:
+            await asyncio.wait(self.tasks, return_when=asyncio.FIRST_COMPLETED)
+            continue
+
+          # 4. html buffer full -> wait until the extractors caught up, the
+          # requests in flight may still add their pages
+          if self.unprocessed_html_database.is_full():
+            await self.run_blocking(
+                self.unprocessed_html_database.wait_until_not_full)
+            continue
+
+          # retriever is supposed to run, start retrieving one url of a domain
+          # that is ready, otherwise wait for the next domain or a finished
+          # request which might free one
+          url_record, is_seed = await self.run_blocking(self.scheduler.get_url)
+          if url_record is None:
+            await self.wait_for_event(await self.run_blocking(
+                self.scheduler.time_until_next_url))
+            continue
+          if not await self.run_blocking(self.claim_url, url_record):
+            continue
+          task = asyncio.create_task(
+              self.retrieve(session, url_record, is_seed))
+          self.tasks.add(task)
+          task.add_done_callback(self.tasks.discard)
+    finally:
+      self.monitor.remove_retriever_listener(listener)
+      self.executor.shutdown()
+      self.executor = None
+
+    self.logger.log_info(self.name, "retriever is stopped")
+
+  def start_retriever(self) -> None:
+    """starts the retriever by running its event loop in the calling thread
+
+    Returns:
+      None
+    """
+    asyncio.run(self.run())
+
+  def continue_retriever(self) -> None:
+    """Puts retriever into running
+
+    Returns:
+      None
+    """
+    self.logger.log_debug(self.name, "putting retriever into running")
+    self.monitor.retriever_continue(self.state)
+    self.state = monitoring.ThreadState.RUNNING
+
+  def idle_retriever(self, message: str) -> None:
+    """Puts the retriever into idle
+
+    Arg:
+      message: string why the retriever is put into idle
+
+    Returns:
+      None
+    """
+    self.logger.log_debug(self.name,
+                          "putting retriever into idle (" + message + ")")
+    self.monitor.retriever_idle(self.state)
+    self.state = monitoring.ThreadState.IDLE
+
+  def stop_retriever(self, message: str) -> None:
+    """Stops the execution of the retriever
+
+    Arg:
+      message: string why the retriever is stopped
+
+    Returns:
+      None
+    """
+    self.logger.log_info(self.name, "stopping retriever (" + message + ")")
+    self.monitor.retriever_stop(self.state)
+    self.state = monitoring.ThreadState.STOPPED
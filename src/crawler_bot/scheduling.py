@@ -0,0 +1,719 @@
+"""Module that decides which URL may be requested next without violating the
+crawl delay of its domain
+"""
+from collections import deque
+import heapq
+import itertools
+import json
+import threading
+import time
+
+from src.crawler_bot.config import CIRCUIT_BREAKER_COOLDOWN, CIRCUIT_BREAKER_MAX_OPENINGS, CIRCUIT_BREAKER_THRESHOLD, DEFAULT_CRAWL_DELAY, DOMAIN_FETCH_BUDGET, DOMAIN_MAX_CONCURRENCY, DOMAIN_MAX_DELAY_FACTOR, DOMAIN_MIN_YIELD, DOMAIN_SLOW_RESPONSE, DOMAIN_YIELD_MIN_PAGES, MAX_ACTIVE_HOSTS, MAX_RETRIES, SCHEDULER_BUFFER_SIZE, SCHEDULER_MAX_BUFFER_SIZE, SCHEDULER_MAX_DOMAIN_QUEUE
+from src.crawler_bot.custom_logging import Logger
+from src.crawler_bot import storage
+from src.crawler_bot.url_record import URLRecord, get_url_record
+
+# status codes that show the server is overloaded or throttles the crawler
+THROTTLING_STATUS_CODES = [429, 500, 502, 503, 504]
+# successful fast responses needed before one more parallel request is allowed
+CONCURRENCY_INCREASE_AFTER = 10
+# amount the delay factor shrinks by after every fast response
+DELAY_FACTOR_DECREASE = 0.25
+
+
+class DomainHealth:
+  """Keeps track of how a domain responds and adapts the politeness towards it
+
+  The delay factor and the amount of parallel requests follow AIMD: a slow
+  response or a failure doubles the delay and halves the parallel requests, a
+  fast response shrinks the delay by a small step and after some of them one
+  more parallel request is allowed. Since every failure doubles the delay, the
+  retries of a failing domain back off exponentially. Too many failures in a
+  row open the circuit breaker, the urls of the domain are parked until the
+  cooldown passed. After that one request probes the domain (half open), a
+  success closes the breaker, a failure opens it again with twice the cooldown.
+  Responses of requests that were in flight when the breaker opened are part of
+  that opening and don't change the health, only the probe decides.
+
+  Attributes:
+    delay_factor: factor the crawl delay of the domain is multiplied with
+    max_in_flight: amount of requests that may run at the same time
+    successes: fast responses since the last change of max_in_flight
+    consecutive_failures: failures since the last success or opening
+    openings: amount of openings of the circuit breaker in a row
+    open_until: timestamp until which the circuit breaker is open, 0 if it is
+                  closed
+    probe_url: the url that probes the half open breaker, None if there is no
+                probe in flight
+"""
+
+  def __init__(self):
+    """Inits DomainHealth"""
+    self.delay_factor = 1
+    self.max_in_flight = 1
+    self.successes = 0
+    self.consecutive_failures = 0
+    self.openings = 0
+    self.open_until = 0
+    self.probe_url = None
+
+  def _back_off(self) -> None:
+    """Multiplicative decrease of the request rate
+
+    Returns:
+      None
+    """
+    self.delay_factor = min(self.delay_factor * 2, DOMAIN_MAX_DELAY_FACTOR)
+    self.max_in_flight = max(self.max_in_flight // 2, 1)
+    self.successes = 0
+
+  def record_success(self, url: str, latency: float) -> None:
+    """Updates the health after a response that is no failure
+
+    Args:
+      url: the url whose request succeeded
+      latency: seconds until the headers of the response arrived
+
+    Returns:
+      None
+    """
+    # only the probe closes the breaker, requests that were in flight when it
+    # opened say nothing about the domain after the cooldown
+    if self.open_until > 0 and url != self.probe_url:
+      return
+    self.consecutive_failures = 0
+    self.openings = 0
+    self.open_until = 0
+    self.probe_url = None
+    if latency > DOMAIN_SLOW_RESPONSE:
+      self._back_off()
+      return
+    # additive increase of the request rate
+    self.delay_factor = max(self.delay_factor - DELAY_FACTOR_DECREASE, 1)
+    self.successes += 1
+    if self.successes >= CONCURRENCY_INCREASE_AFTER:
+      self.max_in_flight = min(self.max_in_flight + 1, DOMAIN_MAX_CONCURRENCY)
+      self.successes = 0
+
+  def _open(self) -> None:
+    """Opens the circuit breaker, the cooldown doubles with every opening in a
+        row
+
+    Returns:
+      None
+    """
+    self.openings += 1
+    self.open_until = time.time() + CIRCUIT_BREAKER_COOLDOWN * 2**(
+        self.openings - 1)
+    self.consecutive_failures = 0
+    self.probe_url = None
+
+  def record_failure(self, url: str) -> None:
+    """Updates the health after a connection error, timeout or throttling
+        response
+
+    Args:
+      url: the url whose request failed
+
+    Returns:
+      None
+    """
+    if self.open_until > 0:
+      # only a failed probe of the half open breaker opens it again, requests
+      # that were in flight when it opened don't escalate the cooldown
+      if url == self.probe_url:
+        self._back_off()
+        self._open()
+      return
+    self._back_off()
+    self.consecutive_failures += 1
+    if self.consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
+      self._open()
+
+  def allowed_in_flight(self) -> int:
+    """Returns the amount of requests that may run at the same time, a half
+        open breaker only allows the probe
+
+    Returns:
+      amount of parallel requests
+    """
+    if self.open_until > 0:
+      return 1
+    return self.max_in_flight
+
+  def get_state(self) -> dict:
+    """Returns the health in JSON format so it can be checkpointed, the probe
+        in flight is not part of it
+
+    Returns:
+      dictionary of the attributes
+    """
+    return {
+        "delay_factor": self.delay_factor,
+        "max_in_flight": self.max_in_flight,
+        "successes": self.successes,
+        "consecutive_failures": self.consecutive_failures,
+        "openings": self.openings,
+        "open_until": self.open_until
+    }
+
+  def restore_state(self, state: dict) -> None:
+    """Restores the health of a checkpoint
+
+    Args:
+      state: dictionary of the attributes as returned by get_state
+
+    Returns:
+      None
+    """
+    self.delay_factor = state["delay_factor"]
+    self.max_in_flight = state["max_in_flight"]
+    self.successes = state["successes"]
+    self.consecutive_failures = state["consecutive_failures"]
+    self.openings = state["openings"]
+    self.open_until = state["open_until"]
+
+  def is_dead(self) -> bool:
+    """Checks if the domain failed too often to be crawled any further
+
+    Returns:
+      bool that shows if the domain is given up
+    """
+    return self.openings >= CIRCUIT_BREAKER_MAX_OPENINGS
+
+
+class PolitenessScheduler:
+  """Hands out URLs whose domain may be requested right now
+
+  Works like the frontier of Mercator: the url queue is the front queue that
+  decides the priority, the domain queues are the back queues with the FIFO
+  queue of one domain each. URLs are taken best first from the url queue and
+  appended to the back queue of their domain. At most MAX_ACTIVE_HOSTS domains
+  have a back queue and only SCHEDULER_BUFFER_SIZE urls are taken ahead of
+  time, so urls that are found later with a better priority don't have to wait
+  behind the whole frontier. Only if no domain is ready, more urls are taken
+  until a new domain gets active, so a domain that floods the frontier can't
+  leave the workers waiting for its crawl delay. Taking urls stops at
+  SCHEDULER_MAX_BUFFER_SIZE urls in total and once the best url of the url
+  queue belongs to a domain with SCHEDULER_MAX_DOMAIN_QUEUE queued urls, so a
+  busy domain never pulls the whole frontier into its back queue, the urls
+  behind its best url wait until it made room.
+  A min-heap holds the time at which each domain may be requested next, so a
+  worker only ever gets a URL of a domain that is ready and never has to sleep
+  for a single busy domain while URLs of idle domains are waiting. Ready
+  domains are handed out round-robin, in the order in which they got ready. A
+  domain whose parallel requests are used up is not ready again until a worker
+  releases one of its urls. How often and how parallel a domain is requested
+  is adapted by its DomainHealth, failed urls are queued again for a retry.
+  Domains are pruned once they used up their DOMAIN_FETCH_BUDGET or their
+  classified pages show a relevance yield below DOMAIN_MIN_YIELD, the domains
+  of the seed are never pruned.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: instance of the custom logging module
+    url_queue: the url queue the urls are taken from
+    domain_timers: the database that contains timestamps of requests to
+                    the domains
+    html_database: the database of the classified pages the yield of the
+                    domains is taken from, None to not prune by yield
+    domain_queues: dictionary with a queue of (url record, is_seed) per domain
+    amount_queued: amount of urls in the domain queues
+    ready_heap: min-heap of (ready time, sequence number, domain) of all domains
+                  that have queued urls and free parallel requests
+    scheduled: set of the domains that are on the ready heap
+    in_flight: dictionary with the amount of handed out urls per domain
+    handed_out: dictionary of the handed out urls to is_seed
+    next_dispatch: earliest time of the next request per domain, keeps
+                    parallel requests apart by the crawl delay
+    crawl_delays: the last known crawl delay of every domain
+    health: dictionary with the DomainHealth of every domain
+    attempts: dictionary with the amount of failed requests per url
+    dead_domains: set of the domains that are given up
+    fetched: dictionary with the amount of handed out urls per domain,
+              retries are not counted
+    pruning_decisions: list of the given up domains with the reason
+    seed_domains: set of the domains of the seed urls, they are not pruned
+    lock: lock that guards all of the above
+"""
+
+  def __init__(self,
+               logger: Logger,
+               url_queue: storage.URLQueue,
+               domain_timers: storage.DomainTimers,
+               html_database: storage.HTMLDatabase = None):
+    """Inits PolitenessScheduler
+
+    Args:
+      logger: instance of the custom logging module
+      url_queue: the url queue the urls are taken from
+      domain_timers: the database that contains timestamps of requests to
+                      the domains
+      html_database: the database of the classified pages the yield of the
+                      domains is taken from, None to not prune by yield
+    """
+    self.name = "PolitenessScheduler"
+    self.logger = logger
+    self.url_queue = url_queue
+    self.domain_timers = domain_timers
+    self.html_database = html_database
+    self.domain_queues: dict[str, deque] = {}
+    self.amount_queued = 0
+    self.ready_heap = []
+    self.scheduled = set()
+    self.in_flight: dict[str, int] = {}
+    self.handed_out: dict[str, bool] = {}
+    self.next_dispatch: dict[str, float] = {}
+    self.crawl_delays = {}
+    self.health: dict[str, DomainHealth] = {}
+    self.attempts: dict[str, int] = {}
+    self.dead_domains = set()
+    self.fetched: dict[str, int] = {}
+    self.pruning_decisions = []
+    self.seed_domains = set()
+    self.lock = threading.Lock()
+    self._sequence = itertools.count()
+
+    self.logger.log_info(self.name, "initialized")
+
+  def _get_health(self, domain: str) -> DomainHealth:
+    """Returns the health of a domain, lock needs to be held
+
+    Args:
+      domain: the domain
+
+    Returns:
+      the health of the domain
+    """
+    health = self.health.get(domain)
+    if health is None:
+      health = DomainHealth()
+      self.health[domain] = health
+    return health
+
+  def _get_delay(self, domain: str) -> float:
+    """Returns the crawl delay stretched by the health of the domain, lock needs
+        to be held
+
+    Args:
+      domain: the domain
+
+    Returns:
+      seconds between two requests to the domain
+    """
+    crawl_delay = self.crawl_delays.get(domain, DEFAULT_CRAWL_DELAY)
+    return crawl_delay * self._get_health(domain).delay_factor
+
+  def _ready_time(self, domain: str) -> float:
+    """Calculates when the next request to the domain is allowed, lock needs to
+        be held
+
+    Args:
+      domain: the domain to check
+
+    Returns:
+      timestamp of the next allowed request
+    """
+    ready_time = time.time() + self.domain_timers.time_until_next_request(
+        domain, self._get_delay(domain))
+    return max(ready_time, self.next_dispatch.get(domain, 0),
+               self._get_health(domain).open_until)
+
+  def _schedule(self, domain: str) -> None:
+    """Puts a domain on the ready heap if it has queued urls and free parallel
+        requests, lock needs to be held
+
+    Args:
+      domain: the domain
+
+    Returns:
+      None
+    """
+    if domain in self.scheduled or not self.domain_queues.get(domain):
+      return
+    if self.in_flight.get(domain, 0) >= self._get_health(
+        domain).allowed_in_flight():
+      return
+    heapq.heappush(self.ready_heap,
+                   (self._ready_time(domain), next(self._sequence), domain))
+    self.scheduled.add(domain)
+
+  def _drop_domain(self, domain: str, reason: str) -> None:
+    """Gives up a domain and drops its queued urls, lock needs to be held
+
+    Args:
+      domain: the domain
+      reason: why the domain is given up, for logging and the report
+
+    Returns:
+      None
+    """
+    self.dead_domains.add(domain)
+    dropped_urls = self.domain_queues.pop(domain, deque())
+    self.amount_queued -= len(dropped_urls)
+    for url, _ in dropped_urls:
+      self.url_queue.pop_depth(url.url)
+    pages, relevant_pages = 0, 0
+    if self.html_database is not None:
+      pages, relevant_pages = self.html_database.get_domain_yield(domain)
+    self.pruning_decisions.append({
+        "domain": domain,
+        "reason": reason,
+        "time": time.time(),
+        "fetched": self.fetched.get(domain, 0),
+        "classified pages": pages,
+        "relevant pages": relevant_pages,
+        "dropped urls": len(dropped_urls)
+    })
+    self.logger.log_info(
+        self.name, "giving up " + domain + " (" + reason + "), dropping " +
+        str(len(dropped_urls)) + " urls")
+
+  def _get_pruning_reason(self, domain: str) -> str:
+    """Checks if a domain used up its fetch budget or its yield is too low,
+        lock needs to be held
+
+    Args:
+      domain: the domain
+
+    Returns:
+      the reason to prune the domain, None if it is kept
+    """
+    if domain in self.seed_domains:
+      return None
+    fetched = self.fetched.get(domain, 0)
+    if fetched >= DOMAIN_FETCH_BUDGET > 0:
+      return "fetch budget of " + str(DOMAIN_FETCH_BUDGET) + " pages used up"
+    if self.html_database is None or DOMAIN_MIN_YIELD <= 0:
+      return None
+    pages, relevant_pages = self.html_database.get_domain_yield(domain)
+    if pages >= DOMAIN_YIELD_MIN_PAGES and (relevant_pages <
+                                            DOMAIN_MIN_YIELD * pages):
+      return "yield of " + str(round(relevant_pages / pages, 3)) + " after " + \
+          str(pages) + " pages"
+    return None
+
+  def _domain_ready(self) -> bool:
+    """Checks if a domain may be requested right now, lock needs to be held
+
+    Returns:
+      bool that shows if a domain is ready
+    """
+    return bool(self.ready_heap) and self.ready_heap[0][0] <= time.time()
+
+  def _domain_queue_full(self, domain: str) -> bool:
+    """Checks if a domain has SCHEDULER_MAX_DOMAIN_QUEUE queued urls, lock
+        needs to be held
+
+    Args:
+      domain: the domain
+
+    Returns:
+      bool that shows if no more urls are queued for the domain
+    """
+    return len(self.domain_queues.get(domain, ())) >= SCHEDULER_MAX_DOMAIN_QUEUE
+
+  def _fill(self) -> None:
+    """Moves the best urls from the url queue into the domain queues until
+        SCHEDULER_BUFFER_SIZE urls are queued and a domain is ready, or
+        MAX_ACTIVE_HOSTS domains are active, lock needs to be held
+
+    Filling stops at SCHEDULER_MAX_BUFFER_SIZE queued urls and when the best url
+    belongs to a full domain queue, the url stays in the url queue, so the urls
+    keep their order.
+
+    Returns:
+      None
+    """
+    while len(self.domain_queues) < MAX_ACTIVE_HOSTS and (
+        self.amount_queued < SCHEDULER_BUFFER_SIZE or
+        not self._domain_ready()
+    ) and self.amount_queued < SCHEDULER_MAX_BUFFER_SIZE:
+      url = self.url_queue.peek_url()
+      if url is None or (url.domain not in self.dead_domains and
+                         self._domain_queue_full(url.domain)):
+        break
+      url, is_seed = self.url_queue.get_url()
+      if url is None:
+        break
+      domain = url.domain
+      if domain in self.dead_domains:
+        self.url_queue.pop_depth(url.url)
+        continue
+      if is_seed:
+        self.seed_domains.add(domain)
+      if domain not in self.domain_queues:
+        self.domain_queues[domain] = deque()
+      self.domain_queues[domain].append((url, is_seed))
+      self.amount_queued += 1
+      self._schedule(domain)
+
+  def get_url(self) -> (URLRecord, bool):
+    """Returns a URL whose domain may be requested right now
+
+    The url counts as handed out until release is called.
+
+    Returns:
+      tuple (record of the url, is_seed), (None, None) if no domain is ready
+    """
+    with self.lock:
+      self._fill()
+      now = time.time()
+      while self.ready_heap and self.ready_heap[0][0] <= now:
+        _, _, domain = heapq.heappop(self.ready_heap)
+        self.scheduled.discard(domain)
+        domain_queue = self.domain_queues.get(domain)
+        if not domain_queue:
+          self.domain_queues.pop(domain, None)
+          continue
+        # the health of the domain might have changed since it was pushed
+        if self.in_flight.get(domain, 0) >= self._get_health(
+            domain).allowed_in_flight():
+          continue
+        ready_time = self._ready_time(domain)
+        if ready_time > time.time():
+          heapq.heappush(self.ready_heap,
+                         (ready_time, next(self._sequence), domain))
+          self.scheduled.add(domain)
+          continue
+        reason = self._get_pruning_reason(domain)
+        if reason is not None:
+          self._drop_domain(domain, reason)
+          if domain not in self.in_flight:
+            self.next_dispatch.pop(domain, None)
+          continue
+        url, is_seed = domain_queue.popleft()
+        self.amount_queued -= 1
+        # the cooldown has passed, the url probes the half open breaker
+        health = self._get_health(domain)
+        if health.open_until > 0:
+          health.probe_url = url.url
+        if url.url not in self.attempts:
+          self.fetched[domain] = self.fetched.get(domain, 0) + 1
+        self.in_flight[domain] = self.in_flight.get(domain, 0) + 1
+        self.handed_out[url.url] = is_seed
+        # further parallel requests have to keep the crawl delay apart
+        self.next_dispatch[domain] = now + self._get_delay(domain)
+        self._schedule(domain)
+        return url, is_seed
+    return None, None
+
+  def is_retry(self, url: URLRecord) -> bool:
+    """Checks if a url was handed out before and failed
+
+    Args:
+      url: record of the url to check
+
+    Returns:
+      bool that shows if the url is retried
+    """
+    with self.lock:
+      return url.url in self.attempts
+
+  def record_success(self, url: URLRecord, latency: float) -> None:
+    """Reports a response of a handed out url that is no failure
+
+    Args:
+      url: record of the url that was requested
+      latency: seconds until the headers of the response arrived
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self._get_health(url.domain).record_success(url.url, latency)
+      self.attempts.pop(url.url, None)
+
+  def record_failure(self, url: URLRecord, reason: str) -> None:
+    """Reports a failed request of a handed out url, the url is queued again if
+        it has retries left
+
+    Args:
+      url: record of the url that was requested
+      reason: description of the failure for logging
+
+    Returns:
+      None
+    """
+    domain = url.domain
+    with self.lock:
+      if domain in self.dead_domains:
+        return
+      health = self._get_health(domain)
+      open_until = health.open_until
+      health.record_failure(url.url)
+      if health.open_until != open_until:
+        self.logger.log_info(
+            self.name, "circuit breaker of " + domain + " opened (" + reason +
+            "), parking its urls")
+      if health.is_dead():
+        self._drop_domain(
+            domain,
+            str(CIRCUIT_BREAKER_MAX_OPENINGS) + " openings of the circuit " +
+            "breaker")
+        self.attempts.pop(url.url, None)
+        return
+      attempts = self.attempts.get(url.url, 0) + 1
+      if attempts > MAX_RETRIES:
+        self.logger.log_debug(self.name,
+                              "giving up " + url.url + " (" + reason + ")")
+        self.attempts.pop(url.url, None)
+        return
+      self.logger.log_debug(
+          self.name, "retrying " + url.url + " (" + reason + "), attempt " +
+          str(attempts) + " of " + str(MAX_RETRIES))
+      self.attempts[url.url] = attempts
+      if domain not in self.domain_queues:
+        self.domain_queues[domain] = deque()
+      self.domain_queues[domain].append(
+          (url, self.handed_out.get(url.url, False)))
+      self.amount_queued += 1
+
+  def release(self, url: URLRecord, crawl_delay: float) -> None:
+    """Gives a url that was handed out by get_url back to the scheduler after
+        the request is done or was skipped
+
+    Args:
+      url: record of the url that was handed out
+      crawl_delay: the crawl delay of the urls domain
+
+    Returns:
+      None
+    """
+    domain = url.domain
+    with self.lock:
+      self.handed_out.pop(url.url, None)
+      # a probe that was skipped, e.g. because of the robots.txt, leaves the
+      # breaker half open for the next url
+      health = self._get_health(domain)
+      if health.probe_url == url.url:
+        health.probe_url = None
+      in_flight = self.in_flight.get(domain, 0) - 1
+      if in_flight > 0:
+        self.in_flight[domain] = in_flight
+      else:
+        self.in_flight.pop(domain, None)
+      self.crawl_delays[domain] = crawl_delay
+      if self.domain_queues.get(domain):
+        self._schedule(domain)
+      elif domain not in self.in_flight:
+        self.domain_queues.pop(domain, None)
+        self.next_dispatch.pop(domain, None)
+
+  def get_pending_urls(self) -> list[str]:
+    """Returns the urls that were handed out but are not done yet, they are
+        either in flight or wait for a retry
+
+    Returns:
+      list of the urls
+    """
+    with self.lock:
+      return list(self.handed_out) + [
+          url for url in self.attempts if url not in self.handed_out
+      ]
+
+  def get_state(self) -> dict:
+    """Returns what the scheduler learned about the domains in JSON format so
+        it can be checkpointed: the handed out urls per domain, the health of
+        the domains that are not in their initial state, the given up
+        domains and the domains of the seed
+
+    The pending urls are crawled again after a resume, so they are not counted
+    as handed out.
+
+    Returns:
+      dictionary of the state
+    """
+    initial_health = DomainHealth().get_state()
+    with self.lock:
+      fetched = dict(self.fetched)
+      for url in set(self.handed_out) | set(self.attempts):
+        domain = get_url_record(url, True).domain
+        if fetched.get(domain, 0) > 0:
+          fetched[domain] -= 1
+      health = {
+          domain: domain_health.get_state()
+          for domain, domain_health in self.health.items()
+          if domain_health.get_state() != initial_health
+      }
+      return {
+          "fetched": fetched,
+          "health": health,
+          "dead_domains": list(self.dead_domains),
+          "pruning_decisions": list(self.pruning_decisions),
+          "seed_domains": list(self.seed_domains)
+      }
+
+  def restore_state(self, state: dict) -> None:
+    """Restores the state of a checkpoint, urls of the given up domains are
+        dropped when they are taken from the url queue
+
+    Args:
+      state: dictionary of the state as returned by get_state
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self.fetched = dict(state["fetched"])
+      for domain, domain_health in state["health"].items():
+        self._get_health(domain).restore_state(domain_health)
+      self.dead_domains = set(state["dead_domains"])
+      self.pruning_decisions = list(state["pruning_decisions"])
+      # checkpoints of older versions don't know the domains of the seed
+      self.seed_domains.update(state.get("seed_domains", []))
+    self.logger.log_info(
+        self.name, "restored " + str(len(self.fetched)) + " domains, " +
+        str(len(self.dead_domains)) + " of them given up")
+
+  def write_pruning_report(self, filename: str) -> None:
+    """Writes the given up domains with the reason and their statistics to a
+        JSON file
+
+    Args:
+      filename: name of the report file
+
+    Returns:
+      None
+    """
+    with open(filename, "x", encoding="utf-8") as f:
+      json.dump(self.get_pruning_report(), f)
+
+  def get_pruning_report(self) -> list[dict]:
+    """Returns the given up domains with the reason and their statistics
+
+    Returns:
+      list of the pruning decisions in the order they were made
+    """
+    with self.lock:
+      return list(self.pruning_decisions)
+
+  def time_until_next_url(self) -> float:
+    """Calculates how long it takes until the next domain gets ready
+
+    Returns:
+      seconds until the next domain is ready, None if no domain is waiting
+    """
+    with self.lock:
+      self._fill()
+      if not self.ready_heap:
+        return None
+      return max(self.ready_heap[0][0] - time.time(), 0)
+
+  def amount_queued_urls(self) -> int:
+    """Counts the urls that are waiting in the domain queues
+
+    Returns:
+      amount of urls in the domain queues
+    """
+    with self.lock:
+      return self.amount_queued
+
+  def is_empty(self) -> bool:
+    """Checks if there are no urls left, neither in the url queue nor in the
+        domain queues
+
+    Returns:
+      bool that shows if the scheduler is empty
+    """
+    return self.url_queue.is_empty() and self.amount_queued_urls() == 0
@@ -1,17 +1,54 @@
 """Module that holds all the classes for storing information
 """
-import queue
+from collections import OrderedDict, deque
+import hashlib
+import math
+import threading
 import time
 import json
 from diagrams import Diagram
 from diagrams.alibabacloud.compute import ECS
 import os
-from urllib.parse import urlparse
-import requests
+import tempfile
+from concurrent.futures import BrokenExecutor, Executor, Future
 from protego import Protego
 
-from src.crawler_bot.config import DEFAULT_CRAWL_DELAY, DIAGRAMM_MAX_URL_LENGTH, CUSTOM_USER_AGENT
+from src.crawler_bot.canonicalization import get_url_fingerprint
+from src.crawler_bot.config import DEFAULT_CRAWL_DELAY, DIAGRAMM_MAX_URL_LENGTH, CUSTOM_USER_AGENT, FRONTIER_BACKEND, FRONTIER_DB_FILE, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_ENTRIES, ROBOTS_TXT_ERROR_TTL, ROBOTS_TXT_TIMEOUT, ROBOTS_TXT_TTL, SEEN_INDEX_CAPACITY, SEEN_INDEX_ERROR_RATE, SEEN_INDEX_MODE, STORAGE_LOCK_STRIPES, UNPROCESSED_HTML_MAX_BYTES, UNPROCESSED_HTML_MAX_ENTRIES
 from src.crawler_bot.custom_logging import Logger
+from src.crawler_bot.fetching import NETWORK_ERRORS, FetchAborted, decode_html, get_session_pool, read_robots_txt
+from src.crawler_bot.parsing import parse_content
+from src.crawler_bot.frontier import PriorityFrontier, SQLiteFrontier, get_priority
+from src.crawler_bot.url_record import URLRecord, get_url_record
+
+
+class StripedLocks:
+  """Fixed amount of locks that keys are spread over by their hash, so threads
+      working on different keys rarely wait for each other while the amount
+      of locks stays bounded
+
+  Attributes:
+    locks: list of the locks
+"""
+
+  def __init__(self, amount_stripes: int = STORAGE_LOCK_STRIPES):
+    """Inits StripedLocks
+
+    Args:
+      amount_stripes: amount of locks
+    """
+    self.locks = [threading.Lock() for _ in range(amount_stripes)]
+
+  def get_lock(self, key) -> threading.Lock:
+    """Returns the lock that guards the given key
+
+    Args:
+      key: hashable key, e.g. a domain or a fingerprint
+
+    Returns:
+      the lock of the key
+    """
+    return self.locks[hash(key) % len(self.locks)]
 
 
 class HTMLDatabaseEntry:
@@ -25,11 +62,19 @@ class HTMLDatabaseEntry:
     distances: dictionary with all distances from the document to the
                 possible categories
     guessed_category: the guessed category by the classifier
+    duplicate_of: url of the page this page is a near-duplicate of, None if
+                    it was classified itself
 """
 
-  def __init__(self, url: str, html: str, extracted_urls: list[str],
-               relevant: bool, distances: dict, relative_distances: dict,
-               guessed_category: str):
+  def __init__(self,
+               url: str,
+               html: str,
+               extracted_urls: list[str],
+               relevant: bool,
+               distances: dict,
+               relative_distances: dict,
+               guessed_category: str,
+               duplicate_of: str = None):
     """Inits HTMLDatabaseEntry
 
     Args:
@@ -42,6 +87,8 @@ class HTMLDatabaseEntry:
       relative_distances: dictionary with all relative distances from the
                             document to the possible categories
       guessed_category: the guessed category by the classifier
+      duplicate_of: url of the page this page is a near-duplicate of, None if
+                      it was classified itself
     """
     self.url = url
     self.html = html
@@ -50,6 +97,7 @@ class HTMLDatabaseEntry:
     self.distances = distances
     self.relative_distances = relative_distances
     self.guessed_category = guessed_category
+    self.duplicate_of = duplicate_of
 
 
 def get_relative_distance(single_entry: HTMLDatabaseEntry) -> float:
@@ -72,6 +120,10 @@ class HTMLDatabase:
     name: name of the class for logging
     database: list that contains all the HTML content
     logger: the custom_logging module to log all kinds of messages
+    domain_statistics: dictionary of the domains to the amount of their pages
+                        and relevant pages
+    locks: striped locks that guard the statistics of the domains, the list
+            needs none since appending to and slicing a list is atomic
   """
 
   def __init__(self, logger: Logger):
@@ -83,12 +135,19 @@ class HTMLDatabase:
     self.name = "HTMLDatabase"
     self.database: list[HTMLDatabaseEntry] = []
     self.logger = logger
+    self.domain_statistics: dict[str, list[int]] = {}
+    self.locks = StripedLocks()
     self.logger.log_info(self.name, "initialized")
 
-  def add_html_document(self, url: str, html_document: str, relevant: bool,
-                        extracted_urls: list[str], distances: dict,
+  def add_html_document(self,
+                        url: str,
+                        html_document: str,
+                        relevant: bool,
+                        extracted_urls: list[str],
+                        distances: dict,
                         relative_distances: dict,
-                        guessed_category: str) -> None:
+                        guessed_category: str,
+                        duplicate_of: str = None) -> None:
     """Stores the given HTML document in the database
 
     Args:
@@ -101,20 +160,55 @@ class HTMLDatabase:
       relative_distances: dictionary with all relative distances from the
                             document to the possible categories
       guessed_category: the guessed category by the classifier
+      duplicate_of: url of the page this page is a near-duplicate of, None if
+                      it was classified itself
 
     Returns:
       None
     """
     self.logger.log_debug(self.name, "adding HTML document for " + url)
-    # create HTMLDatabaseEntry object and write to database
-    self.database.append(
-        HTMLDatabaseEntry(html=html_document,
-                          url=url,
-                          relevant=relevant,
-                          extracted_urls=extracted_urls,
-                          distances=distances,
-                          relative_distances=relative_distances,
-                          guessed_category=guessed_category))
+    # create HTMLDatabaseEntry object outside of the lock and write to database
+    entry = HTMLDatabaseEntry(html=html_document,
+                              url=url,
+                              relevant=relevant,
+                              extracted_urls=extracted_urls,
+                              distances=distances,
+                              relative_distances=relative_distances,
+                              guessed_category=guessed_category,
+                              duplicate_of=duplicate_of)
+    # the same domain the scheduler prunes by
+    domain = get_url_record(url, True).domain
+    self.database.append(entry)
+    with self.locks.get_lock(domain):
+      statistics = self.domain_statistics.setdefault(domain, [0, 0])
+      statistics[0] += 1
+      if relevant:
+        statistics[1] += 1
+
+  def get_domain_yield(self, domain: str) -> (int, int):
+    """Returns how many pages of a domain were classified and how many of
+        them are relevant
+
+    Args:
+      domain: the domain
+
+    Returns:
+      tuple of the amount of pages and relevant pages
+    """
+    with self.locks.get_lock(domain):
+      pages, relevant_pages = self.domain_statistics.get(domain, (0, 0))
+    return pages, relevant_pages
+
+  def get_entries(self, start: int = 0) -> list[HTMLDatabaseEntry]:
+    """Returns the entries in the order they were added
+
+    Args:
+      start: index of the first entry to return
+
+    Returns:
+      list of the entries from start on
+    """
+    return self.database[start:]
 
   def is_empty(self) -> bool:
     """Checks if html database is empty
@@ -125,7 +219,8 @@ class HTMLDatabase:
     return len(self.database) == 0
 
   def sort_after_relevance(self) -> None:
-    """Sorts the database using the relative_distances
+    """Sorts the database using the relative_distances, only once the crawl is
+        done since adding entries during the sort fails
 
     Returns:
       None
@@ -138,10 +233,9 @@ class HTMLDatabase:
     Returns:
       list of urls
     """
+    entries = self.database[:]
     result = [
-        a.url + "," + a.guessed_category
-        for a in self.database
-        if a.relevant is True
+        a.url + "," + a.guessed_category for a in entries if a.relevant is True
     ]
     return result
 
@@ -152,8 +246,9 @@ class HTMLDatabase:
       string of the database in JSON format
     """
     document = []
+    entries = self.database[:]
     # iterate through all items and create JSON document
-    for element in self.database:
+    for element in entries:
       document.append({
           "url": element.url,
           #"html document": element.html,
@@ -161,57 +256,231 @@ class HTMLDatabase:
           "distances": element.distances,
           "relative distances": element.relative_distances,
           "extracted urls": element.extracted_urls,
-          "guessed category": element.guessed_category
+          "guessed category": element.guessed_category,
+          "duplicate of": element.duplicate_of
       })
     return json.dumps(document)
 
 
+class UnprocessedHTMLEntry:
+  """Class to safe a single fetched but not yet processed HTML document
+
+  The document is kept as it was received and only decoded when it's needed
+
+  Attributes:
+    url: url of the html page
+    is_seed: is url seed?
+    content: the raw html document
+    encoding: the encoding declared by the response headers, None if there is
+                none
+    parsed_page: future of the ParsedPage of the parser processes, None if
+                  the document is parsed by the extractor
+    base_url: url the relative links of the page are resolved against, the
+                requested url or the one the request was redirected to
+"""
+
+  def __init__(self,
+               url: str,
+               is_seed: bool,
+               content: bytes,
+               encoding: str,
+               parsed_page: Future = None,
+               base_url: str = None):
+    """Inits UnprocessedHTMLEntry
+
+    Args:
+      url: url of the html page
+      is_seed: is url seed?
+      content: the raw html document
+      encoding: the encoding declared by the response headers, None if there
+                  is none
+      parsed_page: future of the ParsedPage of the parser processes, None if
+                    the document is parsed by the extractor
+      base_url: url the relative links are resolved against, None for the url
+                  of the page
+    """
+    self.url = url
+    self.is_seed = is_seed
+    self.content = content
+    self.encoding = encoding
+    self.parsed_page = parsed_page
+    self.base_url = base_url if base_url is not None else url
+
+  def get_html(self) -> str:
+    """Decodes the html document
+
+    Returns:
+      the html document as string
+    """
+    return decode_html(self.content, self.encoding)
+
+
 class UnprocessedHTMLDatabase:
-  """Keeps a list of unprocessed HTML documents
+  """Bounded first in, first out buffer of unprocessed HTML documents
+
+  The buffer is full once it holds max_entries documents or max_bytes bytes.
+  Adding never blocks, since the page is already fetched, instead retrievers
+  wait with wait_until_not_full before they fetch the next page. So the buffer
+  can exceed its limits by the amount of requests that are in flight.
 
   Attributes:
-    database: contains the list of touples (url, html content)
+    database: contains the queue of unprocessed html entries
     logger: the custom_logging module to log all kinds of messages
     name: name of the instance for logging
+    max_entries: amount of entries at which the buffer is full
+    max_bytes: total size of the entries at which the buffer is full
+    amount_bytes: total size of the entries in the buffer
+    not_full: condition that is notified when an entry is taken
+    processing: set of the urls of the taken entries that are not done yet
+    parser_pool: pool of the parser processes that parse the documents while
+                  they wait in the buffer, None if the extractors parse them
 
 """
 
-  def __init__(self, logger: Logger):
+  def __init__(self,
+               logger: Logger,
+               max_entries: int = UNPROCESSED_HTML_MAX_ENTRIES,
+               max_bytes: int = UNPROCESSED_HTML_MAX_BYTES,
+               parser_pool: Executor = None):
     """Inits UnprocessedHtmlDatabase
 
     Args:
       logger: instance of the custom logging module
+      max_entries: amount of entries at which the buffer is full
+      max_bytes: total size of the entries at which the buffer is full
+      parser_pool: pool of the parser processes, None if the extractors parse
+                    the documents
     """
-    self.database = []
+    self.database: deque[UnprocessedHTMLEntry] = deque()
     self.logger = logger
     self.name = "UnprocessedHTMLDatabase"
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.amount_bytes = 0
+    self.not_full = threading.Condition()
+    self.processing = set()
+    self.parser_pool = parser_pool
 
     self.logger.log_info(self.name, "initialized")
 
-  def add_entry(self, url: str, is_seed: bool, html_document: str) -> None:
-    """Adds a new touple of url and html document to the database
+  def add_entry(self,
+                url: str,
+                is_seed: bool,
+                content: bytes,
+                encoding: str,
+                base_url: str = None) -> None:
+    """Adds a new entry of url and raw html document to the database
 
     Args:
       url: string of the crawled page
       is_seed: is url seed?
-      html_document: string of the recieved html document
+      content: the raw html document as it was recieved
+      encoding: the encoding declared by the response headers, None if there
+                  is none
+      base_url: url the relative links are resolved against, None for the url
+                  of the page
 
     Returns:
       None
     """
-    self.database.append((url, is_seed, html_document))
+    # the parser processes parse the document while it waits, the extractor
+    # parses it itself if the pool is broken
+    parsed_page = None
+    if self.parser_pool is not None:
+      try:
+        parsed_page = self.parser_pool.submit(parse_content, content, encoding)
+      except (BrokenExecutor, RuntimeError) as e:
+        self.logger.log_warning(self.name,
+                                "parser pool unavailable (" + repr(e) + ")")
+    with self.not_full:
+      self.database.append(
+          UnprocessedHTMLEntry(url, is_seed, content, encoding, parsed_page,
+                               base_url))
+      self.amount_bytes += len(content)
+      self.logger.log_debug(
+          self.name, "queue depth: " + str(len(self.database)) +
+          " entries, " + str(self.amount_bytes) + " bytes")
+
+  def get_entry(self) -> UnprocessedHTMLEntry:
+    """Returns the oldest entry from the database, task_done needs to be
+        called once it is processed
 
-  def get_entry(self) -> (str, bool, str):
-    """Returns an entry from the database
+    Returns:
+      an unprocessed html entry, None if the database is empty
+    """
+    with self.not_full:
+      # return oldest entry if available
+      if len(self.database) == 0:
+        return None
+      entry = self.database.popleft()
+      self.amount_bytes -= len(entry.content)
+      self.processing.add(entry.url)
+      if not self._is_full():
+        self.not_full.notify_all()
+      return entry
+
+  def task_done(self, url: str) -> None:
+    """Reports that the entry of the url that was taken with get_entry is
+        processed
+
+    Args:
+      url: the url of the entry
 
     Returns:
-      triple of (url, is_seed,html document)
+      None
     """
-    # return new url if available
-    if len(self.database) == 0:
-      return None, None, None
-    else:
-      return self.database.pop()
+    with self.not_full:
+      self.processing.discard(url)
+
+  def get_urls(self) -> list[str]:
+    """Returns the urls of the entries in the buffer and of the taken entries
+        that are not processed yet
+
+    Returns:
+      list of the urls
+    """
+    with self.not_full:
+      return [entry.url for entry in self.database] + list(self.processing)
+
+  def _is_full(self) -> bool:
+    """Checks if the buffer reached one of its limits, the condition needs to
+        be held
+
+    Returns:
+      bool that shows if the buffer is full
+    """
+    return len(self.database) >= self.max_entries or (self.amount_bytes >=
+                                                      self.max_bytes)
+
+  def is_full(self) -> bool:
+    """Checks if the buffer reached one of its limits
+
+    Returns:
+      bool that shows if the buffer is full
+    """
+    with self.not_full:
+      return self._is_full()
+
+  def wait_until_not_full(self) -> None:
+    """Blocks until the buffer is below its limits
+
+    Returns:
+      None
+    """
+    with self.not_full:
+      if self._is_full():
+        self.logger.log_debug(self.name,
+                              "buffer is full, waiting for the extractors")
+      self.not_full.wait_for(lambda: not self._is_full())
+
+  def get_queue_depth(self) -> (int, int):
+    """Returns the amount of entries and bytes in the buffer for monitoring
+
+    Returns:
+      tuple of the amount of entries and their total size in bytes
+    """
+    with self.not_full:
+      return len(self.database), self.amount_bytes
 
   def is_empty(self) -> bool:
     """Checks if database is empty
@@ -228,22 +497,134 @@ class UnprocessedHTMLDatabase:
       string of the database in JSON format
     """
     document = []
+    with self.not_full:
+      entries = list(self.database)
     # iterate through all items and create JSON document
-    for (url, is_seed, html) in self.database:
+    for entry in entries:
       document.append({
-          "url": url,
-          "is_seed": str(is_seed),
-          "html document": html
+          "url": entry.url,
+          "is_seed": str(entry.is_seed),
+          "html document": entry.get_html()
       })
     return json.dumps(document)
 
 
+class BloomFilter:
+  """Set of url fingerprints with a fixed size that may falsely report a
+      fingerprint as contained, but never misses one that was added
+
+  The bit array and the amount of hash functions are sized for the given
+  capacity and false positive rate, the hash functions are derived from the
+  two halves of the 64 bit fingerprint.
+
+  Attributes:
+    size: amount of bits
+    amount_hashes: amount of bits set per fingerprint
+    bits: the bit array
+    lock: lock that guards the bit array
+"""
+
+  def __init__(self, capacity: int, error_rate: float):
+    """Inits BloomFilter
+
+    Args:
+      capacity: amount of fingerprints the filter is sized for
+      error_rate: false positive rate once capacity fingerprints are added
+    """
+    self.size = max(int(-capacity * math.log(error_rate) / math.log(2)**2), 8)
+    self.amount_hashes = max(round(self.size / capacity * math.log(2)), 1)
+    self.bits = bytearray((self.size + 7) // 8)
+    self.lock = threading.Lock()
+
+  def _positions(self, fingerprint: int) -> list[int]:
+    """Calculates the bit positions of a fingerprint
+
+    Args:
+      fingerprint: 64 bit fingerprint
+
+    Returns:
+      list of the bit positions
+    """
+    first_hash = fingerprint >> 32
+    second_hash = fingerprint & 0xFFFFFFFF | 1
+    return [(first_hash + i * second_hash) % self.size
+            for i in range(self.amount_hashes)]
+
+  def add(self, fingerprint: int) -> None:
+    """Adds a fingerprint
+
+    Args:
+      fingerprint: 64 bit fingerprint
+
+    Returns:
+      None
+    """
+    with self.lock:
+      for position in self._positions(fingerprint):
+        self.bits[position >> 3] |= 1 << (position & 7)
+
+  def __contains__(self, fingerprint: int) -> bool:
+    """Checks if a fingerprint was (probably) added"""
+    return all(self.bits[position >> 3] & (1 << (position & 7))
+               for position in self._positions(fingerprint))
+
+
+class FingerprintSet:
+  """Exact set of url fingerprints that is split into shards, each guarded by
+      its own lock, so threads adding and checking different fingerprints
+      don't wait for each other
+
+  Attributes:
+    shards: list of the sets of fingerprints
+    locks: one lock per shard
+"""
+
+  def __init__(self, amount_shards: int = STORAGE_LOCK_STRIPES):
+    """Inits FingerprintSet
+
+    Args:
+      amount_shards: amount of shards
+    """
+    self.shards = [set() for _ in range(amount_shards)]
+    self.locks = [threading.Lock() for _ in range(amount_shards)]
+
+  def add(self, fingerprint: int) -> None:
+    """Adds a fingerprint
+
+    Args:
+      fingerprint: 64 bit fingerprint
+
+    Returns:
+      None
+    """
+    shard = fingerprint % len(self.shards)
+    with self.locks[shard]:
+      self.shards[shard].add(fingerprint)
+
+  def __contains__(self, fingerprint: int) -> bool:
+    """Checks if a fingerprint was added"""
+    shard = fingerprint % len(self.shards)
+    with self.locks[shard]:
+      return fingerprint in self.shards[shard]
+
+  def __len__(self) -> int:
+    """Returns the amount of fingerprints"""
+    return sum(len(shard) for shard in self.shards)
+
+
 class CrawledURLs:
   """Contains all the already crawled URLs
 
+  Besides the ordered list, the fingerprints of the canonical forms of the
+  crawled urls are kept in a seen index, so checking if a url was crawled
+  doesn't scan the list. The list needs no lock since appending to and slicing
+  a list is atomic, the seen index has its own locks.
+
   Attributes:
     name: name of this instance for logging
     crawled_urls: list of all already crawled urls
+    seen_index: sharded set of the fingerprints of the crawled urls, a
+                  BloomFilter if SEEN_INDEX_MODE is "bloom"
     logger: the custom_logging module to log all kinds of messages
     crawl_limit: amount of urls that should be crawled
 """
@@ -257,28 +638,70 @@ class CrawledURLs:
     """
     self.name = "CrawledURLS"
     self.crawled_urls = []
+    if SEEN_INDEX_MODE == "bloom":
+      self.seen_index = BloomFilter(SEEN_INDEX_CAPACITY, SEEN_INDEX_ERROR_RATE)
+    else:
+      self.seen_index = FingerprintSet()
     self.logger = logger
     self.crawl_limit = crawl_limit
     self.logger.log_info(self.name,
                          "initialized, limit is " + str(self.crawl_limit))
 
-  def add_crawled_url(self, url: str) -> None:
+  def add_crawled_url(self, url: URLRecord) -> None:
     """Adds the given URL to the list of already crawled URLs
 
     Args:
-      url: string of the URL that needs to be added
+      url: record of the URL that needs to be added
 
     Returns:
       None
     """
-    self.logger.log_info(self.name,
-                         "adding following URL to the crawled list: " + url)
-    self.crawled_urls.append(url)
-    print("URLs crawled: " + str(len(self.crawled_urls)) + "/" +
-          str(self.crawl_limit))
-    if self.crawl_limit != 0 and len(self.crawled_urls) >= self.crawl_limit:
+    self.logger.log_info(
+        self.name, "adding following URL to the crawled list: " + url.url)
+    self.crawled_urls.append(url.url)
+    amount_crawled = len(self.crawled_urls)
+    self.seen_index.add(url.fingerprint)
+    print("URLs crawled: " + str(amount_crawled) + "/" + str(self.crawl_limit))
+    if self.crawl_limit != 0 and amount_crawled >= self.crawl_limit:
       self.logger.log_debug(self.name, "Crawling limit reached!")
 
+  def restore(self, urls: list[str]) -> None:
+    """Adds urls that were crawled by a previous run, e.g. from a checkpoint
+
+    Args:
+      urls: list of the crawled urls
+
+    Returns:
+      None
+    """
+    self.crawled_urls.extend(urls)
+    for url in urls:
+      self.seen_index.add(get_url_fingerprint(url))
+    self.logger.log_info(self.name, "restored " + str(len(urls)) + " urls")
+
+  def get_urls(self, start: int = 0) -> list[str]:
+    """Returns the crawled urls in the order they were crawled
+
+    Args:
+      start: index of the first url to return
+
+    Returns:
+      list of the urls from start on
+    """
+    return self.crawled_urls[start:]
+
+  def is_crawled(self, url: URLRecord) -> bool:
+    """Checks if the given URL was already crawled
+
+    Args:
+      url: record of the URL to check
+
+    Returns:
+      bool that shows if the url was crawled, in bloom mode it might be wrong
+      for urls that were not crawled
+    """
+    return url.fingerprint in self.seen_index
+
   def crawl_limit_reached(self) -> bool:
     """Checks if the crawl limit is reached
 
@@ -295,7 +718,7 @@ class CrawledURLs:
     Returns:
       string of the database in JSON format
     """
-    return json.dumps(self.crawled_urls)
+    return json.dumps(self.crawled_urls[:])
 
 
 class DomainTimers:
@@ -305,6 +728,7 @@ class DomainTimers:
     name: name of this instance for logging
     domain_timers: list of all domain timers
     logger: the custom_logging module to log all kinds of messages
+    locks: striped locks that guard the timers of the domains
 """
 
   def __init__(self, logger: Logger):
@@ -316,6 +740,7 @@ class DomainTimers:
     self.name = "DomainTimers"
     self.domain_timers = {}
     self.logger = logger
+    self.locks = StripedLocks()
 
     self.logger.log_info(self.name, "initialized")
 
@@ -329,11 +754,13 @@ class DomainTimers:
     Returns:
       seconds that need to be waited until next request to this domain
     """
-    if domain not in self.domain_timers:
+    with self.locks.get_lock(domain):
+      timestamp = self.domain_timers.get(domain)
+    if timestamp is None:
       return 0  # no entry -> we don't have to wait
     else:
       # check if enough time went by from last request to domain
-      time_passed = time.time() - self.domain_timers[domain]
+      time_passed = time.time() - timestamp
       time_to_wait = crawl_delay - time_passed
 
       if time_to_wait > 0:
@@ -341,18 +768,23 @@ class DomainTimers:
       else:
         return 0
 
-  def set_timer(self, domain: str) -> None:
+  def set_timer(self, domain: str, timestamp: float = None) -> None:
     """Creates a new timer for a specific domain or
         resets the already existing one
 
     Args:
       domain: the domain a timer needs to be set up for
+      timestamp: time of the request, defaults to now. A timestamp in the
+                  future reserves the next request slot of the domain
 
     Returns:
       None
     """
     self.logger.log_debug(self.name, "setting up/resetting timer for " + domain)
-    self.domain_timers[domain] = time.time()
+    if timestamp is None:
+      timestamp = time.time()
+    with self.locks.get_lock(domain):
+      self.domain_timers[domain] = timestamp
 
   def to_json(self) -> str:
     """Returns the database in JSON format so it can be safed
@@ -360,19 +792,106 @@ class DomainTimers:
     Returns:
       string of the database in JSON format
     """
+    # all stripes are taken, so no timer is added while copying
+    for lock in self.locks.locks:
+      lock.acquire()
+    try:
+      domain_timers = dict(self.domain_timers)
+    finally:
+      for lock in self.locks.locks:
+        lock.release()
+    return json.dumps(domain_timers)
+
+
+class RobotsTXTEntry:
+  """Class to save a single cached robots.txt
+
+  Attributes:
+    robots_txt: content of the robots.txt, None if there is none
+    status_code: status code of the request, 0 if the request failed
+    fetched_at: timestamp when the robots.txt was requested
+    parser: the parsed robots.txt, None if there is none
+    crawl_delay: the resolved crawl delay for our user agent
+"""
+
+  def __init__(self, robots_txt: str, status_code: int, fetched_at: float):
+    """Inits RobotsTXTEntry
+
+    Args:
+      robots_txt: content of the robots.txt, None if there is none
+      status_code: status code of the request, 0 if the request failed
+      fetched_at: timestamp when the robots.txt was requested
+    """
+    self.robots_txt = robots_txt
+    self.status_code = status_code
+    self.fetched_at = fetched_at
+    self.parser = None
+    self.crawl_delay = DEFAULT_CRAWL_DELAY
+
+    if robots_txt is not None:
+      self.parser = Protego.parse(robots_txt)
+      # memoise the crawl delay, it is needed before every request
+      if self.parser.crawl_delay(CUSTOM_USER_AGENT) is not None:
+        self.crawl_delay = self.parser.crawl_delay(CUSTOM_USER_AGENT)
+
+  def is_expired(self) -> bool:
+    """Checks if the entry needs to be fetched again
+
+    Successful requests and client errors (4xx, the host has no robots.txt)
+    are cached for ROBOTS_TXT_TTL seconds, server errors and failed requests
+    only for ROBOTS_TXT_ERROR_TTL seconds
+
+    Returns:
+      bool that shows if the entry is expired
+    """
+    if self.is_unreachable():
+      ttl = ROBOTS_TXT_ERROR_TTL
+    else:
+      ttl = ROBOTS_TXT_TTL
+    return time.time() - self.fetched_at > ttl
+
+  def is_unreachable(self) -> bool:
+    """Checks if the robots.txt couldn't be fetched because of a server error
+        or a failed request
 
-    return json.dumps(self.domain_timers)
+    Returns:
+      bool that shows if the robots.txt is unreachable
+    """
+    return self.status_code == 0 or self.status_code >= 500
+
+  def can_fetch(self, url: str) -> bool:
+    """Checks if the given url is allowed to crawl
+
+    An unreachable robots.txt disallows everything (RFC 9309 2.3.1.4), a
+    missing one (4xx) allows everything
+
+    Args:
+      url: url to check
+
+    Returns:
+      bool that shows if it is allowed to crawl the url
+    """
+    if self.is_unreachable():
+      return False
+    if self.parser is None:
+      # no robots.txt, so no restrictions
+      return True
+    return self.parser.can_fetch(url, CUSTOM_USER_AGENT)
 
 
 class RobotsTXTDatabase:
-  """Contains the dictionary of robotparsers for each domain
-      There are empty entries for all domains that don't have robot files
+  """Contains the dictionary of cached robots.txt files for each domain
+      Domains without a robots.txt have entries without parser, so they
+      don't get requested again until the entry is expired
 
       Standard: https://datatracker.ietf.org/doc/html/draft-koster-rep
 
   Attributes:
-    database: the dictionary with robotparsers
+    database: the dictionary with robots.txt entries
     logger: the custom_logging module to log all kinds of messages
+    lock: lock that guards the database
+    host_locks: striped locks so only one thread fetches the robots.txt of a
+                  host
 """
 
   def __init__(self, logger: Logger):
@@ -382,85 +901,151 @@ class RobotsTXTDatabase:
       logger: the custom logging module
     """
     self.name = "RobotsTXTDatabase"
-    self.database = {}
+    self.database: dict[str, RobotsTXTEntry] = {}
     self.logger = logger
+    self.lock = threading.Lock()
+    self.host_locks = StripedLocks()
     self.logger.log_info(self.name, "initialized")
 
-  def retrieve_robots_txt(self, url: str) -> None:
+  def retrieve_robots_txt(self, url: URLRecord) -> None:
     """Retrieves the robots txt for the domain of the given url
 
     Args:
-      url: the url of a website of a domain where we want to get the robots.txt
+      url: record of a url of the domain where we want to get the robots.txt
 
     Returns:
       None
     """
-    # get the domain
-    parsed_url = urlparse(url)
-
     try:
-      x = requests.get(parsed_url.scheme + "://" + parsed_url.netloc +
-                       "/robots.txt")
-      if x.status_code != 200:
-        self.database[parsed_url.netloc] = None
-      else:
-        self.database[parsed_url.netloc] = Protego.parse(x.text)
-    except:
-      self.database[parsed_url.netloc] = None
+      # the body is streamed, so a huge or trickling robots.txt can't block the
+      # retriever
+      started_at = time.monotonic()
+      with get_session_pool().get(url.scheme + "://" + url.host +
+                                  "/robots.txt",
+                                  headers={"User-Agent": CUSTOM_USER_AGENT},
+                                  timeout=ROBOTS_TXT_TIMEOUT,
+                                  stream=True) as x:
+        if x.status_code != 200:
+          entry = RobotsTXTEntry(None, x.status_code, time.time())
+        else:
+          entry = RobotsTXTEntry(read_robots_txt(x, started_at), x.status_code,
+                                 time.time())
+    except (FetchAborted, *NETWORK_ERRORS) as e:
+      self.logger.log_debug(
+          self.name, "Robots.txt of " + url.host + " is unreachable (" +
+          type(e).__name__ + ")")
+      entry = RobotsTXTEntry(None, 0, time.time())
 
-    self.logger.log_debug(self.name,
-                          "Robots.txt entry created for " + parsed_url.netloc)
+    with self.lock:
+      self.database[url.host] = entry
+
+    self.logger.log_debug(self.name, "Robots.txt entry created for " + url.host)
+
+  def get_entry(self, url: URLRecord) -> RobotsTXTEntry:
+    """Returns the robots.txt entry for the domain of the url, missing or
+        expired entries are retrieved first
+
+    Only one thread retrieves the robots.txt of a host, all other threads
+    asking for the same host wait for its result
+
+    Args:
+      url: record of the url where we need the robots.txt entry of the domain
+
+    Returns:
+      the robots.txt entry of the domain
+    """
+    domain = url.host
 
-  def get_crawl_delay(self, url: str) -> float:
+    entry = self.database.get(domain)
+    if entry is not None and not entry.is_expired():
+      return entry
+
+    with self.host_locks.get_lock(domain):
+      # another thread might have retrieved it in the meantime
+      entry = self.database.get(domain)
+      if entry is None or entry.is_expired():
+        self.retrieve_robots_txt(url)
+        entry = self.database[domain]
+
+    return entry
+
+  def get_crawl_delay(self, url: URLRecord) -> float:
     """Extracts the crawl delay if it exists for the according domain
 
     Args:
-      url: the url where we need the crawl delay of the domain
+      url: record of the url where we need the crawl delay of the domain
 
     Returns:
       the crawl delay, default one if none is available
     """
-    # extract the domain
-    domain = urlparse(url).netloc
-
-    # do we have an entry?
-    if domain in self.database:
-      # is it just a dummy entry?
-      if self.database[domain] is not None:
-        # is there a crawl delay defined in the robots.txt?
-        if self.database[domain].crawl_delay(CUSTOM_USER_AGENT) is not None:
-          return self.database[domain].crawl_delay(CUSTOM_USER_AGENT)
-        else:
-          return DEFAULT_CRAWL_DELAY
-    else:
-      # no entry, get it and then check again for crawl delay
-      self.retrieve_robots_txt(url)
-      return self.get_crawl_delay(url)
+    return self.get_entry(url).crawl_delay
 
-  def can_fetch(self, url: str) -> bool:
+  def can_fetch(self, url: URLRecord) -> bool:
     """Checks if the given url is allowed to crawl
 
     Args:
-      url: url to check
+      url: record of the url to check
 
     Returns:
       bool that shows if it is allowed to crawl the url
    """
-    # extract the domain
-    domain = urlparse(url).netloc
-
-    # do we have an entry?
-    if domain in self.database:
-      # is it just a dummy entry?
-      if self.database[domain] is not None:
-        return self.database[domain].can_fetch(url, CUSTOM_USER_AGENT)
-      else:
-        # no robots.txt, so no restrictions
-        return True
-    else:
-      # no entry, get it and then check again for crawl delay
-      self.retrieve_robots_txt(url)
-      return self.can_fetch(url)
+    return self.get_entry(url).can_fetch(url.target)
+
+  def is_unreachable(self, url: URLRecord) -> bool:
+    """Checks if the robots.txt of the domain of the url couldn't be fetched,
+        so the url is disallowed for now
+
+    Args:
+      url: record of the url to check
+
+    Returns:
+      bool that shows if the robots.txt is unreachable
+    """
+    return self.get_entry(url).is_unreachable()
+
+  def save(self, filename: str) -> None:
+    """Writes all entries to disk so they can be loaded by the next run
+
+    Args:
+      filename: name of the cache file
+
+    Returns:
+      None
+    """
+    with self.lock:
+      document = {
+          domain: {
+              "robots_txt": entry.robots_txt,
+              "status_code": entry.status_code,
+              "fetched_at": entry.fetched_at
+          } for domain, entry in self.database.items()
+      }
+    with open(filename, "w", encoding="utf-8") as f:
+      json.dump(document, f)
+    self.logger.log_debug(self.name,
+                          "saved " + str(len(document)) + " entries to " + filename)
+
+  def load(self, filename: str) -> None:
+    """Loads the entries of a previous run, expired entries are skipped
+
+    Args:
+      filename: name of the cache file
+
+    Returns:
+      None
+    """
+    if not os.path.isfile(filename):
+      return
+    with open(filename, encoding="utf-8") as f:
+      document = json.load(f)
+    for domain, item in document.items():
+      entry = RobotsTXTEntry(item["robots_txt"], item["status_code"],
+                             item["fetched_at"])
+      if not entry.is_expired():
+        self.database[domain] = entry
+    self.logger.log_info(
+        self.name,
+        "loaded " + str(len(self.database)) + " entries from " + filename)
 
   def to_json(self) -> str:
     """Returns the database in JSON format so it can be safed
@@ -471,75 +1056,444 @@ class RobotsTXTDatabase:
     return json.dumps(list(self.database.keys()))
 
 
-class SetQueue(queue.Queue):
-  """Variation of the Queue that avoids duplicate entries
+class HTTPCacheEntry:
+  """Class to save the validators and metadata of a single cached page
 
-  https://stackoverflow.com/questions/16506429/check-if-element-is-already-in-a-queue
-  By doing that, the queue is not sorted anymore!!!
+  Attributes:
+    etag: the ETag header of the last response, None if there was none
+    last_modified: the Last-Modified header of the last response, None if
+                    there was none
+    encoding: the encoding declared by the headers of the last response
+    content_hash: hash of the cached body
+    classification: classification result of the body with content_hash,
+                      None if it was not classified yet
+    size: size of the cached body in bytes
 """
 
-  def __init__(self):
-    """Inits SetQueue"""
-    super().__init__()
+  def __init__(self,
+               etag: str,
+               last_modified: str,
+               encoding: str,
+               content_hash: str,
+               classification: dict = None,
+               size: int = 0):
+    """Inits HTTPCacheEntry
 
-  def _init(self, maxsize):
-    self.queue = set()
+    Args:
+      etag: the ETag header of the last response, None if there was none
+      last_modified: the Last-Modified header of the last response, None if
+                      there was none
+      encoding: the encoding declared by the headers of the last response
+      content_hash: hash of the cached body
+      classification: classification result of the body with content_hash
+      size: size of the cached body in bytes
+    """
+    self.etag = etag
+    self.last_modified = last_modified
+    self.encoding = encoding
+    self.content_hash = content_hash
+    self.classification = classification
+    self.size = size
+
+
+def get_content_hash(content: bytes) -> str:
+  """Calculates the hash that identifies a page body
+
+  Args:
+    content: the raw page
+
+  Returns:
+    the hash as hex string
+  """
+  return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class HTTPCache:
+  """On-disk cache of fetched pages for recurring crawls
+
+  Pages are stored with their validators, so the next run can ask the server
+  with a conditional request if a page changed and reuse the cached body on
+  304 Not Modified. The classification of a body is stored with its hash, so
+  unchanged pages don't need to be classified again.
+
+  The cache holds at most max_entries pages and max_bytes bytes, the least
+  recently used pages are dropped. A body is written to a temporary file first
+  and moved in place while the lock is held, so an entry always belongs to the
+  body in its file.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    directory: directory of the cache, bodies are stored in a subdirectory
+    database: ordered dictionary of url to cache entry, least recently used
+                first
+    max_entries: max amount of cached pages
+    max_bytes: max total size of the cached bodies
+    amount_bytes: total size of the cached bodies
+    lock: lock that guards the database, the size and the body files
+"""
+
+  def __init__(self,
+               logger: Logger,
+               directory: str,
+               max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+               max_bytes: int = HTTP_CACHE_MAX_BYTES):
+    """Inits HTTPCache
+
+    Args:
+      logger: the custom logging module
+      directory: directory of the cache
+      max_entries: max amount of cached pages
+      max_bytes: max total size of the cached bodies
+    """
+    self.name = "HTTPCache"
+    self.logger = logger
+    self.directory = directory
+    self.database: OrderedDict[str, HTTPCacheEntry] = OrderedDict()
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.amount_bytes = 0
+    self.lock = threading.Lock()
+
+    os.makedirs(os.path.join(self.directory, "bodies"), exist_ok=True)
+    self.logger.log_info(self.name, "initialized")
+
+  def _body_filename(self, url: str) -> str:
+    """Returns the name of the file the body of the url is stored in
+
+    Args:
+      url: the url of the page
 
-  def _put(self, item):
-    self.queue.add(item)
+    Returns:
+      the filename
+    """
+    return os.path.join(self.directory, "bodies",
+                        hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+  def _get(self, url: str) -> HTTPCacheEntry:
+    """Returns the entry of a url and marks it as recently used, lock needs to
+        be held
+
+    Args:
+      url: the url of the page
 
-  def _get(self):
-    return self.queue.pop()
+    Returns:
+      the entry, None if the page is not cached
+    """
+    entry = self.database.get(url)
+    if entry is not None:
+      self.database.move_to_end(url)
+    return entry
+
+  def _remove(self, url: str) -> None:
+    """Drops the entry and the body of a url, lock needs to be held
+
+    Args:
+      url: the url of the page
+
+    Returns:
+      None
+    """
+    entry = self.database.pop(url, None)
+    if entry is None:
+      return
+    self.amount_bytes -= entry.size
+    try:
+      os.remove(self._body_filename(url))
+    except FileNotFoundError:
+      pass
+
+  def _evict(self) -> None:
+    """Drops the least recently used pages until the cache is within its
+        limits, lock needs to be held
+
+    Returns:
+      None
+    """
+    while self.database and (len(self.database) > self.max_entries or
+                             self.amount_bytes > self.max_bytes):
+      self._remove(next(iter(self.database)))
+
+  def get_conditional_headers(self, url: str) -> dict:
+    """Creates the headers for a conditional request of the url
+
+    Args:
+      url: the url that will be requested
+
+    Returns:
+      dictionary with If-None-Match and/or If-Modified-Since, empty if the
+      url is not cached
+    """
+    with self.lock:
+      entry = self._get(url)
+    headers = {}
+    if entry is None:
+      return headers
+    if entry.etag is not None:
+      headers["If-None-Match"] = entry.etag
+    if entry.last_modified is not None:
+      headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+  def store(self, url: str, content: bytes, encoding: str, etag: str,
+            last_modified: str) -> None:
+    """Stores a page that was fetched with status 200
+
+    Args:
+      url: url of the page
+      content: the raw page
+      encoding: the encoding declared by the headers
+      etag: the ETag header, None if there was none
+      last_modified: the Last-Modified header, None if there was none
+
+    Returns:
+      None
+    """
+    content_hash = get_content_hash(content)
+    # the body is written without the lock and only published with the entry
+    file_descriptor, temporary_filename = tempfile.mkstemp(
+        dir=os.path.join(self.directory, "bodies"), suffix=".tmp")
+    try:
+      with os.fdopen(file_descriptor, "wb") as f:
+        f.write(content)
+      with self.lock:
+        old_entry = self.database.pop(url, None)
+        # keep the classification if the body did not change
+        classification = None
+        if old_entry is not None:
+          self.amount_bytes -= old_entry.size
+          if old_entry.content_hash == content_hash:
+            classification = old_entry.classification
+        os.replace(temporary_filename, self._body_filename(url))
+        self.database[url] = HTTPCacheEntry(etag, last_modified, encoding,
+                                            content_hash, classification,
+                                            len(content))
+        self.amount_bytes += len(content)
+        self._evict()
+    finally:
+      if os.path.exists(temporary_filename):
+        os.remove(temporary_filename)
+
+  def load_body(self, url: str) -> (bytes, str):
+    """Loads the cached body of a page, used after a 304 Not Modified
+
+    Args:
+      url: url of the page
+
+    Returns:
+      tuple of the raw page and its encoding, None if the page is not cached
+    """
+    with self.lock:
+      entry = self._get(url)
+    if entry is None:
+      return None
+    try:
+      with open(self._body_filename(url), "rb") as f:
+        content = f.read()
+    except FileNotFoundError:
+      return None
+    return content, entry.encoding
+
+  def remove(self, url: str) -> None:
+    """Drops a page from the cache, so it is requested without validators
+        again, used if its body got lost
+
+    Args:
+      url: url of the page
+
+    Returns:
+      None
+    """
+    with self.lock:
+      self._remove(url)
+
+  def get_classification(self, url: str, content_hash: str) -> dict:
+    """Returns the stored classification of a page if its body is unchanged
+
+    Args:
+      url: url of the page
+      content_hash: hash of the current body
+
+    Returns:
+      the classification result, None if there is none for this body
+    """
+    with self.lock:
+      entry = self.database.get(url)
+    if entry is None or entry.content_hash != content_hash:
+      return None
+    return entry.classification
+
+  def set_classification(self, url: str, content_hash: str,
+                         classification: dict) -> None:
+    """Stores the classification of a page body
+
+    Args:
+      url: url of the page
+      content_hash: hash of the classified body
+      classification: the classification result
+
+    Returns:
+      None
+    """
+    with self.lock:
+      entry = self.database.get(url)
+      if entry is not None and entry.content_hash == content_hash:
+        entry.classification = classification
+
+  def save(self) -> None:
+    """Writes the index of the cache to disk
+
+    Returns:
+      None
+    """
+    with self.lock:
+      document = {
+          url: {
+              "etag": entry.etag,
+              "last_modified": entry.last_modified,
+              "encoding": entry.encoding,
+              "content_hash": entry.content_hash,
+              "classification": entry.classification,
+              "size": entry.size
+          } for url, entry in self.database.items()
+      }
+    with open(os.path.join(self.directory, "index.json"), "w",
+              encoding="utf-8") as f:
+      json.dump(document, f)
+    self.logger.log_debug(self.name, "saved " + str(len(document)) + " entries")
+
+  def load(self) -> None:
+    """Loads the index of the cache from disk
+
+    Returns:
+      None
+    """
+    filename = os.path.join(self.directory, "index.json")
+    if not os.path.isfile(filename):
+      return
+    with open(filename, encoding="utf-8") as f:
+      document = json.load(f)
+    with self.lock:
+      # the index is saved least recently used first
+      for url, item in document.items():
+        old_entry = self.database.pop(url, None)
+        if old_entry is not None:
+          self.amount_bytes -= old_entry.size
+        # indexes of older versions don't know the size of the bodies
+        size = item.get("size")
+        if size is None:
+          filename = self._body_filename(url)
+          size = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        self.database[url] = HTTPCacheEntry(item["etag"], item["last_modified"],
+                                            item["encoding"],
+                                            item["content_hash"],
+                                            item["classification"], size)
+        self.amount_bytes += size
+      self._evict()
+    self.logger.log_info(self.name,
+                         "loaded " + str(len(document)) + " entries")
 
 
 class URLQueue():
-  """Contains the URLs that need to be crawled
+  """Contains the URLs that need to be crawled, the URLs are handed out best
+      first by their priority
 
   Attributes:
-    queue: the queue of URLs that will be crawled
+    queue: the frontier of URLs that will be crawled
+    depths: dictionary of the handed out URLs to their depth, until the
+              extractor asks for it
+    lock: lock that guards the depths
     logger: the custom_logging module to log all kinds of messages
 """
 
-  def __init__(self, logger: Logger, seed: [str]):
+  def __init__(self,
+               logger: Logger,
+               seed: [str],
+               frontier_db_file: str = FRONTIER_DB_FILE):
     """Inits URLQueue
 
     Args:
       logger: the custom logging module
       seed: list of urls that define the seed
+      frontier_db_file: database file of the sqlite frontier
     """
     self.name = "URLQueue"
-    self.queue = SetQueue()
+    if FRONTIER_BACKEND == "sqlite":
+      self.queue = SQLiteFrontier(frontier_db_file)
+    else:
+      self.queue = PriorityFrontier()
+    self.depths = {}
+    self.lock = threading.Lock()
     for url in seed:
-      self.queue.put((url, True))
+      url_record = get_url_record(url)
+      self.queue.put(url_record.url, True, 0, 0, url_record.target)
     self.logger = logger
     self.logger.log_info(self.name, "initialized")
 
-  def get_url(self) -> str:
-    """Returns a new URL from the queue
+  def get_url(self) -> (URLRecord, bool):
+    """Returns the URL with the best priority from the queue
+
+    The frontier only keeps the canonical url and the url that is requested, so
+    the record is created again once, when the url leaves the queue
 
     Returns:
-      A new URL from the queue
+      tuple (record of the url, is_seed), (None, None) if the queue is empty
     """
     self.logger.log_debug(self.name, "returning new URL")
-    if not self.queue.empty():
-      return self.queue.get()
-    else:
+    entry = self.queue.get()
+    if entry is None:
+      return None, None
+    url, is_seed, depth, target = entry
+    if depth > 0:
+      with self.lock:
+        self.depths[url] = depth
+    return get_url_record(url, True, target), is_seed
+
+  def peek_url(self) -> URLRecord:
+    """Returns the URL get_url would return next without removing it
+
+    Returns:
+      record of the url, None if the queue is empty
+    """
+    url = self.queue.peek()
+    if url is None:
       return None
+    return get_url_record(url, True)
 
-  def add_url(self, url: str) -> None:
+  def add_url(self,
+              url: URLRecord,
+              relative_distances: dict = None,
+              depth: int = 1) -> None:
     """Adds an URL to the queue but only if its not already in there
 
-    Since we are using a SetQueue we can add entries without checking
-    for duplicates
+    Since the frontier suppresses duplicates we can add entries without
+    checking for them, a URL that is found again keeps its best priority
 
     Args:
-      url: url that needs to be added
+      url: record of the url that needs to be added
+      relative_distances: relative distances of the page the url was found on,
+                            they decide the priority of the url
+      depth: amount of links between the seed and the url
 
     Returns:
       None
     """
-    self.logger.log_debug(self.name, "adding following URL to queue: " + url)
-    self.queue.put((url, False))
+    self.logger.log_debug(self.name,
+                          "adding following URL to queue: " + url.url)
+    self.queue.put(url.url, False, get_priority(relative_distances, depth),
+                   depth, url.target)
+
+  def pop_depth(self, url: str) -> int:
+    """Returns the depth of a URL that was handed out and forgets it
+
+    Args:
+      url: the url that was handed out
+
+    Returns:
+      amount of links between the seed and the url, 0 for seeds
+    """
+    with self.lock:
+      return self.depths.pop(url, 0)
 
   def is_empty(self) -> bool:
     """Checks if queue is empty
@@ -555,7 +1509,8 @@ class URLMap:
 
   Attributes:
     name: name of this instance for logging
-    url_map: the list of url paths
+    url_map: the list of url paths, it needs no lock since appending to and
+              slicing a list is atomic
     logger: instance of the custom logging module
   """
 
@@ -581,13 +1536,40 @@ class URLMap:
     """
     self.url_map.append({"url from": url_from, "url to": url_to})
 
+  def add_url_paths(self, url_from: str, urls_to: list[URLRecord]) -> None:
+    """Adds the paths to all urls extracted from one page at once
+
+    Args:
+      url_from: the url which was analized
+      urls_to: the records of the urls which were extracted from url_from
+
+    Returns:
+      None
+    """
+    paths = [{
+        "url from": url_from,
+        "url to": url_to.url
+    } for url_to in urls_to]
+    self.url_map.extend(paths)
+
+  def get_paths(self, start: int = 0) -> list[dict]:
+    """Returns the url paths in the order they were added
+
+    Args:
+      start: index of the first path to return
+
+    Returns:
+      list of the paths from start on
+    """
+    return self.url_map[start:]
+
   def to_json(self) -> str:
     """Returns the database in JSON format so it can be safed
 
     Returns:
       string of the database in JSON format
     """
-    return json.dumps(self.url_map)
+    return json.dumps(self.url_map[:])
 
   def draw_map(self, filename: str) -> None:
     """Draws the map of all URL conections, the png file is stored in the
@@ -600,6 +1582,7 @@ class URLMap:
       None
     """
     url_to_object = {}
+    url_map = self.url_map[:]
     self.logger.log_debug(self.name, "Generating url map")
     # Opening up a new file to create diagram
     with Diagram(outformat="svg", graph_attr={"bgcolor": "white"},
@@ -608,7 +1591,7 @@ class URLMap:
       # https://github.com/mingrammer/diagrams/issues/8
       diag.dot.renderer = "cairo"
       # transform all urls into diagram objects
-      for entry in self.url_map:
+      for entry in url_map:
         if entry["url from"] not in url_to_object:
           if len(entry["url from"]) > DIAGRAMM_MAX_URL_LENGTH:
             url_to_object[entry["url from"]] = ECS(entry["url from"][:30] +
@@ -621,7 +1604,7 @@ class URLMap:
           else:
             url_to_object[entry["url to"]] = ECS(entry["url to"])
       # connect all the urls
-      for entry in self.url_map:
+      for entry in url_map:
         url_to_object[entry["url from"]] >> url_to_object[entry["url to"]]
 
     # since we use cairo as renderer, we now have to rename the file
@@ -1,19 +1,17 @@
 """A collection of useful tools
 """
-import re
 from urllib.parse import urlparse
 import numpy as np
-import requests
 import json
 from math import floor
 
-DOMAIN_PLUS_TLD_FORMAT = re.compile(r"[^.]+\.[^.]+$")
-MAIN_DOMAIN_ONLY_FORMAT = re.compile(r"([^.]+)\.[^.]+$")
+from src.crawler_bot.fetching import get_session_pool
+from src.crawler_bot.public_suffix import get_main_domain, get_registrable_domain
 
 
 def extract_main_domain(url: str) -> str:
   """Extracts the domain out of an URL
-      Example: www.google.de -> google
+      Example: www.google.co.uk -> google
 
   Args:
     url: string of the url
@@ -21,19 +19,15 @@ def extract_main_domain(url: str) -> str:
   Returns:
     domain as string
   """
-  netloc = urlparse(url).netloc
-  x = re.search(MAIN_DOMAIN_ONLY_FORMAT, netloc)
-  try:
-    result = x.group(1)
-    return result
-  except:
+  result = get_main_domain(urlparse(url).netloc)
+  if result is None:
     print("problem with " + str(url))
-    return None
+  return result
 
 
 def extract_main_domain_plus_tld(url: str) -> str:
-  """Extracts the domain plus TLD from an URL
-      Example: www.google.de -> google.de
+  """Extracts the domain plus TLD from an URL, the TLD is the public suffix
+      Example: www.google.co.uk -> google.co.uk
 
   Args:
     url: string of the url
@@ -41,14 +35,10 @@ def extract_main_domain_plus_tld(url: str) -> str:
   Returns:
     domain plus TLD as string
   """
-  netloc = urlparse(url).netloc
-  x = re.search(DOMAIN_PLUS_TLD_FORMAT, netloc)
-  try:
-    result = x.group()
-    return result
-  except:
+  result = get_registrable_domain(urlparse(url).netloc)
+  if result is None:
     print("problem with " + str(url))
-    return None
+  return result
 
 
 def unit_vector(vector):
@@ -162,7 +152,7 @@ def download_url_list(url_list: dict) -> dict:
       try:
         print_progress_bar(i, amount_urls)
 
-        x = requests.get(
+        x = get_session_pool().get(
             url,
             headers={
                 "User-Agent":
@@ -0,0 +1,160 @@
+"""Module that filters the links of a page down to the valid urls that are not
+on the blacklist
+
+Every link is resolved against the url of its page and parsed once. Domains
+are checked with set lookups and extensions with a single suffix check, the
+expensive domain format and the registrable domain of a host are only
+determined once.
+"""
+from functools import lru_cache
+import re
+from urllib.parse import urljoin, urlparse, ParseResult
+
+from src.crawler_bot.custom_logging import Logger
+from src.crawler_bot.public_suffix import get_main_domain, get_registrable_domain
+from src.crawler_bot.url_record import URLRecord, get_url_record
+
+DOMAIN_FORMAT = re.compile(
+    r"(?:^(\w{1,255}):(.{1,255})@|^)"  # http basic authentication [optional]
+    r"(?:(?:(?=\S{0,253}(?:$|:))"  # check full domain length to be less than or equal to 253 (starting after http basic auth, stopping before port)
+    r"((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+"  # check for at least one subdomain (maximum length per subdomain: 63 characters), dashes in between allowed
+    r"(?:[a-z0-9]{1,63})))"  # check for top level domain, no dashes allowed
+    r"|localhost)"  # accept also "localhost" only
+    r"(:\d{1,5})?",  # port [optional]
+    re.IGNORECASE)
+SCHEME_FORMAT = re.compile(
+    r"^(http|hxxp|ftp|fxp)s?$",  # scheme: http(s) or ftp(s)
+    re.IGNORECASE)
+# links that start with a protocol, like mailto:, javascript: etc.
+PROTOCOL_FORMAT = re.compile(r"[a-zA-Z]+:")
+# max length of a valid url
+MAX_URL_LENGTH = 2048
+# amount of hosts whose domain format check is cached
+DOMAIN_FORMAT_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=DOMAIN_FORMAT_CACHE_SIZE)
+def has_valid_domain_format(netloc: str) -> bool:
+  """Checks if a network location is a well formed domain
+
+  Args:
+    netloc: the network location of the url
+
+  Returns:
+    bool that shows if the network location is well formed
+  """
+  return DOMAIN_FORMAT.fullmatch(netloc) is not None
+
+
+class URLFilter:
+  """Turns the links of a page into the records of the urls worth queueing
+
+  A link is kept if it is a valid http(s) or ftp(s) url, either as it is or
+  relative to the page, and neither its main domain, its main domain plus TLD
+  nor its extension is on the blacklist.
+
+  Attributes:
+    name: name of this instance for logging
+    logger: the custom_logging module to log all kinds of messages
+    main_domains: set of the blacklisted main domains
+    main_domains_plus_tlds: set of the blacklisted main domains plus TLDs
+    extensions: tuple of the blacklisted extensions
+"""
+
+  def __init__(self, logger: Logger, blacklist: dict):
+    """Inits URLFilter
+
+    Args:
+      logger: the custom logging module
+      blacklist: dictionary of the blacklisted main_domains,
+                  main_domains+tlds and extensions
+    """
+    self.name = "URLFilter"
+    self.logger = logger
+    self.main_domains = frozenset(blacklist["main_domains"])
+    self.main_domains_plus_tlds = frozenset(blacklist["main_domains+tlds"])
+    self.extensions = tuple(a for a in blacklist["extensions"] if a != "")
+
+    self.logger.log_debug(self.name, "initialized")
+
+  def parse_valid_url(self, url: str) -> ParseResult:
+    """Parses a url if it is valid
+
+    Args:
+      url: the url
+
+    Returns:
+      the parsed url, None if the url is not valid
+    """
+    if len(url) > MAX_URL_LENGTH:
+      return None
+    parsed_url = urlparse(url)
+    if (parsed_url.scheme == "" or
+        SCHEME_FORMAT.fullmatch(parsed_url.scheme) is None or
+        parsed_url.netloc == "" or
+        not has_valid_domain_format(parsed_url.netloc)):
+      return None
+    return parsed_url
+
+  def is_on_blacklist(self, parsed_url: ParseResult) -> bool:
+    """Checks if the main domain, the main domain plus TLD or the extension of a
+        url is on the blacklist
+
+    Example:
+      www.google.co.uk -> main domain google, main domain plus TLD google.co.uk
+
+    Args:
+      parsed_url: the parsed url
+
+    Returns:
+      bool that shows if the url is on the blacklist
+    """
+    domain = get_registrable_domain(parsed_url.netloc)
+    if domain is not None and (domain in self.main_domains_plus_tlds or
+                               get_main_domain(parsed_url.netloc)
+                               in self.main_domains):
+      return True
+    return parsed_url.path.endswith(self.extensions)
+
+  def filter_urls(self, hrefs: list[str], base_url: str) -> list[URLRecord]:
+    """Filters the links of a page
+
+    Args:
+      hrefs: the stripped href properties of all a elements of the page
+      base_url: the url relative links are resolved against, the url the page
+                  was received from or its <base href>, not its canonical
+                  form, which drops trailing slashes and index documents
+
+    Returns:
+      list of the records of the kept urls without duplicates
+    """
+    urls = {}
+    for href in dict.fromkeys(hrefs):
+      # remove all hrefs that are empty, just anchors (#) or refer to other
+      # protocols like fttp://, mailto:, javascript: etc.
+      if href == "" or href[0] == "#":
+        continue
+      if (len(href) >= 5 and href[:4] != "http" and
+          PROTOCOL_FORMAT.match(href) is not None):
+        continue
+
+      # relative links, including ../x, ?q=1 and //host/x, are resolved like a
+      # browser does it, absolute links stay as they are
+      url = urljoin(base_url, href)
+      parsed_url = self.parse_valid_url(url)
+      if parsed_url is None:
+        continue
+
+      if self.is_on_blacklist(parsed_url):
+        continue
+      # the canonical form identifies the url from here on, the resolved url
+      # is kept as the one that is requested, the record is created once and
+      # handed through the whole crawler
+      url_record = get_url_record(url)
+      urls.setdefault(url_record.url, url_record)
+
+    urls = list(urls.values())
+    self.logger.log_debug(
+        self.name, "kept " + str(len(urls)) + " of " + str(len(hrefs)) +
+        " links of " + base_url)
+    return urls
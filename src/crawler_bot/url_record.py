@@ -0,0 +1,94 @@
+"""Module that contains the url record, the parsed canonical form of a url
+
+A record is created once when a url is discovered and handed through queue,
+scheduler, retriever, robots.txt database and crawled urls, so none of them
+has to parse the url again. The canonical form identifies the url, the url as
+it was discovered is the one that is requested, since servers may route on the
+parts the canonical form drops or reorders.
+"""
+from urllib.parse import urldefrag, urlsplit
+
+from src.crawler_bot.canonicalization import canonicalize_url, get_url_fingerprint
+from src.crawler_bot.public_suffix import get_host, get_registrable_domain
+
+
+class URLRecord:
+  """Immutable parsed canonical url
+
+  Attributes:
+    url: the canonical url
+    scheme: scheme of the url
+    host: network location of the url, including the port
+    domain: registrable domain of the host, the host itself if it has none
+    path: path of the url
+    fingerprint: stable 64 bit fingerprint of the url
+    target: the url as it was discovered without its fragment, it is the one
+              that is requested
+"""
+
+  __slots__ = ("url", "scheme", "host", "domain", "path", "fingerprint",
+               "target")
+
+  def __init__(self, url: str, scheme: str, host: str, domain: str, path: str,
+               fingerprint: int, target: str):
+    """Inits URLRecord, get_url_record creates a record from a url
+
+    Args:
+      url: the canonical url
+      scheme: scheme of the url
+      host: network location of the url, including the port
+      domain: registrable domain of the host, the host itself if it has
+              none
+      path: path of the url
+      fingerprint: stable 64 bit fingerprint of the url
+      target: the url as it was discovered without its fragment
+    """
+    for name, value in zip(
+        self.__slots__,
+        (url, scheme, host, domain, path, fingerprint, target)):
+      object.__setattr__(self, name, value)
+
+  def __setattr__(self, name: str, value) -> None:
+    """Records are shared between threads, so they can't be changed"""
+    raise AttributeError("URLRecord is immutable")
+
+  def __delattr__(self, name: str) -> None:
+    """Records are shared between threads, so they can't be changed"""
+    raise AttributeError("URLRecord is immutable")
+
+  def __reduce__(self) -> tuple:
+    """Pickles the fields as they are, so records sent to other processes are
+        not parsed again"""
+    return URLRecord, tuple(getattr(self, name) for name in self.__slots__)
+
+  def __repr__(self) -> str:
+    """Returns the representation of the record"""
+    return "URLRecord(" + repr(self.url) + ")"
+
+
+def get_url_record(url: str,
+                   is_canonical: bool = False,
+                   target: str = None) -> URLRecord:
+  """Parses a url into a record
+
+  Args:
+    url: the url
+    is_canonical: True if the url is in its canonical form already, e.g.
+                    because it was stored as such
+    target: the url as it was discovered, None to request the given url
+
+  Returns:
+    the record of the canonical form of the url
+  """
+  if target is None:
+    target = url.strip()
+  target = urldefrag(target)[0]
+  if not is_canonical:
+    url = canonicalize_url(url)
+  parsed_url = urlsplit(url)
+  # politeness and sharding need a domain for every url, like localhost
+  domain = get_registrable_domain(parsed_url.netloc)
+  if domain is None:
+    domain = get_host(parsed_url.netloc)
+  return URLRecord(url, parsed_url.scheme, parsed_url.netloc, domain,
+                   parsed_url.path, get_url_fingerprint(url, True), target)
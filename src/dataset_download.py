@@ -5,10 +5,14 @@ This is NOT needed for running the crawler but rather for creating new ground
 
 The url list has to be a csv file (url, category), first line will be ignored
 
+Run from the repository root:
+
+  python -m src.dataset_download
+
 """
 import timeit
 from time import strftime, gmtime
-from crawler_bot.tools import load_url_list, download_url_list
+from src.crawler_bot.tools import load_url_list, download_url_list
 import json
 
 ################################################################################
@@ -0,0 +1,69 @@
+"""This script reports how many fetches of a previous crawl were duplicates,
+i.e. urls whose canonical form was already crawled before
+
+The crawled urls and the url map are read from the output files of a crawl,
+they are the same files a crawl with canonicalization writes. Run from the
+repository root:
+
+  python -m src.duplicate_report
+"""
+import json
+
+from src.crawler_bot.canonicalization import canonicalize_url
+
+################################################################################
+crawled_urls_file = "assets/20221209_065638_crawled_urls.json"
+url_map_file = "assets/20221209_065638_url_map.json"
+amount_examples = 10
+################################################################################
+
+
+def group_by_canonical_form(urls: list[str]) -> dict:
+  """Groups urls by their canonical form
+
+  Args:
+    urls: list of urls
+
+  Returns:
+    dictionary of the canonical forms to the list of their variants
+  """
+  groups = {}
+  for url in urls:
+    groups.setdefault(canonicalize_url(url), []).append(url)
+  return groups
+
+
+def print_report(name: str, urls: list[str]) -> None:
+  """Prints the amount of duplicates and the largest groups of variants
+
+  Args:
+    name: description of the urls
+    urls: list of urls
+
+  Returns:
+    None
+  """
+  groups = group_by_canonical_form(urls)
+  duplicates = len(urls) - len(groups)
+  print(name)
+  print("  urls:            " + str(len(urls)))
+  print("  canonical urls:  " + str(len(groups)))
+  if urls:
+    print("  duplicates:      " + str(duplicates) + " (" +
+          str(round(duplicates / len(urls) * 100, 1)) + "%)")
+  largest_groups = sorted(groups.items(), key=lambda a: -len(a[1]))
+  for canonical_url, variants in largest_groups[:amount_examples]:
+    if len(variants) < 2:
+      break
+    print("  " + canonical_url + " (" + str(len(variants)) + " variants)")
+    for variant in sorted(set(variants)):
+      print("    " + variant)
+
+
+with open(crawled_urls_file, encoding="utf-8") as f:
+  crawled_urls = json.load(f)
+print_report("crawled urls", crawled_urls)
+
+with open(url_map_file, encoding="utf-8") as f:
+  url_map = json.load(f)
+print_report("discovered links", [a["url to"] for a in url_map])
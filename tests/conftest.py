@@ -0,0 +1,15 @@
+"""Fixtures shared by the tests, run them from the repository root with
+
+  python -m pytest tests
+"""
+import pytest
+
+from src.crawler_bot.custom_logging import Logger, LogLevel
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch) -> Logger:
+  """Logger that writes its log file into a temporary directory"""
+  monkeypatch.chdir(tmp_path)
+  with Logger(LogLevel.CRITICAL, "test") as test_logger:
+    yield test_logger
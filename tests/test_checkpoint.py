@@ -0,0 +1,59 @@
+"""Tests of the checkpoints of a crawl"""
+import time
+
+from src.crawler_bot.checkpoint import Checkpointer
+from src.crawler_bot.config import CIRCUIT_BREAKER_THRESHOLD
+from src.crawler_bot.near_duplicates import NearDuplicateIndex
+from src.crawler_bot.scheduling import PolitenessScheduler
+from src.crawler_bot.storage import CrawledURLs, DomainTimers, HTMLDatabase, RobotsTXTDatabase, UnprocessedHTMLDatabase, URLMap, URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+
+def create_crawl(logger) -> tuple:
+  """Creates the storage, scheduler and checkpointer of a crawl in the
+      current directory"""
+  html_database = HTMLDatabase(logger)
+  url_queue = URLQueue(logger, [])
+  scheduler = PolitenessScheduler(logger, url_queue, DomainTimers(logger),
+                                  html_database)
+  near_duplicate_index = NearDuplicateIndex(logger)
+  checkpointer = Checkpointer(logger, "checkpoint", CrawledURLs(logger),
+                              html_database, URLMap(logger),
+                              UnprocessedHTMLDatabase(logger),
+                              RobotsTXTDatabase(logger), None, "robots.json",
+                              near_duplicate_index)
+  return checkpointer, scheduler, url_queue, near_duplicate_index
+
+
+def test_resume_restores_the_scheduler_and_near_duplicates(logger, capsys):
+  checkpointer, scheduler, url_queue, near_duplicate_index = create_crawl(
+      logger)
+  url_queue.add_url(get_url_record("https://ok.com/"), {"x": 0}, 0)
+  url, _ = scheduler.get_url()
+  scheduler.release(url, 0)
+  for i in range(CIRCUIT_BREAKER_THRESHOLD):
+    scheduler.record_failure(get_url_record("https://failing.com/" + str(i)),
+                             "status code 503")
+  with scheduler.lock:
+    scheduler._drop_domain("pruned.com", "yield of 0.0 after 20 pages")  # pylint: disable=protected-access
+  near_duplicate_index.add(12345, "https://ok.com/", {"relevant": True})
+  checkpointer.start(scheduler)
+  checkpointer.save()
+  checkpointer.stop()
+  state = scheduler.get_state()
+
+  checkpointer, scheduler, url_queue, near_duplicate_index = create_crawl(
+      logger)
+  checkpointer.resume([])
+  checkpointer.restore_scheduler(scheduler)
+  capsys.readouterr()
+
+  assert scheduler.get_state() == state
+  assert scheduler.fetched == {"ok.com": 1}
+  assert scheduler.health["failing.com"].openings == 1
+  assert scheduler.health["failing.com"].open_until > time.time()
+  assert scheduler.dead_domains == {"pruned.com"}
+  assert scheduler.get_pruning_report()[0]["domain"] == "pruned.com"
+  assert near_duplicate_index.find(12345) == ("https://ok.com/", {
+      "relevant": True
+  })
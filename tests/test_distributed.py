@@ -0,0 +1,40 @@
+"""Tests of the sharded crawl"""
+import multiprocessing
+import os
+
+import pytest
+
+from src.crawler_bot.distributed import Coordinator, get_authkey, get_shard
+from src.crawler_bot.url_record import get_url_record
+
+
+def test_urls_without_domain_are_sharded_by_host():
+  url = get_url_record("http://localhost:8080/a")
+  other_url = get_url_record("http://localhost:8080/b")
+
+  assert get_shard(url, 4) == get_shard(other_url, 4)
+  assert 0 <= get_shard(url, 4) < 4
+
+
+def test_coordinator_aborts_if_a_shard_process_ends(logger):
+  coordinator = Coordinator(logger, 2, ("localhost", 0), os.urandom(32))
+  process = multiprocessing.get_context("spawn").Process(target=int)
+  process.start()
+  process.join()
+
+  with pytest.raises(RuntimeError):
+    coordinator.run([process])
+
+
+def test_reachable_coordinator_needs_a_secret(monkeypatch):
+  monkeypatch.delenv("THREATCRAWL_SHARD_AUTHKEY", raising=False)
+
+  assert len(get_authkey("localhost", True)) == 32
+  with pytest.raises(ValueError):
+    get_authkey("0.0.0.0", True)
+  with pytest.raises(ValueError):
+    get_authkey("localhost", False)
+
+  monkeypatch.setenv("THREATCRAWL_SHARD_AUTHKEY", "threatcrawl")
+  with pytest.raises(ValueError):
+    get_authkey("0.0.0.0", True)
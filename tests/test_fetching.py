@@ -0,0 +1,125 @@
+"""Tests of the fetching of pages: stopped downloads, DNS cache and decoding"""
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+from urllib3.exceptions import NewConnectionError
+
+from src.crawler_bot import fetching
+
+
+class TricklingHandler(http.server.BaseHTTPRequestHandler):
+  """Sends an html page a few bytes at a time, each well within the read
+      timeout"""
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    self.send_response(200)
+    self.send_header("Content-Type", "text/html")
+    self.send_header("Connection", "close")
+    self.end_headers()
+    try:
+      for _ in range(50):
+        self.wfile.write(b"<p>a</p>")
+        self.wfile.flush()
+        time.sleep(0.1)
+    except OSError:
+      pass
+
+  def log_message(self, *args):
+    pass
+
+
+@pytest.fixture
+def trickling_server():
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), TricklingHandler)
+  server.daemon_threads = True
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  yield "http://127.0.0.1:" + str(server.server_address[1]) + "/"
+  server.shutdown()
+  server.server_close()
+
+
+def test_trickling_server_is_aborted_at_the_deadline(trickling_server,
+                                                     monkeypatch):
+  monkeypatch.setattr(fetching, "FETCH_DEADLINE", 0.5)
+  started_at = time.monotonic()
+
+  with pytest.raises(fetching.FetchAborted):
+    with fetching.get_session_pool().get(trickling_server,
+                                         stream=True,
+                                         timeout=5) as response:
+      fetching.read_body(response, started_at)
+
+  # one read of the trickle returns after a single packet, not after 5s
+  assert time.monotonic() - started_at < 1.5
+
+
+def test_dns_cache_is_bounded_and_expires(monkeypatch):
+  lookups = []
+
+  def getaddrinfo(host, port, *args):
+    lookups.append(host)
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+  monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+  dns_cache = fetching.DNSCache(60, max_hosts=2)
+
+  assert dns_cache.resolve("a.com", 80) == ["10.0.0.1"]
+  dns_cache.resolve("b.com", 80)
+  dns_cache.resolve("a.com", 80)
+  dns_cache.resolve("c.com", 80)
+  assert lookups == ["a.com", "b.com", "c.com"]
+  # b.com was used least recently
+  assert list(dns_cache.cache) == [("a.com", 80), ("c.com", 80)]
+
+  dns_cache.ttl = 0
+  dns_cache.resolve("a.com", 80)
+  assert lookups[-1] == "a.com"
+
+
+def test_host_without_addresses_fails_to_connect(monkeypatch):
+  monkeypatch.setattr(socket, "getaddrinfo", lambda *args: [])
+  connection = fetching.DNSCachingHTTPConnection(
+      "a.com", 80, dns_cache=fetching.DNSCache(60))
+
+  with pytest.raises(NewConnectionError):
+    connection.connect()
+
+
+@pytest.mark.parametrize("content_type, encoding", [
+    ("text/html; charset=ISO-8859-1", "ISO-8859-1"),
+    ("text/html;charset=\"utf-8\"", "utf-8"),
+    ("text/html; boundary=x; Charset='koi8-r'", "koi8-r"),
+    ("text/html", None),
+    ("text/html; charset=", None),
+    (None, None),
+])
+def test_charset_is_taken_from_the_content_type(content_type, encoding):
+  assert fetching.get_declared_encoding(content_type) == encoding
+
+
+GREEK_PAGE = ("<html><head><meta charset='iso-8859-7'></head>"
+              "<body>αβγ</body></html>")
+
+
+@pytest.mark.parametrize("content, encoding, text", [
+    # the header wins over the meta tag
+    ("<meta charset='windows-1252'><p>é</p>".encode("utf-8"), "utf-8", "é"),
+    (GREEK_PAGE.encode("iso-8859-7"), None, "αβγ"),
+    ("<meta http-equiv='Content-Type' content='text/html; charset=koi8-r'>"
+     "<p>да</p>".encode("koi8-r"), None, "да"),
+    # unknown charsets are skipped
+    (GREEK_PAGE.encode("iso-8859-7"), "x-unknown", "αβγ"),
+    ("<meta charset='x-unknown'><p>é</p>".encode("utf-8"), None, "é"),
+    ("<p>é</p>".encode("utf-8"), None, "é"),
+    # no valid utf-8 and no declared charset
+    ("<p>é</p>".encode("windows-1252"), None, "é"),
+])
+def test_html_is_decoded_with_its_declared_charset(content, encoding, text):
+  assert text in fetching.decode_html(content, encoding)
+
+
+def test_invalid_bytes_of_the_declared_charset_are_replaced():
+  assert fetching.decode_html(b"<p>a\xffb</p>", "utf-8") == "<p>a�b</p>"
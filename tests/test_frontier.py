@@ -0,0 +1,160 @@
+"""Tests of the frontiers that decide in which order the urls are crawled"""
+import random
+import sqlite3
+
+import pytest
+
+from src.crawler_bot.frontier import PriorityFrontier, SQLiteFrontier
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def frontier(request, tmp_path):
+  if request.param == "memory":
+    return PriorityFrontier()
+  return SQLiteFrontier(str(tmp_path / "frontier.sqlite3"),
+                        head_size=2,
+                        batch_size=3)
+
+
+def get_all(frontier) -> list[str]:
+  """Empties the frontier and returns its urls in the order they are handed
+      out"""
+  urls = []
+  while not frontier.empty():
+    urls.append(frontier.get()[0])
+  assert frontier.get() is None
+  return urls
+
+
+def get_rows(filename: str) -> dict[str, tuple]:
+  """Reads the rows of the frontier database with a connection of its own"""
+  connection = sqlite3.connect(filename)
+  try:
+    return {
+        a[0]: a[1:] for a in connection.execute(
+            "SELECT url, priority, is_seed, depth, target FROM frontier")
+    }
+  finally:
+    connection.close()
+
+
+def test_best_priority_is_handed_out_first(frontier):
+  frontier.put("https://example.com/c", False, 3, 1)
+  frontier.put("https://example.com/a", True, 1, 0)
+  frontier.put("https://example.com/b", False, 2, 1)
+  # same priority: the url that was added first wins
+  frontier.put("https://example.com/d", False, 2, 1)
+
+  assert frontier.peek() == "https://example.com/a"
+  assert len(frontier) == 4
+  assert get_all(frontier) == [
+      "https://example.com/a", "https://example.com/b", "https://example.com/d",
+      "https://example.com/c"
+  ]
+
+
+def test_waiting_url_only_keeps_a_better_priority(frontier):
+  frontier.put("https://example.com/a", False, 2, 1)
+  frontier.put("https://example.com/b", False, 3, 2,
+               "https://example.com/b/index.html")
+  frontier.put("https://example.com/a", False, 5, 3)
+  frontier.put("https://example.com/b", False, 1, 1)
+
+  assert len(frontier) == 2
+  assert frontier.get() == ("https://example.com/b", False, 1,
+                            "https://example.com/b")
+  assert frontier.get() == ("https://example.com/a", False, 1,
+                            "https://example.com/a")
+  assert frontier.empty()
+
+
+def test_handed_out_url_can_be_added_again(frontier):
+  frontier.put("https://example.com/a", False, 1, 1)
+  frontier.get()
+  frontier.put("https://example.com/a", False, 2, 1)
+
+  assert get_all(frontier) == ["https://example.com/a"]
+
+
+def test_head_holds_only_the_best_urls_and_order_stays_exact(tmp_path):
+  frontier = SQLiteFrontier(str(tmp_path / "frontier.sqlite3"),
+                            head_size=5,
+                            batch_size=7)
+  priorities = list(range(200))
+  random.Random(1).shuffle(priorities)
+  for priority in priorities:
+    frontier.put("https://example.com/" + str(priority), False, priority, 1)
+    assert len(frontier.head_entries) <= 2 * frontier.head_size
+
+  urls = []
+  while not frontier.empty():
+    urls.append(frontier.get()[0])
+    assert len(frontier.head_entries) <= 2 * frontier.head_size
+  assert urls == ["https://example.com/" + str(a) for a in range(200)]
+
+
+def test_head_limit_keeps_better_urls_in_the_head(tmp_path):
+  frontier = SQLiteFrontier(str(tmp_path / "frontier.sqlite3"),
+                            head_size=2,
+                            batch_size=100)
+  for priority in range(5):
+    frontier.put("https://example.com/" + str(priority), False, priority, 1)
+  # twice head_size urls are trimmed to the two best, the others are only in
+  # the database
+  assert set(frontier.head_entries) == {
+      "https://example.com/0", "https://example.com/1"
+  }
+  assert frontier.head_limit == 1
+  assert frontier.get()[0] == "https://example.com/0"
+
+  frontier.put("https://example.com/better", False, 0.5, 1)
+  frontier.put("https://example.com/worse", False, 10, 1)
+  assert "https://example.com/better" in frontier.head_entries
+  assert "https://example.com/worse" not in frontier.head_entries
+  assert get_all(frontier) == [
+      "https://example.com/better", "https://example.com/1",
+      "https://example.com/2", "https://example.com/3",
+      "https://example.com/4", "https://example.com/worse"
+  ]
+
+
+def test_changes_are_written_in_batches(tmp_path):
+  filename = str(tmp_path / "frontier.sqlite3")
+  frontier = SQLiteFrontier(filename, head_size=10, batch_size=3)
+
+  frontier.put("https://example.com/a", True, 1, 0)
+  frontier.put("https://example.com/b", False, 2, 1)
+  assert get_rows(filename) == {}
+  frontier.put("https://example.com/c", False, 3, 1)
+  assert len(get_rows(filename)) == 3
+
+  frontier.get()
+  frontier.get()
+  assert len(get_rows(filename)) == 3
+  frontier.put("https://example.com/d", False, 4, 1)
+  frontier.get()
+  # the third handed out url completes the batch of deletes
+  assert set(get_rows(filename)) == {"https://example.com/d"}
+
+
+def test_waiting_urls_are_kept_in_the_database_file(tmp_path):
+  filename = str(tmp_path / "frontier.sqlite3")
+  frontier = SQLiteFrontier(filename, head_size=10, batch_size=100)
+  frontier.put("https://example.com/a", True, 1, 0)
+  frontier.put("https://example.com/b", False, 2.5, 3,
+               "https://example.com/b/index.html")
+  frontier.put("https://example.com/c", False, 3, 1)
+  frontier.get()
+
+  # counting the urls writes the collected changes
+  assert len(frontier) == 2
+  frontier.connection.close()
+  assert get_rows(filename) == {
+      "https://example.com/b": (2.5, 0, 3, "https://example.com/b/index.html"),
+      "https://example.com/c": (3, 0, 1, None)
+  }
+
+  # the frontier is rebuilt from the seed or a checkpoint on every start
+  reopened = SQLiteFrontier(filename, head_size=10, batch_size=100)
+  assert reopened.empty()
+  assert get_rows(filename) == {}
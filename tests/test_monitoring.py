@@ -0,0 +1,74 @@
+"""Tests of the global monitor"""
+import threading
+
+from src.crawler_bot.monitoring import GlobalMonitor, ThreadState
+
+
+def test_slow_check_for_work_neither_blocks_nor_misses_work(logger):
+  # the second retriever keeps running, so the crawl isn't quiescent
+  monitor = GlobalMonitor(logger, num_retrievers=2, num_extractors=0)
+  work = []
+  checking = threading.Event()
+  checked = threading.Event()
+
+  def has_work():
+    # like a frontier on disk that answers after work was added
+    result = bool(work)
+    checking.set()
+    checked.wait(5)
+    return result
+
+  results = []
+  thread = threading.Thread(target=lambda: results.append(
+      monitor.wait_for_work(monitor.retriever_condition, has_work)),
+                            daemon=True)
+  thread.start()
+  assert checking.wait(5)
+
+  work.append("https://example.com/")
+  notifier = threading.Thread(target=monitor.notify_retrievers, daemon=True)
+  notifier.start()
+  notifier.join(1)
+  finished = not notifier.is_alive()
+  checked.set()
+  thread.join(5)
+
+  assert finished
+  assert results == [True]
+
+
+def test_crawl_finishes_once_no_thread_has_work(logger):
+  monitor = GlobalMonitor(logger, num_retrievers=1, num_extractors=1)
+  monitor.extractor_stop(ThreadState.RUNNING)
+
+  assert not monitor.wait_for_work(monitor.retriever_condition, lambda: False)
+  assert monitor.finished
+
+
+def test_slow_timeout_neither_blocks_nor_misses_a_released_url(logger):
+  monitor = GlobalMonitor(logger, num_retrievers=2, num_extractors=0)
+  calculating = threading.Event()
+  calculated = threading.Event()
+
+  def get_timeout():
+    # like a scheduler that reads the frontier on disk
+    calculating.set()
+    calculated.wait(5)
+    return 60
+
+  thread = threading.Thread(target=monitor.wait_for_next_url,
+                            args=(get_timeout,),
+                            daemon=True)
+  thread.start()
+  assert calculating.wait(5)
+
+  notifier = threading.Thread(target=monitor.notify_retrievers, daemon=True)
+  notifier.start()
+  notifier.join(1)
+  finished = not notifier.is_alive()
+  calculated.set()
+  # the url released while the timeout was calculated wakes the retriever
+  thread.join(5)
+
+  assert finished
+  assert not thread.is_alive()
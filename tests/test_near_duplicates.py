@@ -0,0 +1,142 @@
+"""Tests of the near-duplicate detection by SimHash"""
+import os
+import random
+import shutil
+
+import pytest
+
+from src.crawler_bot import monitoring, storage
+from src.crawler_bot.near_duplicates import MIN_WORDS, NearDuplicateIndex, get_hamming_distance, get_simhash
+
+ASSETS = os.path.join(os.path.dirname(__file__), "..", "assets")
+BASE_HASH = 0x0123456789ABCDEF
+
+
+def get_words(seed: int, amount: int = 300) -> list[str]:
+  """Returns random words of a vocabulary that is big enough for unique
+      shingles"""
+  words = random.Random(seed)
+  return ["word" + str(words.randrange(2000)) for _ in range(amount)]
+
+
+def flip_bits(simhash: int, bits: list[int]) -> int:
+  """Returns the SimHash with the given bits flipped"""
+  for bit in bits:
+    simhash ^= 1 << bit
+  return simhash
+
+
+def test_similar_texts_have_close_simhashes():
+  words = get_words(1)
+  changed = list(words)
+  changed[150] = "changed"
+
+  simhash = get_simhash(" ".join(words))
+  assert get_simhash(" ".join(words).upper() + " !") == simhash
+  assert get_hamming_distance(simhash, get_simhash(" ".join(changed))) <= 3
+  assert get_hamming_distance(simhash, get_simhash(" ".join(get_words(2)))) > 3
+  assert get_simhash(" ".join(words[:MIN_WORDS - 1])) is None
+
+
+def test_only_hashes_within_the_max_distance_are_near_duplicates(logger):
+  index = NearDuplicateIndex(logger, max_distance=3)
+  index.add(BASE_HASH, "https://example.com/a", {"relevant": True})
+
+  assert index.find(flip_bits(BASE_HASH, [0, 1, 2])) == ("https://example.com/a",
+                                                          {"relevant": True})
+  assert index.find(flip_bits(BASE_HASH, [0, 1, 2, 3])) is None
+  assert index.get_hit_rate() == 0.5
+
+
+def test_closest_near_duplicate_is_found(logger):
+  index = NearDuplicateIndex(logger, max_distance=3)
+  index.add(flip_bits(BASE_HASH, [5, 40]), "https://example.com/far", {})
+  index.add(flip_bits(BASE_HASH, [63]), "https://example.com/close", {})
+
+  assert index.find(BASE_HASH)[0] == "https://example.com/close"
+  assert [a[1] for a in index.get_entries(1)] == ["https://example.com/close"]
+
+
+def test_banded_lookup_finds_every_near_duplicate(logger):
+  index = NearDuplicateIndex(logger, max_distance=3)
+  assert index.band_size == 16
+  # one flipped bit in three of the four bands, the last band is shared
+  near_duplicate = flip_bits(BASE_HASH, [0, 16, 32])
+  assert len(set(index._get_bands(BASE_HASH)) &  # pylint: disable=protected-access
+             set(index._get_bands(near_duplicate))) == 1  # pylint: disable=protected-access
+  index.add(BASE_HASH, "https://example.com/a", {})
+  assert index.find(near_duplicate) is not None
+
+  bits = random.Random(1)
+  for _ in range(200):
+    flipped = bits.sample(range(64), bits.randint(0, 3))
+    assert index.find(flip_bits(BASE_HASH, flipped)) is not None
+  # a hash that differs in every band shares no band to be compared in
+  assert index.find(flip_bits(BASE_HASH, [0, 16, 32, 48])) is None
+
+
+class FakeClassifier:
+  """Classifies every page as relevant and counts the classified pages"""
+  classified_urls = []
+
+  def __init__(self, *args):
+    pass
+
+  def load_parameters_from_file(self, filename: str) -> None:
+    pass
+
+  def is_relevant(self, url: str, *args) -> dict:
+    self.classified_urls.append(url)
+    return {
+        "relevant": True,
+        "distances": {"threat": 0.5},
+        "relative_distances": {"threat": 0.5},
+        "guessed_category": "threat"
+    }
+
+
+def get_page(words: list[str], link: str) -> bytes:
+  return ("<html><head><title>t</title></head><body><article><p>" +
+          " ".join(words) + "</p><a href='" + link +
+          "'>link</a></article></body></html>").encode()
+
+
+@pytest.mark.parametrize("mode, follows_links", [("reuse", True),
+                                                 ("skip", False)])
+def test_near_duplicate_takes_over_the_classification(logger, monkeypatch, mode,
+                                                      follows_links):
+  # the extractor needs the dependencies of the classifier
+  extractor = pytest.importorskip("src.crawler_bot.extractor")
+  monkeypatch.setattr(extractor.classification, "Classifier", FakeClassifier)
+  monkeypatch.setattr(FakeClassifier, "classified_urls", [])
+  monkeypatch.setattr(extractor, "NEAR_DUPLICATE_MODE", mode)
+  os.mkdir("assets")
+  shutil.copy(os.path.join(ASSETS, "blacklist.json"), "assets")
+
+  html_database = storage.HTMLDatabase(logger)
+  url_queue = storage.URLQueue(logger, [])
+  page_extractor = extractor.Extractor(
+      0, logger, html_database, storage.UnprocessedHTMLDatabase(logger),
+      url_queue, storage.CrawledURLs(logger), storage.URLMap(logger),
+      monitoring.GlobalMonitor(logger, 1, 1),
+      near_duplicate_index=NearDuplicateIndex(logger))
+  words = get_words(1)
+  copy = list(words)
+  copy[150] = "changed"
+
+  page_extractor.process_entry(
+      storage.UnprocessedHTMLEntry("https://example.com/a", True,
+                                   get_page(words, "/one"), "utf-8"))
+  page_extractor.process_entry(
+      storage.UnprocessedHTMLEntry("https://example.com/b", False,
+                                   get_page(copy, "/two"), "utf-8"))
+
+  assert FakeClassifier.classified_urls == ["https://example.com/a"]
+  entry = html_database.database[-1]
+  assert entry.duplicate_of == "https://example.com/a"
+  assert entry.relevant
+  assert (entry.extracted_urls == ["https://example.com/two"]) == follows_links
+  queued = []
+  while not url_queue.is_empty():
+    queued.append(url_queue.get_url()[0].url)
+  assert ("https://example.com/two" in queued) == follows_links
@@ -0,0 +1,82 @@
+"""Tests of the retrievers"""
+import http.server
+import threading
+
+import pytest
+
+from src.crawler_bot import storage
+from src.crawler_bot.monitoring import GlobalMonitor
+from src.crawler_bot.retriever import Retriever
+from src.crawler_bot.scheduling import PolitenessScheduler
+from src.crawler_bot.storage import CrawledURLs, DomainTimers, RobotsTXTDatabase, UnprocessedHTMLDatabase, URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+
+def test_unexpected_error_does_not_end_the_retriever(logger, monkeypatch):
+  url_queue = URLQueue(logger, [])
+  url_queue.add_url(get_url_record("https://example.com/"), {"x": 0}, 0)
+  domain_timers = DomainTimers(logger)
+  scheduler = PolitenessScheduler(logger, url_queue, domain_timers)
+  robots_txt_database = RobotsTXTDatabase(logger)
+  retriever = Retriever(0, logger, scheduler, CrawledURLs(logger),
+                        UnprocessedHTMLDatabase(logger), domain_timers,
+                        robots_txt_database, GlobalMonitor(logger))
+
+  def get_crawl_delay(url):
+    raise RuntimeError("broken robots.txt entry")
+
+  monkeypatch.setattr(robots_txt_database, "get_crawl_delay", get_crawl_delay)
+  retriever.retrieve()
+
+  # the url was given back, so its domain is not blocked forever
+  assert scheduler.get_pending_urls() == []
+  assert scheduler.is_empty()
+
+
+class PageHandler(http.server.BaseHTTPRequestHandler):
+  """Records the requested paths and answers with an empty html page, there
+      is no robots.txt"""
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    self.server.paths.append(self.path)
+    status = 404 if self.path == "/robots.txt" else 200
+    self.send_response(status)
+    self.send_header("Content-Type", "text/html")
+    self.send_header("Content-Length", "0")
+    self.end_headers()
+
+  def log_message(self, *args):
+    pass
+
+
+@pytest.fixture
+def page_server():
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+  server.daemon_threads = True
+  server.paths = []
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  yield server
+  server.shutdown()
+  server.server_close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_discovered_url_is_requested_and_is_the_base_of_links(
+    logger, page_server, monkeypatch, backend):
+  monkeypatch.setattr(storage, "FRONTIER_BACKEND", backend)
+  host = "http://127.0.0.1:" + str(page_server.server_address[1])
+  url_queue = URLQueue(logger, [], "frontier.sqlite3")
+  url_queue.add_url(get_url_record(host + "/blog/index.php?b=2&a=1"), {}, 1)
+  domain_timers = DomainTimers(logger)
+  scheduler = PolitenessScheduler(logger, url_queue, domain_timers)
+  unprocessed_html_database = UnprocessedHTMLDatabase(logger)
+  retriever = Retriever(0, logger, scheduler, CrawledURLs(logger),
+                        unprocessed_html_database, domain_timers,
+                        RobotsTXTDatabase(logger), GlobalMonitor(logger))
+
+  retriever.retrieve()
+
+  assert page_server.paths[-1] == "/blog/index.php?b=2&a=1"
+  entry = unprocessed_html_database.get_entry()
+  assert entry.url == host + "/blog?a=1&b=2"
+  assert entry.base_url == host + "/blog/index.php?b=2&a=1"
@@ -0,0 +1,77 @@
+"""Tests of the robots.txt database"""
+import http.server
+import threading
+
+import pytest
+
+from src.crawler_bot import fetching
+from src.crawler_bot.storage import RobotsTXTDatabase
+from src.crawler_bot.url_record import get_url_record
+
+
+class RobotsTXTHandler(http.server.BaseHTTPRequestHandler):
+  """Answers every request with the status and body of the server"""
+
+  def do_GET(self):  # pylint: disable=invalid-name
+    self.send_response(self.server.status)
+    self.send_header("Content-Type", "text/plain")
+    self.send_header("Content-Length", str(len(self.server.body)))
+    self.end_headers()
+    try:
+      self.wfile.write(self.server.body)
+    except OSError:
+      pass
+
+  def log_message(self, *args):
+    pass
+
+
+@pytest.fixture
+def robots_txt_server():
+  server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RobotsTXTHandler)
+  server.daemon_threads = True
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  yield server
+  server.shutdown()
+  server.server_close()
+
+
+def get_page(server) -> str:
+  return "http://127.0.0.1:" + str(server.server_address[1]) + "/page"
+
+
+@pytest.mark.parametrize("status, allowed", [(503, False), (404, True)])
+def test_unreachable_robots_txt_disallows_everything(logger, robots_txt_server,
+                                                     status, allowed):
+  robots_txt_server.status = status
+  robots_txt_server.body = b""
+  url = get_url_record(get_page(robots_txt_server))
+  robots_txt_database = RobotsTXTDatabase(logger)
+
+  assert robots_txt_database.can_fetch(url) == allowed
+  assert robots_txt_database.is_unreachable(url) != allowed
+
+
+def test_failed_request_disallows_everything(logger):
+  robots_txt_database = RobotsTXTDatabase(logger)
+  # nothing listens on port 9 (discard)
+  url = get_url_record("http://127.0.0.1:9/page")
+
+  assert not robots_txt_database.can_fetch(url)
+  assert robots_txt_database.is_unreachable(url)
+
+
+def test_only_the_start_of_a_big_robots_txt_is_read(logger, robots_txt_server,
+                                                    monkeypatch):
+  monkeypatch.setattr(fetching, "ROBOTS_TXT_MAX_SIZE", 1024)
+  rules = b"User-agent: *\nDisallow: /private\n"
+  robots_txt_server.status = 200
+  robots_txt_server.body = rules + b"# padding\n" * 1000 + b"Disallow: /page\n"
+  url = get_url_record(get_page(robots_txt_server))
+  robots_txt_database = RobotsTXTDatabase(logger)
+
+  assert robots_txt_database.can_fetch(url)
+  robots_txt = robots_txt_database.get_entry(url).robots_txt
+  assert robots_txt.startswith(rules.decode())
+  assert len(robots_txt) <= 1024
+  assert robots_txt.endswith("\n")
@@ -0,0 +1,121 @@
+"""Tests of the politeness scheduler"""
+import time
+
+from src.crawler_bot import scheduling
+from src.crawler_bot.config import CIRCUIT_BREAKER_THRESHOLD, SCHEDULER_MAX_BUFFER_SIZE, SCHEDULER_MAX_DOMAIN_QUEUE
+from src.crawler_bot.scheduling import DomainHealth, PolitenessScheduler
+from src.crawler_bot.storage import DomainTimers, HTMLDatabase, URLQueue
+from src.crawler_bot.url_record import get_url_record
+
+
+def create_scheduler(logger, urls: list[str],
+                     slow_domains: list[str]) -> PolitenessScheduler:
+  """Creates a scheduler whose frontier holds the urls in their order, the
+      slow domains wait for their crawl delay for an hour"""
+  url_queue = URLQueue(logger, [])
+  for i, url in enumerate(urls):
+    url_queue.add_url(get_url_record(url), {"x": i / len(urls)}, 0)
+  domain_timers = DomainTimers(logger)
+  for domain in slow_domains:
+    domain_timers.set_timer(domain, time.time() + 3600)
+  return PolitenessScheduler(logger, url_queue, domain_timers)
+
+
+def test_slow_domain_does_not_empty_the_frontier(logger):
+  urls = ["https://slow.com/" + str(i) for i in range(20000)]
+  scheduler = create_scheduler(logger, urls, ["slow.com"])
+
+  for _ in range(100):
+    assert scheduler.get_url() == (None, None)
+
+  assert scheduler.amount_queued_urls() == SCHEDULER_MAX_DOMAIN_QUEUE
+  assert len(scheduler.url_queue.queue) == len(urls) - SCHEDULER_MAX_DOMAIN_QUEUE
+  # the frontier keeps its order behind the queued urls
+  assert scheduler.url_queue.peek_url().url == urls[SCHEDULER_MAX_DOMAIN_QUEUE]
+
+
+def test_slow_domains_are_capped_in_total(logger):
+  domains = ["slow" + str(i) + ".com" for i in range(50)]
+  urls = [
+      "https://" + domain + "/" + str(i) for i in range(200) for domain in domains
+  ]
+  scheduler = create_scheduler(logger, urls, domains)
+
+  for _ in range(100):
+    assert scheduler.get_url() == (None, None)
+
+  assert scheduler.amount_queued_urls() == SCHEDULER_MAX_BUFFER_SIZE
+  assert all(
+      len(queue) <= SCHEDULER_MAX_DOMAIN_QUEUE
+      for queue in scheduler.domain_queues.values())
+
+
+def test_ready_domain_behind_slow_domain_is_crawled(logger):
+  urls = ["https://slow.com/" + str(i) for i in range(100)]
+  urls += ["https://fast.com/" + str(i) for i in range(3)]
+  scheduler = create_scheduler(logger, urls, ["slow.com"])
+
+  url, _ = scheduler.get_url()
+
+  assert url.url == "https://fast.com/0"
+
+
+def test_only_a_failed_probe_opens_the_breaker_again():
+  health = DomainHealth()
+  for i in range(CIRCUIT_BREAKER_THRESHOLD):
+    health.record_failure("https://example.com/" + str(i))
+  open_until, delay_factor = health.open_until, health.delay_factor
+
+  # requests that were in flight when the breaker opened
+  for i in range(3):
+    health.record_failure("https://example.com/in-flight" + str(i))
+
+  assert (health.openings, health.open_until,
+          health.delay_factor) == (1, open_until, delay_factor)
+
+  health.probe_url = "https://example.com/probe"
+  health.record_failure("https://example.com/probe")
+
+  assert health.openings == 2
+  assert health.open_until > open_until
+
+
+def test_low_yield_domain_is_pruned_but_not_a_seed_domain(logger, monkeypatch):
+  monkeypatch.setattr(scheduling, "DOMAIN_MIN_YIELD", 0.5)
+  monkeypatch.setattr(scheduling, "DOMAIN_YIELD_MIN_PAGES", 2)
+  # hosts without a registrable domain, the domain is the host itself
+  url_queue = URLQueue(logger, ["http://127.0.0.1:8000/"])
+  url_queue.add_url(get_url_record("http://localhost:8000/a"), {}, 1)
+  html_database = HTMLDatabase(logger)
+  for host in ["127.0.0.1:8000", "localhost:8000"]:
+    for page in range(2):
+      html_database.add_html_document("http://" + host + "/" + str(page), "",
+                                      False, [], {}, {}, "")
+  scheduler = PolitenessScheduler(logger, url_queue, DomainTimers(logger),
+                                  html_database)
+
+  url, is_seed = scheduler.get_url()
+  assert (url.url, is_seed) == ("http://127.0.0.1:8000/", True)
+  assert scheduler.get_url() == (None, None)
+
+  assert html_database.get_domain_yield("localhost") == (2, 0)
+  assert [a["domain"] for a in scheduler.get_pruning_report()] == ["localhost"]
+  assert scheduler.is_empty()
+
+
+def test_only_a_successful_probe_closes_the_breaker():
+  health = DomainHealth()
+  for i in range(CIRCUIT_BREAKER_THRESHOLD):
+    health.record_failure("https://example.com/" + str(i))
+  open_until = health.open_until
+
+  # a request that was in flight when the breaker opened
+  health.record_success("https://example.com/in-flight", 0.1)
+
+  assert (health.openings, health.open_until) == (1, open_until)
+  assert health.allowed_in_flight() == 1
+
+  health.probe_url = "https://example.com/probe"
+  health.record_success("https://example.com/probe", 0.1)
+
+  assert (health.openings, health.open_until, health.probe_url) == (0, 0, None)
@@ -0,0 +1,272 @@
+"""Tests of the storage classes shared by the retrievers and extractors
+
+The containers of the storage classes are replaced by subclasses that switch
+threads or block inside their operations, so a missing lock loses updates and a
+lock shared by all keys blocks the other threads.
+"""
+import math
+import os
+import threading
+import time
+
+from src.crawler_bot.storage import BloomFilter, CrawledURLs, DomainTimers, HTMLDatabase, HTTPCache, URLMap, get_content_hash
+from src.crawler_bot.url_record import get_url_record
+
+AMOUNT_WORKERS = 16
+PAGES = 4000
+LINKS_PER_PAGE = 5
+AMOUNT_DOMAINS = 4
+
+
+class Gate:
+  """Blocks the threads that pass an item containing the busy string until it
+      is opened, all other threads only switch to another thread"""
+
+  def __init__(self, busy: str = None):
+    self.busy = busy
+    self.entered = threading.Event()
+    self.opened = threading.Event()
+
+  def pass_item(self, item) -> None:
+    if self.busy is not None and self.busy in str(item):
+      self.entered.set()
+      self.opened.wait(5)
+    else:
+      time.sleep(0.0001)
+
+
+class GatedList(list):
+  """List that passes every read and added item through a gate"""
+
+  def __init__(self, gate: Gate, items=()):
+    super().__init__(items)
+    self.gate = gate
+
+  def __getitem__(self, index):
+    item = super().__getitem__(index)
+    self.gate.pass_item(index)
+    return item
+
+  def append(self, item) -> None:
+    self.gate.pass_item(item)
+    super().append(item)
+
+  def extend(self, items) -> None:
+    items = list(items)
+    for item in items:
+      self.gate.pass_item(item)
+    super().extend(items)
+
+
+class GatedDict(dict):
+  """Dictionary that passes every written key through a gate, its default
+      values are gated lists"""
+
+  def __init__(self, gate: Gate):
+    super().__init__()
+    self.gate = gate
+
+  def setdefault(self, key, default=None):
+    self.gate.pass_item(key)
+    return super().setdefault(key, GatedList(self.gate, default))
+
+  def __setitem__(self, key, value) -> None:
+    self.gate.pass_item(key)
+    super().__setitem__(key, value)
+
+
+def to_url(page: int) -> str:
+  """Returns the url of a page, the pages are spread over AMOUNT_DOMAINS"""
+  return "https://www.site" + str(page % AMOUNT_DOMAINS) + ".com/" + str(page)
+
+
+def test_no_update_is_lost_under_contention(logger, capsys):
+  crawled_urls = CrawledURLs(logger)
+  domain_timers = DomainTimers(logger)
+  html_database = HTMLDatabase(logger)
+  # the statistics switch threads between reading and writing a counter
+  html_database.domain_statistics = GatedDict(Gate())
+  url_map = URLMap(logger)
+  errors = []
+
+  def worker(worker_id: int) -> None:
+    try:
+      for page in range(worker_id, PAGES, AMOUNT_WORKERS):
+        url = to_url(page)
+        links = [
+            get_url_record(to_url(page * LINKS_PER_PAGE + i))
+            for i in range(LINKS_PER_PAGE)
+        ]
+        crawled_urls.add_crawled_url(get_url_record(url))
+        domain_timers.set_timer(url.split("/")[2])
+        html_database.add_html_document(url, "",
+                                        page // AMOUNT_DOMAINS % 2 == 0,
+                                        [a.url for a in links], {}, {}, "")
+        url_map.add_url_paths(url, links)
+        for link in links:
+          crawled_urls.is_crawled(link)
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+
+  threads = [
+      threading.Thread(target=worker, args=(i,)) for i in range(AMOUNT_WORKERS)
+  ]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+  capsys.readouterr()
+
+  assert not errors
+  assert sorted(crawled_urls.get_urls()) == sorted(
+      to_url(a) for a in range(PAGES))
+  assert len(crawled_urls.seen_index) == PAGES
+  assert all(
+      crawled_urls.is_crawled(get_url_record(to_url(a))) for a in range(PAGES))
+  assert len(domain_timers.domain_timers) == AMOUNT_DOMAINS
+  assert len(html_database.get_entries()) == PAGES
+  assert len(url_map.get_paths()) == PAGES * LINKS_PER_PAGE
+  for domain in range(AMOUNT_DOMAINS):
+    assert html_database.get_domain_yield("site" + str(domain) + ".com") == (
+        PAGES // AMOUNT_DOMAINS, PAGES // AMOUNT_DOMAINS // 2)
+
+
+def test_busy_domain_does_not_block_other_domains(logger, capsys):
+  crawled_urls = CrawledURLs(logger)
+  domain_timers = DomainTimers(logger)
+  html_database = HTMLDatabase(logger)
+  url_map = URLMap(logger)
+  gate = Gate("busy.com")
+  crawled_urls.crawled_urls = GatedList(gate)
+  domain_timers.domain_timers = GatedDict(gate)
+  html_database.domain_statistics = GatedDict(gate)
+  url_map.url_map = GatedList(gate)
+  # a domain whose timer and statistics live behind other locks
+  busy_locks = {
+      domain_timers.locks.get_lock("busy.com"),
+      html_database.locks.get_lock("busy.com")
+  }
+  domain = next(
+      d for d in ("site" + str(i) + ".com" for i in range(100))
+      if not {domain_timers.locks.get_lock(d),
+              html_database.locks.get_lock(d)} & busy_locks)
+  url = "https://" + domain + "/"
+
+  # every storage class is blocked inside an update of busy.com
+  busy_updates = [
+      (crawled_urls.add_crawled_url, get_url_record("https://busy.com/")),
+      (domain_timers.set_timer, "busy.com"),
+      (html_database.add_html_document, "https://busy.com/", "", True, [], {},
+       {}, ""),
+      (url_map.add_url_path, "https://busy.com/", "https://busy.com/"),
+  ]
+  busy_threads = []
+  for update, *args in busy_updates:
+    gate.entered.clear()
+    busy_threads.append(
+        threading.Thread(target=update, args=args, daemon=True))
+    busy_threads[-1].start()
+    assert gate.entered.wait(5)
+
+  updates = [
+      (crawled_urls.add_crawled_url, get_url_record(url)),
+      (domain_timers.set_timer, domain),
+      (html_database.add_html_document, url, "", True, [], {}, {}, ""),
+      (url_map.add_url_path, url, url),
+  ]
+  thread = threading.Thread(
+      target=lambda: [update(*args) for update, *args in updates], daemon=True)
+  thread.start()
+  thread.join(5)
+  finished = not thread.is_alive()
+  gate.opened.set()
+  for t in busy_threads:
+    t.join(5)
+  capsys.readouterr()
+
+  assert finished
+  assert html_database.get_domain_yield(domain) == (1, 1)
+  assert html_database.get_domain_yield("busy.com") == (1, 1)
+  assert len(crawled_urls.get_urls()) == 2
+  assert len(url_map.get_paths()) == 2
+
+
+def test_http_cache_drops_the_least_recently_used_pages(logger):
+  http_cache = HTTPCache(logger, "cache", max_entries=3, max_bytes=30)
+  for page in range(3):
+    http_cache.store("https://example.com/" + str(page), b"x" * 10, None,
+                     None, None)
+  # the first page is the most recently used now
+  http_cache.load_body("https://example.com/0")
+  # the fourth page is one too many and makes the bodies too big
+  http_cache.store("https://example.com/3", b"x" * 15, None, None, None)
+
+  assert list(http_cache.database) == [
+      "https://example.com/0", "https://example.com/3"
+  ]
+  assert http_cache.amount_bytes == 25
+  assert len(os.listdir(os.path.join("cache", "bodies"))) == 2
+
+  http_cache.save()
+  loaded_cache = HTTPCache(logger, "cache", max_entries=1)
+  loaded_cache.load()
+  assert list(loaded_cache.database) == ["https://example.com/3"]
+  assert loaded_cache.amount_bytes == 15
+
+
+def test_http_cache_entry_always_belongs_to_its_body(logger):
+  http_cache = HTTPCache(logger, "cache")
+  url = "https://example.com/"
+  errors = []
+
+  def worker(worker_id: int) -> None:
+    try:
+      for i in range(200):
+        if (worker_id + i) % 3 == 0:
+          http_cache.remove(url)
+        else:
+          http_cache.store(url, str((worker_id, i)).encode() * 100, None, None,
+                           None)
+        result = http_cache.load_body(url)
+        with http_cache.lock:
+          entry = http_cache.database.get(url)
+          if entry is not None:
+            with open(http_cache._body_filename(url), "rb") as f:  # pylint: disable=protected-access
+              assert get_content_hash(f.read()) == entry.content_hash
+        assert result is None or len(result[0]) > 0
+    except Exception as e:  # pylint: disable=broad-except
+      errors.append(e)
+
+  threads = [
+      threading.Thread(target=worker, args=(i,)) for i in range(AMOUNT_WORKERS)
+  ]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+
+  assert not errors
+  # no temporary files are left behind
+  assert len(os.listdir(os.path.join("cache", "bodies"))) == len(
+      http_cache.database)
+
+
+def test_bloom_filter_never_misses_and_keeps_its_error_rate():
+  capacity = 10000
+  error_rate = 0.01
+  bloom_filter = BloomFilter(capacity, error_rate)
+  # optimal size and amount of hashes for the capacity and error rate
+  assert bloom_filter.size == int(-capacity * math.log(error_rate) /
+                                  math.log(2)**2)
+  assert bloom_filter.amount_hashes == 7
+  assert len(bloom_filter.bits) == (bloom_filter.size + 7) // 8
+
+  fingerprints = [
+      get_url_record(to_url(page)).fingerprint for page in range(3 * capacity)
+  ]
+  for fingerprint in fingerprints[:capacity]:
+    bloom_filter.add(fingerprint)
+
+  assert all(a in bloom_filter for a in fingerprints[:capacity])
+  false_positives = sum(a in bloom_filter for a in fingerprints[capacity:])
+  assert false_positives / (2 * capacity) < 2 * error_rate
@@ -0,0 +1,86 @@
+"""Tests of the url filter"""
+import pytest
+
+from src.crawler_bot.parsing import parse_page
+from src.crawler_bot.url_filter import URLFilter
+
+BLACKLIST = {
+    "main_domains": ["facebook"],
+    "main_domains+tlds": ["twitter.com"],
+    "extensions": [".pdf", ""]
+}
+PAGE = "https://example.com/a/b/page.html?x=1"
+
+
+@pytest.fixture
+def url_filter(logger) -> URLFilter:
+  return URLFilter(logger, BLACKLIST)
+
+
+def filter_url(url_filter: URLFilter, href: str, base_url: str) -> str:
+  """Returns the url that is requested for a link, None if it is dropped"""
+  urls = url_filter.filter_urls([href], base_url)
+  return urls[0].target if urls else None
+
+
+@pytest.mark.parametrize("base_url, href, target", [
+    ("https://example.com/blog/", "post1.html",
+     "https://example.com/blog/post1.html"),
+    ("https://example.com/a/index.html", "b.html", "https://example.com/a/b.html"),
+    ("https://example.com/index.php?b=2&a=1", "list.php?y=1&x=2",
+     "https://example.com/list.php?y=1&x=2"),
+])
+def test_links_are_resolved_against_the_received_url(url_filter, base_url,
+                                                     href, target):
+  assert filter_url(url_filter, href, base_url) == target
+
+
+def test_requested_url_keeps_what_the_canonical_form_drops(url_filter):
+  url = url_filter.filter_urls(["https://example.com/a/index.php?b=2&a=1#top"],
+                               "https://example.com/")[0]
+
+  assert url.url == "https://example.com/a?a=1&b=2"
+  assert url.target == "https://example.com/a/index.php?b=2&a=1"
+
+
+@pytest.mark.parametrize("href, target", [
+    ("c.html", "https://example.com/a/b/c.html"),
+    ("./c.html", "https://example.com/a/b/c.html"),
+    ("../c.html", "https://example.com/a/c.html"),
+    ("../../../c.html", "https://example.com/c.html"),
+    ("/c.html", "https://example.com/c.html"),
+    ("?q=1", "https://example.com/a/b/page.html?q=1"),
+    ("c.html#part", "https://example.com/a/b/c.html"),
+    ("//other.org/x", "https://other.org/x"),
+    ("http://other.org/x", "http://other.org/x"),
+])
+def test_links_are_resolved_like_a_browser(url_filter, href, target):
+  assert filter_url(url_filter, href, PAGE) == target
+
+
+@pytest.mark.parametrize("href", [
+    "", "#top", "mailto:a@example.com", "javascript:void(0)", "tel:123",
+    "https://www.facebook.de/x", "https://twitter.com/x", "/file.pdf",
+    "https://under_score/x", "https://example.com/" + "a" * 2048
+])
+def test_invalid_and_blacklisted_links_are_dropped(url_filter, href):
+  assert filter_url(url_filter, href, PAGE) is None
+
+
+def test_links_to_the_same_canonical_url_are_kept_once(url_filter):
+  urls = url_filter.filter_urls(
+      ["c.html", "/a/b/c.html", "c.html?utm_source=x", "C.html"], PAGE)
+
+  assert [a.url for a in urls] == [
+      "https://example.com/a/b/c.html", "https://example.com/a/b/C.html"
+  ]
+
+
+def test_base_element_is_the_base_of_relative_links():
+  parsed_page = parse_page(
+      "<html><head><base href='https://cdn.example.com/docs/'></head>"
+      "<body><a href='x.html'>x</a></body></html>", False)
+
+  assert parsed_page.base_href == "https://cdn.example.com/docs/"
+  assert parse_page("<html><body><a href='x'>x</a></body></html>",
+                    False).base_href is None
@@ -0,0 +1,63 @@
+"""Tests of the url record"""
+import pickle
+
+import pytest
+
+from src.crawler_bot.public_suffix import get_main_domain, get_registrable_domain
+from src.crawler_bot.url_record import get_url_record
+
+
+@pytest.mark.parametrize("url,domain", [
+    ("https://www.bbc.co.uk/news", "bbc.co.uk"),
+    ("http://127.0.0.1:8000/a", "127.0.0.1"),
+    ("http://localhost:8080/a", "localhost"),
+    ("https://gov.uk/a", "gov.uk"),
+])
+def test_every_url_has_a_domain(url, domain):
+  assert get_url_record(url).domain == domain
+
+
+def test_record_is_immutable_and_pickled_as_it_is():
+  url = get_url_record("https://www.example.com/a/?utm_source=x")
+
+  with pytest.raises(AttributeError):
+    url.domain = "other.com"
+  copy = pickle.loads(pickle.dumps(url))
+  assert (copy.url, copy.domain, copy.fingerprint) == (url.url, url.domain,
+                                                       url.fingerprint)
+
+
+@pytest.mark.parametrize("netloc,domain", [
+    ("www.bbc.co.uk", "bbc.co.uk"),
+    ("WWW.Example.COM:8080", "example.com"),
+    ("user@www.bbc.co.uk.", "bbc.co.uk"),
+    # *.ck: every label below ck is a public suffix
+    ("foo.ck", None),
+    ("a.foo.ck", "a.foo.ck"),
+    ("b.a.foo.ck", "a.foo.ck"),
+    # !www.ck: www.ck is registrable even though *.ck matches it
+    ("www.ck", "www.ck"),
+    ("a.www.ck", "www.ck"),
+    ("ck", None),
+    ("city.kawasaki.jp", "city.kawasaki.jp"),
+    ("x.city.kawasaki.jp", "city.kawasaki.jp"),
+    ("co.uk", None),
+])
+def test_registrable_domain_follows_the_public_suffix_list(netloc, domain):
+  assert get_registrable_domain(netloc) == domain
+
+
+@pytest.mark.parametrize("netloc,domain", [
+    ("10.0.0.1:80", "10.0.0.1"),
+    ("[::1]:8080", "::1"),
+    ("user@[2001:db8::1]", "2001:db8::1"),
+])
+def test_ip_address_is_its_own_registrable_domain(netloc, domain):
+  assert get_registrable_domain(netloc) == domain
+  assert get_main_domain(netloc) is None
+
+
+@pytest.mark.parametrize("netloc", ["localhost", "intranet.", "localhost:8080"])
+def test_single_label_host_has_no_registrable_domain(netloc):
+  assert get_registrable_domain(netloc) is None
+  assert get_main_domain(netloc) is None